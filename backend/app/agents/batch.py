@@ -0,0 +1,188 @@
+"""
+Batch replay of scripted conversations through an agent graph
+Used for offline evaluation: each conversation runs on its own thread and
+verification session (both discarded afterwards), conversations run
+concurrently up to a limit, and results are yielded as each one finishes,
+followed by an aggregate summary.
+
+    python -m app.agents.batch conversations.jsonl --concurrency 8 > results.ndjson
+    OPERATOR_API_TOKEN=... python -m app.agents.batch conversations.jsonl --url http://localhost:8000
+
+Input is JSONL (or a JSON list) of {"id": ..., "customer_id": ..., "turns": ["...", ...]}.
+Without --url the graph runs in-process.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List
+
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from app.services.admission import AdmissionRejected, batch_admission
+from app.services.sessions import sessions
+from app.services.snapshots import snapshots
+
+CHAT_BATCH_CONCURRENCY = int(os.getenv("CHAT_BATCH_CONCURRENCY", "8"))
+CHAT_BATCH_MAX_CONCURRENCY = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", "32"))
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+async def run_conversation(graph_app, conversation: Dict[str, Any], thread_id: str,
+                           keep_threads: bool = False) -> Dict[str, Any]:
+    """Play one conversation turn by turn; stops at the first failing turn"""
+    customer_id = conversation.get("customer_id")
+    config = {"configurable": {"thread_id": thread_id}}
+    result = {"id": conversation.get("id"), "thread_id": thread_id, "turns": []}
+    started = time.perf_counter()
+    try:
+        for message in conversation.get("turns", []):
+            inputs = {"messages": [("user", message)]}
+            if customer_id:
+                inputs["customer_id"] = customer_id
+            turn_started = time.perf_counter()
+            try:
+                state = await graph_app.ainvoke(inputs, config=config)
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+                break
+            messages = state["messages"]
+            turn_start = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+            result["turns"].append({
+                "message": message,
+                "response": str(messages[-1].content),
+                "tools": [m.name for m in messages[turn_start:] if isinstance(m, ToolMessage)],
+                "latency_ms": round((time.perf_counter() - turn_started) * 1000, 1),
+            })
+    finally:
+        # Replays must not leak verified sessions or pile up checkpoints
+        sessions.end(thread_id)
+        snapshots.end(thread_id)
+        if not keep_threads:
+            await graph_app.checkpointer.adelete_thread(thread_id)
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+async def run_batch(graph_app, conversations: List[Dict[str, Any]], concurrency: int = CHAT_BATCH_CONCURRENCY,
+                    keep_threads: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield {"type": "conversation", ...} per conversation in completion order,
+    then one {"type": "summary", ...}. Closing the iterator cancels the rest.
+    """
+    batch_id = uuid.uuid4().hex[:12]
+    concurrency = max(1, min(concurrency, CHAT_BATCH_MAX_CONCURRENCY, len(conversations) or 1))
+    pending = asyncio.Queue()
+    for index, conversation in enumerate(conversations):
+        pending.put_nowait((index, conversation))
+    done: asyncio.Queue = asyncio.Queue()
+
+    async def worker():
+        while not pending.empty():
+            index, conversation = pending.get_nowait()
+            thread_id = f"batch:{batch_id}:{index}"
+            try:
+                # One slot per conversation from the pool shared by every batch
+                async with batch_admission.slot():
+                    result = await run_conversation(graph_app, conversation, thread_id, keep_threads)
+            except AdmissionRejected as e:
+                result = {"id": conversation.get("id"), "thread_id": thread_id, "turns": [],
+                          "error": f"Overloaded: {e.reason}"}
+            except Exception as e:
+                result = {"id": conversation.get("id"), "thread_id": thread_id, "turns": [],
+                          "error": f"{type(e).__name__}: {e}"}
+            await done.put({"type": "conversation", "index": index, **result})
+
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    turn_latencies: List[float] = []
+    errors = 0
+    try:
+        for _ in range(len(conversations)):
+            result = await done.get()
+            turn_latencies += [t["latency_ms"] for t in result["turns"]]
+            errors += "error" in result
+            yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    wall = time.perf_counter() - started
+    turn_latencies.sort()
+    yield {
+        "type": "summary",
+        "batch_id": batch_id,
+        "conversations": len(conversations),
+        "turns": len(turn_latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "wall_ms": round(wall * 1000, 1),
+        "conversations_per_s": round(len(conversations) / wall, 2) if wall else 0.0,
+        "turns_per_s": round(len(turn_latencies) / wall, 2) if wall else 0.0,
+        "turn_p50_ms": _percentile(turn_latencies, 0.50),
+        "turn_p95_ms": _percentile(turn_latencies, 0.95),
+    }
+
+
+def load_conversations(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+async def _run_remote(url: str, payload: Dict[str, Any], token: str) -> AsyncIterator[Dict[str, Any]]:
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    async with httpx.AsyncClient(timeout=None, headers=headers) as client:
+        async with client.stream("POST", url.rstrip("/") + "/chat/batch", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+async def _run_local(graph: str, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    from app.agents import loader
+
+    module = await loader.aget_graph(graph)
+    async for item in run_batch(module.app, payload["conversations"], payload["concurrency"]):
+        yield item
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay scripted conversations through the agent")
+    parser.add_argument("path", help="JSONL or JSON list of conversations")
+    parser.add_argument("--url", help="API base URL; runs the graph in-process when omitted")
+    parser.add_argument("--graph", choices=["chat", "local"], default="chat")
+    parser.add_argument("--concurrency", type=int, default=CHAT_BATCH_CONCURRENCY)
+    parser.add_argument("--token", default=os.getenv("OPERATOR_API_TOKEN", ""),
+                        help="Operator token for --url (default: $OPERATOR_API_TOKEN)")
+    args = parser.parse_args()
+
+    payload = {"conversations": load_conversations(args.path), "concurrency": args.concurrency, "graph": args.graph}
+
+    async def run():
+        stream = _run_remote(args.url, payload, args.token) if args.url else _run_local(args.graph, payload)
+        async for item in stream:
+            if item["type"] == "summary":
+                print(json.dumps(item), file=sys.stderr)
+            else:
+                print(json.dumps(item), flush=True)
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Context-window compaction for the agent graphs.
+Keeps a sliding window of recent turns verbatim, folds older turns into a
+running summary, trims bulky tool payloads and enforces a hard token budget
+on every prompt sent to the LLM.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass
+from typing import List
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "6"))
+TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+TOOL_RESULT_CHARS = int(os.getenv("CONTEXT_TOOL_RESULT_CHARS", "600"))
+SUMMARY_MAX_CHARS = int(os.getenv("CONTEXT_SUMMARY_MAX_CHARS", "2000"))
+SUMMARY_LINE_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token), good enough for budgeting"""
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    tokens = estimate_tokens(content) + 4  # per-message framing overhead
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tokens += estimate_tokens(json.dumps([c["args"] for c in message.tool_calls]))
+    return tokens
+
+
+class CompactionStats:
+    """Process-wide counters for how much context was trimmed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.compacted_requests = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.tokens_trimmed = 0
+        self.turns_summarized = 0
+
+    def record(self, tokens_in: int, tokens_out: int, turns_summarized: int):
+        with self._lock:
+            self.requests += 1
+            self.tokens_in += tokens_in
+            self.tokens_out += tokens_out
+            self.tokens_trimmed += max(tokens_in - tokens_out, 0)
+            self.turns_summarized += turns_summarized
+            if tokens_out < tokens_in:
+                self.compacted_requests += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "compacted_requests": self.compacted_requests,
+                "tokens_in": self.tokens_in,
+                "tokens_out": self.tokens_out,
+                "tokens_trimmed": self.tokens_trimmed,
+                "turns_summarized": self.turns_summarized,
+            }
+
+
+COMPACTION_STATS = CompactionStats()
+
+
+@dataclass
+class CompactionResult:
+    messages: List[BaseMessage]  # prompt messages to send (after the system prompt)
+    removed: List[BaseMessage]  # messages folded into the summary; drop them from state
+    summary: str
+    tokens_before: int
+    tokens_after: int
+    turns_summarized: int = 0
+
+
+def _split_turns(messages: List[BaseMessage]) -> List[List[BaseMessage]]:
+    """Group messages into turns, each starting at a customer message"""
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def _summarize_turn(turn: List[BaseMessage]) -> str:
+    """One-line extractive summary; keeps tool names but never tool payloads"""
+    parts = []
+    tools_used = []
+    for message in turn:
+        if isinstance(message, HumanMessage):
+            parts.append("Customer: " + _clip(str(message.content), SUMMARY_LINE_CHARS))
+        elif isinstance(message, AIMessage):
+            tools_used.extend(call["name"] for call in message.tool_calls)
+            if message.content and not message.tool_calls:
+                parts.append("Assistant: " + _clip(str(message.content), SUMMARY_LINE_CHARS))
+    if tools_used:
+        parts.append("Tools: " + ", ".join(tools_used))
+    return " | ".join(parts)
+
+
+def _trim_tool_result(message: ToolMessage, limit: int) -> ToolMessage:
+    content = str(message.content)
+    if len(content) <= limit:
+        return message
+    # Cut on a row boundary so tabular results stay parseable
+    cut = content.rfind("\n", 0, limit)
+    if cut < limit // 2:
+        cut = limit
+    omitted = len(content) - cut
+    return message.model_copy(update={"content": content[:cut] + f"... [{omitted} chars omitted]"})
+
+
+def _tokens(messages: List[BaseMessage]) -> int:
+    return sum(message_tokens(m) for m in messages)
+
+
+def compact_history(
+    messages: List[BaseMessage],
+    summary: str = "",
+    recent_turns: int = RECENT_TURNS,
+    token_budget: int = TOKEN_BUDGET,
+    tool_result_chars: int = TOOL_RESULT_CHARS,
+) -> CompactionResult:
+    """
+    Build the prompt history for one LLM call.
+    Older turns are folded into `summary` (returned in `removed` so the caller can
+    drop them from graph state), tool payloads outside the current turn are
+    clipped, and whole turns are summarized until the prompt fits `token_budget`.
+    The current turn is never split, so tool calls always keep their results.
+    """
+    tokens_before = estimate_tokens(summary) + _tokens(messages)
+    turns = _split_turns(messages)
+
+    old_turns = turns[:-recent_turns] if len(turns) > recent_turns else []
+    kept_turns = turns[len(old_turns):]
+
+    def fold(turn: List[BaseMessage]):
+        nonlocal summary
+        line = _summarize_turn(turn)
+        if line:
+            summary = f"{summary}\n{line}" if summary else line
+        if len(summary) > SUMMARY_MAX_CHARS:
+            # Keep the most recent part of the running summary
+            summary = summary[-SUMMARY_MAX_CHARS:].split("\n", 1)[-1]
+
+    for turn in old_turns:
+        fold(turn)
+
+    def render(turns_: List[List[BaseMessage]], tool_limit: int) -> List[BaseMessage]:
+        rendered = []
+        for i, turn in enumerate(turns_):
+            # Bulky tool payloads from earlier turns have already been answered
+            current = i == len(turns_) - 1
+            for message in turn:
+                if isinstance(message, ToolMessage) and not current:
+                    message = _trim_tool_result(message, tool_limit)
+                rendered.append(message)
+        return rendered
+
+    prompt = render(kept_turns, tool_result_chars)
+    # Hard budget: summarize whole turns, oldest first, but always keep the current one
+    while len(kept_turns) > 1 and estimate_tokens(summary) + _tokens(prompt) > token_budget:
+        turn = kept_turns.pop(0)
+        old_turns.append(turn)
+        fold(turn)
+        prompt = render(kept_turns, tool_result_chars)
+
+    # Still over: clip tool results inside the current turn as a last resort
+    if estimate_tokens(summary) + _tokens(prompt) > token_budget:
+        prompt = [
+            _trim_tool_result(m, tool_result_chars) if isinstance(m, ToolMessage) else m
+            for m in prompt
+        ]
+
+    removed = [m for turn in old_turns for m in turn]
+    tokens_after = estimate_tokens(summary) + _tokens(prompt)
+    COMPACTION_STATS.record(tokens_before, tokens_after, len(old_turns))
+    return CompactionResult(prompt, removed, summary, tokens_before, tokens_after, len(old_turns))
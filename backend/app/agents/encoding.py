@@ -0,0 +1,82 @@
+"""
+Compact encoding of tool results for the LLM
+Tool output is re-read by the model on every later turn, so it is rendered for
+tokens, not for humans: only the fields the agent needs, one header line plus
+pipe-separated rows for lists of records, compact JSON for everything else,
+and a continuation cursor instead of unbounded lists.
+"""
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from app.agents.compaction import estimate_tokens
+from app.services.metrics import REGISTRY
+
+# Fields the agent actually uses; ids and internal keys are dropped
+TRANSACTION_FIELDS = ("date", "amount", "merchant", "category", "status")
+BALANCE_FIELDS = ("balance", "currency")
+CARD_FIELDS = ("card_id", "reason", "date")
+# Rows per tool result; the rest is reachable through the cursor
+MAX_RESULT_ROWS = int(os.getenv("TOOL_RESULT_MAX_ROWS", "20"))
+
+TOOL_RESULT_TOKENS = REGISTRY.histogram(
+    "bank_tool_result_tokens", "Estimated tokens of encoded tool results", ("tool",),
+    buckets=(8, 16, 32, 64, 128, 256, 512, 1024, 2048),
+)
+
+
+def project(record: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    return {f: record[f] for f in fields if f in record}
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    # The separator and line breaks would corrupt the table
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def table(rows: Iterable[Dict[str, Any]], fields: Sequence[str]) -> str:
+    """Header line + one pipe-separated line per row: keys are written once, not per row"""
+    lines = ["|".join(fields)]
+    lines += ["|".join(_cell(row.get(f)) for f in fields) for row in rows]
+    return "\n".join(lines)
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def encode_transactions(rows: List[Dict[str, Any]], next_cursor: Optional[str] = None,
+                        fields: Sequence[str] = TRANSACTION_FIELDS) -> str:
+    if not rows:
+        return "No transactions found."
+    text = table(rows, fields)
+    if next_cursor:
+        text += f"\nmore available: cursor={next_cursor}"
+    return text
+
+
+def encode_cards(status: Dict[str, Any]) -> str:
+    if "error" in status:
+        return f"Error: {status['error']}"
+    if not status["blocked_cards"]:
+        return "No blocked cards."
+    return "blocked cards:\n" + table(status["blocked_cards"], CARD_FIELDS)
+
+
+def encode_record(record: Dict[str, Any], fields: Optional[Sequence[str]] = None) -> str:
+    """`key=value` pairs for a single flat record (errors pass through as text)"""
+    if "error" in record:
+        return f"Error: {record['error']}"
+    if fields is not None:
+        record = project(record, fields)
+    return " ".join(f"{k}={_cell(v)}" for k, v in record.items())
+
+
+def record_result(tool: str, text: str) -> str:
+    """Record the encoded size of one tool result and pass it through"""
+    TOOL_RESULT_TOKENS.observe(estimate_tokens(text), tool)
+    return text
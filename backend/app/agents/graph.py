@@ -1,80 +1,93 @@
-from typing import Annotated, Literal, TypedDict, Union
+import os
+import time
+from typing import Annotated, Literal, Optional, TypedDict, Union
 from typing_extensions import TypedDict
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, BaseMessage, RemoveMessage, ToolMessage
 from langgraph.graph import StateGraph, END, START
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
 
-from app.agents.tools import verify_identity, get_recent_transactions, block_card, get_account_balance
+from app.agents.compaction import compact_history
+# Prompt, tool set and tool schemas come from the shared registry
+from app.agents.prompts import PROMPT_VERSION, SYSTEM_MESSAGES, TOOL_SCHEMAS, TOOLS as tools, record_prompt, state_message
+from app.agents.providers import ProviderPool, create_pool
+from app.agents.router import classify
+from app.services.audit import get_audit_log, redact
+from app.services.checkpointer import get_checkpointer
+from app.services.metrics import REGISTRY, instrument_node, record_llm_usage, record_tool_loop
+from app.services.sessions import sessions
 
 # Define the state
 class AgentState(TypedDict):
     messages: Annotated[list[BaseMessage], add_messages]
     customer_id: Union[str, None]
     is_verified: bool
-
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-
-# Define Tools
-tools = [verify_identity, get_recent_transactions, block_card, get_account_balance]
-llm_with_tools = llm.bind_tools(tools)
+    summary: str  # running summary of turns compacted out of `messages`
+    intent: str  # latest intent from the fast-path router
 
 # Define Nodes
-def routing_node(state: AgentState):
+async def routing_node(state: AgentState, config: RunnableConfig):
     """
-    Analyzes the user's intent and routes to the appropriate flow.
-    """
-    messages = state["messages"]
-    last_message = messages[-1]
-    
-    # Prompt for routing
-    system_prompt = """You are an intelligent routing agent for Bank ABC. 
-    Analyze the user's latest message and route them to one of the following intents:
-    1. CARD_ISSUES: Lost/stolen card, declined payments.
-    2. ACCOUNT_SERVICING: Statement requests, address change.
-    3. ACCOUNT_OPENING: New account, eligibility.
-    4. DIGITAL_SUPPORT: Login issues, app crash.
-    5. TRANSFERS_BILLS: Failed transfers, bill pay.
-    6. ACCOUNT_CLOSURE: Close account, retention.
-    7. GENERAL: Greetings, or unclear intent.
-    
-    If you need more info to clarify intent, ask the user.
+    Classifies the latest customer message with the deterministic router.
+    Greetings and informational-only flows are answered from templates here;
+    everything else falls through to the LLM agent.
     """
-    
-    # This is a simplification. In a real app, we might use a structured output or specific classification chain.
-    # For this POC, we'll let the main LLM handle the conversation and tool calling directly for "Deep Logic" flows,
-    # and identifying the intent.
-    
-    return {"messages": [AIMessage(content="I am routing your request...")]} # Placeholder update
+    last_message = state["messages"][-1]
+    # The agent's last reply: an answer to its question is never templated
+    previous = next(
+        (str(m.content) for m in reversed(state["messages"][:-1]) if isinstance(m, AIMessage) and m.content),
+        None,
+    )
+    decision = classify(str(last_message.content), previous)
 
-def call_model(state: AgentState):
-    messages = state["messages"]
-    
-    # Enforce guardrails via system message
-    system_message = SystemMessage(content="""You are a helpful banking assistant for Bank ABC.
-    You have access to tools to help customers.
-    
-    CRITICAL SECURITY RULES:
-    1. You MUST verify the user's identity using verify_identity(customer_id, pin) BEFORE providing any account details (balance, transactions) or performing actions (block card).
-    2. If the user hasn't provided their Customer ID and PIN, ask for it politely.
-    3. Once verified, you can proceed with their request.
-    
-    Flow Handling:
-    - Card & ATM Issues: Use block_card tool if needed.
-    - Account Servicing: Use get_account_balance or check profile.
-    
-    For other flows (Account Opening, Digital Support, Transfers, Account Closure),
-    provide a helpful stub response simulating that flow, e.g., "I can help you with account opening. Please visit our nearest branch..."
-    
-    Current User Verification Status: """ + str(state.get("is_verified", False)))
-    
-    # Prepend system message if not present or needs update
-    # Note: efficient way is to just pass it to invoke
-    response = llm_with_tools.invoke([system_message] + messages)
-    return {"messages": [response]}
+    update = {"intent": decision.intent}
+    # Verification is owned by the session cache: pick up expiry (or a
+    # verification done elsewhere) without asking the model
+    update.update(sessions.verification_state(config["configurable"]["thread_id"]))
+    if decision.reply is not None:
+        update["messages"] = [AIMessage(content=decision.reply)]
+    return update
+
+def after_routing(state: AgentState) -> Literal["agent", "__end__"]:
+    # A templated reply ends the turn without an LLM call
+    if isinstance(state["messages"][-1], AIMessage):
+        return "__end__"
+    return "agent"
+
+# Tools are async: ToolNode fans out the tool calls of one turn concurrently
+tool_node = ToolNode(tools)
+
+def _tool_outcome(message: ToolMessage) -> str:
+    content = str(message.content)
+    if message.status == "error" or content.startswith("Error"):
+        return "error"
+    if content.startswith(("Identity not verified", "This session is verified for a different")):
+        return "denied"
+    return "ok"
+
+async def call_tools(state: AgentState, config: RunnableConfig):
+    """Run the requested tools, audit each call, then mirror a successful verify_identity into state"""
+    thread_id = config["configurable"]["thread_id"]
+    started = time.perf_counter()
+    update = await tool_node.ainvoke(state, config)
+    # Tools of one round run concurrently, so each call is logged with the round's wall time
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    calls = {call["id"]: call for call in state["messages"][-1].tool_calls}
+    audit_log = get_audit_log()
+    for message in update.get("messages", []):
+        call = calls.get(getattr(message, "tool_call_id", None))
+        if call is None:
+            continue
+        args = dict(call["args"])
+        audit_log.record(
+            call["name"], customer_id=args.pop("customer_id", None) or state.get("customer_id"),
+            session_id=thread_id, source="text", outcome=_tool_outcome(message),
+            latency_ms=elapsed_ms, detail=redact(args) or None,
+        )
+    update.update(sessions.verification_state(thread_id))
+    return update
 
 def should_continue(state: AgentState) -> Literal["tools", "__end__"]:
     messages = state["messages"]
@@ -84,16 +97,57 @@ def should_continue(state: AgentState) -> Literal["tools", "__end__"]:
         return "tools"
     return "__end__"
 
-# This is a simplified single-node graph with tools for the POC to handle all flows dynamically
-# In a more complex setup, we would have separate subgraphs for each flow.
+def build_graph(pool: ProviderPool, graph_name: str, runtime: str = "text",
+                checkpointer: Optional[object] = None):
+    """
+    Compile the agent graph over an LLM provider pool.
+    /chat and /chat/local share this graph and differ only in the pool.
+    """
+    system_message = SYSTEM_MESSAGES[runtime]
+
+    async def call_model(state: AgentState, config: RunnableConfig):
+        messages = state["messages"]
+
+        # Sliding window + running summary keeps prompt size flat as the thread grows
+        compacted = compact_history(messages, state.get("summary", ""))
+        prompt = [system_message]
+        if compacted.summary:
+            prompt.append(SystemMessage(content="Summary of earlier conversation:\n" + compacted.summary))
+        # Static prefix first, volatile session state last
+        prompt += compacted.messages + [state_message(state.get("is_verified", False), state.get("customer_id"))]
+        record_prompt(graph_name, runtime, prompt)
+
+        # Fastest healthy provider, with failover (and optional hedging) inside the pool
+        response = await pool.ainvoke(prompt, config)
+        record_llm_usage(graph_name, response)
+        if not response.tool_calls:
+            record_tool_loop(graph_name, messages)
+
+        update = {"messages": [RemoveMessage(id=m.id) for m in compacted.removed] + [response]}
+        if compacted.removed:
+            update["summary"] = compacted.summary
+        return update
+
+    # This is a simplified single-node graph with tools for the POC to handle all flows dynamically
+    # In a more complex setup, we would have separate subgraphs for each flow.
+    workflow = StateGraph(AgentState)
+    workflow.add_node("router", instrument_node(graph_name, "router", routing_node))
+    workflow.add_node("agent", instrument_node(graph_name, "agent", call_model))
+    workflow.add_node("tools", instrument_node(graph_name, "tools", call_tools))
 
-workflow = StateGraph(AgentState)
+    workflow.add_edge(START, "router")
+    workflow.add_conditional_edges("router", after_routing)
+    workflow.add_conditional_edges("agent", should_continue)
+    workflow.add_edge("tools", "agent")
 
-workflow.add_node("agent", call_model)
-workflow.add_node("tools", ToolNode(tools))
+    REGISTRY.register_snapshot(f"bank_llm_pool_{graph_name}", pool.snapshot, "LLM provider pool")
+    # Per-thread conversation state (PIN verification, history) survives across requests and restarts
+    return workflow.compile(checkpointer=checkpointer or get_checkpointer())
 
-workflow.add_edge(START, "agent")
-workflow.add_conditional_edges("agent", should_continue)
-workflow.add_edge("tools", "agent")
+# Provider preference order, e.g. "openai,ollama" or "openai@http://localhost:9001/v1,openai"
+pool = create_pool(os.getenv("LLM_PROVIDERS", "openai,ollama").split(","), TOOL_SCHEMAS)
+MODEL_NAME = pool.description
 
-app = workflow.compile()
+# Label for this graph's metrics
+GRAPH_NAME = "chat"
+app = build_graph(pool, GRAPH_NAME)
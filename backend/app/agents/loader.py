@@ -0,0 +1,84 @@
+"""
+Lazy, cached access to the agent graphs
+Importing a graph module pulls in the LLM client libraries, builds its provider
+pool and compiles the graph, which dominates cold start. `app.main` imports
+nothing graph-related at module level: each graph is built once per process, on
+the first request that needs it or by the startup warmup, whichever comes first.
+"""
+import asyncio
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+GRAPH_MODULES = {
+    "chat": "app.agents.graph",
+    "local": "app.agents.graph_local",
+}
+
+# Graphs built (and their provider connections opened) right after startup
+AGENT_WARMUP = [name.strip() for name in os.getenv("AGENT_WARMUP", "chat").split(",") if name.strip()]
+AGENT_WARMUP_TIMEOUT = float(os.getenv("AGENT_WARMUP_TIMEOUT", "10"))
+
+_graphs: Dict[str, object] = {}
+_lock = threading.Lock()
+_build_seconds: Dict[str, float] = {}
+_warmup_seconds: Dict[str, float] = {}
+
+
+def get_graph(name: str):
+    """The graph module for `name` (`app`, `pool`, `MODEL_NAME`, ...), built on first use"""
+    module = _graphs.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        if name not in _graphs:
+            started = time.perf_counter()
+            _graphs[name] = importlib.import_module(GRAPH_MODULES[name])
+            _build_seconds[name] = time.perf_counter() - started
+            logger.info(f"Built {name} graph in {_build_seconds[name] * 1000:.0f}ms")
+    return _graphs[name]
+
+
+async def aget_graph(name: str):
+    """get_graph() that keeps the event loop free while a cold graph is built"""
+    module = _graphs.get(name)
+    if module is not None:
+        return module
+    return await asyncio.to_thread(get_graph, name)
+
+
+def cache_scope(module) -> str:
+    """Response-cache scope: replies are only reused for the same models and prompt"""
+    return f"{module.MODEL_NAME}:{module.PROMPT_VERSION}"
+
+
+async def warmup(names: Iterable[str] = AGENT_WARMUP, timeout: float = AGENT_WARMUP_TIMEOUT) -> Dict[str, float]:
+    """
+    Build the named graphs and open their provider connections ahead of the
+    first request. Failures are logged, never raised: the request path still
+    builds lazily.
+    """
+    for name in names:
+        started = time.perf_counter()
+        try:
+            module = await aget_graph(name)
+            await asyncio.wait_for(module.pool.awarmup(), timeout)
+        except Exception as e:
+            logger.warning(f"Warmup of {name} graph failed: {e!r}")
+            continue
+        _warmup_seconds[name] = time.perf_counter() - started
+        logger.info(f"Warmed {name} graph in {_warmup_seconds[name] * 1000:.0f}ms")
+    return dict(_warmup_seconds)
+
+
+def snapshot() -> Dict:
+    return {
+        "loaded": len(_graphs),
+        "build_seconds": {name: round(s, 4) for name, s in _build_seconds.items()},
+        "warmup_seconds": {name: round(s, 4) for name, s in _warmup_seconds.items()},
+    }
@@ -0,0 +1,117 @@
+"""
+Prompt and tool-schema registry shared by the text graphs and the voice worker
+Everything static is built once at import: the system prompt and the tool JSON
+schemas. Per-turn state (verification) goes into a short trailing message, so
+every LLM call starts with the same bytes (tools, then system prompt) and
+provider-side prefix caching can hit. The chat, local and voice runtimes share
+one prefix; only a short runtime note follows it.
+"""
+import hashlib
+import json
+from typing import Collection, Dict, List, Mapping, Optional
+
+from langchain_core.messages import BaseMessage, SystemMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.agents.compaction import estimate_tokens, message_tokens
+from app.agents.tools import (
+    analyze_spending, block_card, get_account_balance, get_card_status, get_recent_transactions, verify_identity,
+)
+from app.services.metrics import REGISTRY
+
+# Bump whenever the prompt or tool set changes; cached responses are keyed on it
+PROMPT_VERSION = "5"
+
+TOOLS = [verify_identity, get_recent_transactions, block_card, get_account_balance, analyze_spending, get_card_status]
+# OpenAI-style schemas, converted once and bound as-is by every provider
+TOOL_SCHEMAS = [convert_to_openai_tool(t) for t in TOOLS]
+
+SYSTEM_PREFIX = """You are a helpful banking assistant for Bank ABC.
+You have access to tools to help customers.
+
+CRITICAL SECURITY RULES:
+1. You MUST verify the customer's identity using verify_identity(customer_id, pin) BEFORE providing any account details (balance, transactions) or performing actions (block card).
+2. If the customer hasn't provided their Customer ID and PIN, ask for them politely.
+3. Once verified, you can proceed with their request. Verification lasts for the rest of the conversation.
+4. For irreversible actions like blocking a card, ask for explicit confirmation first: "To confirm, should I proceed with blocking your card?"
+
+AVAILABLE FLOWS:
+- Card & ATM Issues: lost/stolen cards, declined payments. Use get_card_status to see which cards are already blocked and block_card if needed.
+- Account Servicing: balance, transaction history, profile. Use get_account_balance and get_recent_transactions; for spending questions (totals by merchant/category/period, declined payments) use analyze_spending rather than adding up transactions yourself.
+- Account Opening, Digital App Support, Transfers & Bill Payments, Account Closure: informational only. Give a helpful stub response simulating that flow, e.g. "I can help you with account opening. Please visit our nearest branch..."
+
+The current session state is given in the last system message.
+"""
+
+RUNTIME_NOTES = {
+    "text": "Keep replies short and readable in a chat window.",
+    "voice": "Be conversational, empathetic, and professional. Keep responses concise for voice interaction.",
+}
+SYSTEM_PROMPTS = {runtime: SYSTEM_PREFIX + "\n" + note for runtime, note in RUNTIME_NOTES.items()}
+SYSTEM_MESSAGES = {runtime: SystemMessage(content=prompt) for runtime, prompt in SYSTEM_PROMPTS.items()}
+
+# Identifies the shared prefix on /metrics, so runtimes and replicas can be checked for drift
+PREFIX_DIGEST = hashlib.sha256(
+    (json.dumps(TOOL_SCHEMAS, sort_keys=True) + SYSTEM_PREFIX).encode()
+).hexdigest()[:12]
+_TOOL_TOKENS = estimate_tokens(json.dumps(TOOL_SCHEMAS, separators=(",", ":")))
+_STATIC_TOKENS = {runtime: _TOOL_TOKENS + message_tokens(m) for runtime, m in SYSTEM_MESSAGES.items()}
+
+PROMPT_CACHEABLE_RATIO = REGISTRY.histogram(
+    "bank_prompt_cacheable_ratio", "Share of estimated prompt tokens in the static (cacheable) prefix", ("graph",),
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+REGISTRY.register_snapshot(
+    "bank_prompt_prefix",
+    lambda: {"info": {PREFIX_DIGEST: 1}, "tokens": dict(_STATIC_TOKENS)},
+    "Static prompt prefix",
+)
+
+
+def state_message(is_verified: bool, customer_id: Optional[str] = None) -> SystemMessage:
+    """Per-turn session state, sent after the conversation so it never breaks the cached prefix"""
+    if is_verified and customer_id:
+        return SystemMessage(content=f"Session state: identity verified as customer {customer_id}.")
+    return SystemMessage(content=f"Session state: identity verified = {bool(is_verified)}.")
+
+
+def record_prompt(graph: str, runtime: str, messages: List[BaseMessage]) -> float:
+    """Observe (and return) the cacheable share of one assembled prompt"""
+    total = _TOOL_TOKENS + sum(message_tokens(m) for m in messages)
+    ratio = _STATIC_TOKENS[runtime] / total if total else 0.0
+    PROMPT_CACHEABLE_RATIO.observe(ratio, graph)
+    return ratio
+
+
+def _flatten(schema: Dict) -> Dict:
+    """Gemini declarations take plain types: Optional[X] becomes X, defaults are dropped"""
+    options = [s for s in schema.get("anyOf", ()) if s.get("type") != "null"]
+    flat = dict(options[0]) if len(options) == 1 else {k: v for k, v in schema.items() if k != "anyOf"}
+    if "description" in schema:
+        flat["description"] = schema["description"]
+    flat.pop("default", None)
+    return flat
+
+
+def function_declarations(params: Mapping[str, Optional[Collection[str]]]) -> List[Dict]:
+    """
+    Gemini-style {"name", "description", "parameters"} declarations derived from
+    TOOL_SCHEMAS, in registry order. `params` maps each exposed tool to the
+    parameters the runtime implements (None: all but customer_id).
+    """
+    declarations = []
+    for schema in TOOL_SCHEMAS:
+        function = schema["function"]
+        if function["name"] not in params:
+            continue
+        allowed = params[function["name"]]
+        properties = {
+            name: _flatten(spec) for name, spec in function["parameters"].get("properties", {}).items()
+            if (name in allowed if allowed is not None else name != "customer_id")
+        }
+        parameters = {"type": "object", "properties": properties}
+        required = [name for name in function["parameters"].get("required", ()) if name in properties]
+        if required:
+            parameters["required"] = required
+        declarations.append({"name": function["name"], "description": function["description"], "parameters": parameters})
+    return declarations
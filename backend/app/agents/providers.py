@@ -0,0 +1,286 @@
+"""
+Latency-aware LLM provider pool
+Each provider (OpenAI, Ollama, or any OpenAI-compatible endpoint) keeps a
+persistent HTTP client and rolling latency / error estimates. Calls go to the
+fastest healthy provider, fail over to the next one on error or timeout, and
+can optionally be hedged to the runner-up after a deadline. Providers that
+keep failing are put in a cooldown so a brownout costs one timeout, not one
+per request.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from app.services.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+# Seconds before a slow call is duplicated to the runner-up; 0 disables hedging
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+LLM_FAILURE_THRESHOLD = int(os.getenv("LLM_FAILURE_THRESHOLD", "3"))
+LLM_COOLDOWN = float(os.getenv("LLM_COOLDOWN", "30"))
+# Share of calls sent to the runner-up so a recovered provider can win traffic back
+LLM_EXPLORE_RATE = float(os.getenv("LLM_EXPLORE_RATE", "0.05"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+
+PROVIDER_LATENCY = REGISTRY.histogram("bank_llm_provider_duration_seconds", "LLM call latency per provider", ("provider",))
+PROVIDER_CALLS = REGISTRY.counter("bank_llm_provider_calls_total", "LLM calls per provider by outcome", ("provider", "outcome"))
+PROVIDER_HEDGES = REGISTRY.counter("bank_llm_hedges_total", "LLM calls duplicated to a second provider", ("provider",))
+
+
+class ProviderError(RuntimeError):
+    """Raised when every provider in the pool failed for one call"""
+
+
+class Provider:
+    """One LLM backend with rolling health statistics"""
+
+    ALPHA = 0.2  # EWMA weight of the newest sample
+
+    def __init__(self, name: str, model: Any, prior_latency: float = 1.0,
+                 failure_threshold: int = LLM_FAILURE_THRESHOLD, cooldown: float = LLM_COOLDOWN,
+                 warm: Optional[Callable[[], Awaitable]] = None):
+        self.name = name
+        self.model = model
+        self.warm = warm  # opens connections / loads weights without a billable call
+        self.latency: Optional[float] = None  # EWMA seconds, None until the first success
+        self.prior_latency = prior_latency
+        self.error_rate = 0.0  # EWMA of failures (0..1)
+        self.consecutive_failures = 0
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.open_until = 0.0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def healthy(self, now: Optional[float] = None) -> bool:
+        return (now or time.monotonic()) >= self.open_until
+
+    def score(self) -> float:
+        """Expected cost of a call: lower is better; errors inflate it"""
+        latency = self.latency if self.latency is not None else self.prior_latency
+        return latency * (1 + 4 * self.error_rate) * (1 + 0.1 * self.in_flight)
+
+    def record_success(self, elapsed: float):
+        with self._lock:
+            self.latency = elapsed if self.latency is None else self.ALPHA * elapsed + (1 - self.ALPHA) * self.latency
+            self.error_rate *= 1 - self.ALPHA
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.error_rate = self.ALPHA + (1 - self.ALPHA) * self.error_rate
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                # Back off harder while the outage continues (capped at 8x)
+                factor = min(2 ** (self.consecutive_failures - self.failure_threshold), 8)
+                self.open_until = time.monotonic() + self.cooldown * factor
+
+    def snapshot(self) -> Dict:
+        return {
+            "latency_ms": round((self.latency or 0.0) * 1000, 1),
+            "error_rate": round(self.error_rate, 3),
+            "healthy": self.healthy(),
+            "in_flight": self.in_flight,
+        }
+
+
+class ProviderPool:
+    """Routes each LLM call to the best provider with failover and optional hedging"""
+
+    def __init__(self, providers: Sequence[Provider], timeout: float = LLM_TIMEOUT,
+                 hedge_after: float = LLM_HEDGE_AFTER, explore_rate: float = LLM_EXPLORE_RATE):
+        self.providers: List[Provider] = list(providers)
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.explore_rate = explore_rate
+
+    @property
+    def description(self) -> str:
+        return "+".join(p.name for p in self.providers) or "none"
+
+    def set_providers(self, providers: Sequence[Provider]):
+        self.providers = list(providers)
+
+    def ranked(self) -> List[Provider]:
+        """Healthy providers by score, then cooling-down ones as a last resort"""
+        now = time.monotonic()
+        healthy = sorted((p for p in self.providers if p.healthy(now)), key=Provider.score)
+        cooling = sorted((p for p in self.providers if not p.healthy(now)), key=lambda p: p.open_until)
+        if len(healthy) > 1 and random.random() < self.explore_rate:
+            healthy[0], healthy[1] = healthy[1], healthy[0]
+        return healthy + cooling
+
+    async def _call(self, provider: Provider, messages: List, config: Optional[Dict], hedge: bool = False):
+        # Tag the run so streaming consumers can tell a hedged duplicate from the primary
+        run_config = dict(config or {})
+        run_config["metadata"] = {**(run_config.get("metadata") or {}), "llm_provider": provider.name, "llm_hedge": hedge}
+        provider.in_flight += 1
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(provider.model.ainvoke(messages, config=run_config), self.timeout)
+        except asyncio.CancelledError:
+            raise  # lost a hedge race; not the provider's fault
+        except Exception:
+            provider.record_failure()
+            PROVIDER_CALLS.inc(provider.name, "error")
+            raise
+        finally:
+            provider.in_flight -= 1
+        elapsed = time.perf_counter() - started
+        provider.record_success(elapsed)
+        PROVIDER_LATENCY.observe(elapsed, provider.name)
+        PROVIDER_CALLS.inc(provider.name, "ok")
+        return result
+
+    async def _hedged(self, primary: Provider, backup: Provider, messages: List, config: Optional[Dict]):
+        first = asyncio.ensure_future(self._call(primary, messages, config))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+            if done:
+                if first.exception() is None:
+                    return first.result()
+                # Primary failed before the deadline: plain failover
+                logger.warning(f"LLM provider {primary.name} failed: {first.exception()!r}")
+                return await self._call(backup, messages, config)
+
+            PROVIDER_HEDGES.inc(backup.name)
+            tasks.append(asyncio.ensure_future(self._call(backup, messages, config, hedge=True)))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The loser (or everything, if the caller was cancelled) is abandoned
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def ainvoke(self, messages: List, config: Optional[Dict] = None):
+        """Invoke the best provider; fail over (or hedge) until one answers"""
+        ranked = self.ranked()
+        if not ranked:
+            raise ProviderError("No LLM providers are configured")
+        errors = []
+        i = 0
+        while i < len(ranked):
+            provider = ranked[i]
+            backup = ranked[i + 1] if self.hedge_after > 0 and i + 1 < len(ranked) else None
+            try:
+                if backup is not None:
+                    return await self._hedged(provider, backup, messages, config)
+                return await self._call(provider, messages, config)
+            except Exception as e:
+                names = provider.name if backup is None else f"{provider.name}/{backup.name}"
+                logger.warning(f"LLM provider {names} failed: {e!r}")
+                errors.append(f"{names}: {e!r}")
+            i += 2 if backup is not None else 1
+        raise ProviderError("All LLM providers failed: " + "; ".join(errors))
+
+    async def awarmup(self):
+        """Warm every provider concurrently; a provider that fails to warm is only logged"""
+        async def warm(provider: Provider):
+            try:
+                await provider.warm()
+            except Exception as e:
+                logger.warning(f"LLM provider {provider.name} warmup failed: {e!r}")
+
+        await asyncio.gather(*(warm(p) for p in self.providers if p.warm is not None))
+
+    def snapshot(self) -> Dict:
+        """Per-provider health as {stat: {provider: value}} (metrics collector shape)"""
+        stats: Dict[str, Dict[str, float]] = {"latency_ms": {}, "error_rate": {}, "healthy": {}, "in_flight": {}}
+        for provider in self.providers:
+            for key, value in provider.snapshot().items():
+                stats[key][provider.name] = float(value)
+        return stats
+
+
+_http_clients: Dict[str, Any] = {}
+
+
+def _shared_http_clients():
+    """Process-wide keep-alive clients for OpenAI-compatible providers"""
+    if not _http_clients:
+        import httpx
+
+        limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS // 2)
+        _http_clients["sync"] = httpx.Client(limits=limits, timeout=LLM_TIMEOUT)
+        _http_clients["async"] = httpx.AsyncClient(limits=limits, timeout=LLM_TIMEOUT)
+    return _http_clients["sync"], _http_clients["async"]
+
+
+def build_provider(kind: str, tools: Sequence, prior_latency: float = 1.0) -> Provider:
+    """
+    `kind` is `openai`, `ollama`, or `openai@<base_url>` for any
+    OpenAI-compatible server (e.g. the benchmark stand-in).
+    """
+    if kind == "openai" or kind.startswith("openai@"):
+        from langchain_openai import ChatOpenAI
+
+        base_url = kind.partition("@")[2] or os.getenv("OPENAI_BASE_URL") or None
+        http_client, http_async_client = _shared_http_clients()
+        model = ChatOpenAI(
+            model=OPENAI_MODEL,
+            temperature=0,
+            base_url=base_url,
+            timeout=LLM_TIMEOUT,
+            max_retries=0,  # the pool fails over instead of retrying a browning-out backend
+            http_client=http_client,
+            http_async_client=http_async_client,
+            stream_usage=True,
+        )
+        name = f"openai:{OPENAI_MODEL}" + (f"@{base_url}" if base_url else "")
+
+        async def warm():
+            # Listing models is free and leaves a TLS connection in the keep-alive pool
+            await model.root_async_client.models.list()
+    elif kind == "ollama":
+        from langchain_ollama import ChatOllama
+
+        keep_alive = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # keep weights loaded between calls
+        model = ChatOllama(
+            model=OLLAMA_MODEL,
+            temperature=0,
+            base_url=OLLAMA_BASE_URL,
+            keep_alive=keep_alive,
+            client_kwargs={"timeout": LLM_TIMEOUT},
+        )
+        name = f"ollama:{OLLAMA_MODEL}"
+
+        async def warm():
+            # A generate request without a prompt just loads the model into memory
+            import httpx
+
+            async with httpx.AsyncClient(base_url=OLLAMA_BASE_URL, timeout=LLM_TIMEOUT) as client:
+                response = await client.post("/api/generate", json={"model": OLLAMA_MODEL, "keep_alive": keep_alive})
+                response.raise_for_status()
+    else:
+        raise ValueError(f"Unknown LLM provider: {kind}")
+    return Provider(name, model.bind_tools(tools), prior_latency=prior_latency, warm=warm)
+
+
+def create_pool(kinds: Sequence[str], tools: Sequence) -> ProviderPool:
+    """Build a pool from provider kinds in preference order; unavailable ones are skipped"""
+    providers = []
+    for index, kind in enumerate(k.strip() for k in kinds if k.strip()):
+        try:
+            # Earlier entries win until real latency samples exist
+            providers.append(build_provider(kind, tools, prior_latency=1.0 + 0.5 * index))
+        except Exception as e:
+            logger.warning(f"LLM provider {kind} unavailable: {e}")
+    return ProviderPool(providers)
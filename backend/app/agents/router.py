@@ -0,0 +1,189 @@
+"""
+Deterministic fast-path intent router
+Classifies the latest customer message with precompiled keyword patterns and
+answers greetings and informational-only flows from templates, so only
+ambiguous or account-touching turns reach the LLM.
+"""
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Intents from the routing prompt; order is only used for tie-free reporting
+INTENT_PATTERNS: Dict[str, list] = {
+    "CARD_ISSUES": [
+        r"cards?", r"atm", r"lost", r"stolen", r"declined?", r"block(?:ed)?", r"frozen", r"freeze",
+    ],
+    "ACCOUNT_SERVICING": [
+        r"balance", r"statements?", r"transactions?", r"address", r"profile", r"history",
+        r"how much (?:money )?(?:do i|have i)",
+    ],
+    "ACCOUNT_OPENING": [
+        r"open(?:ing)? (?:an? |a new |new )?(?:\w+ )?account", r"new account", r"eligib\w*", r"sign(?:ing)? up",
+    ],
+    "DIGITAL_SUPPORT": [
+        r"log ?in", r"sign ?in", r"password", r"app", r"crash(?:ed|es|ing)?", r"online banking",
+        r"locked out", r"website", r"two.factor|2fa|otp",
+    ],
+    "TRANSFERS_BILLS": [
+        r"transfers?", r"bills?", r"bill ?pay", r"wire", r"send(?:ing)? money", r"payee",
+    ],
+    "ACCOUNT_CLOSURE": [
+        r"clos(?:e|ing|ure)(?: (?:my|the|an?))? ?(?:\w+ )?account", r"cancel (?:my )?account", r"closure",
+    ],
+    "GENERAL": [
+        r"hi", r"hello", r"hey", r"good (?:morning|afternoon|evening)", r"thanks?(?: you)?", r"bye",
+        r"goodbye", r"help",
+    ],
+}
+
+# Anything that looks like credentials or account data must go through the LLM + tools
+SENSITIVE_PATTERN = re.compile(r"\d{3,}|\buser\w*\d|\bpin\b|\bverif", re.IGNORECASE)
+
+# One alternation with a named group per intent: a single scan classifies the message
+_CLASSIFIER = re.compile(
+    "|".join(
+        rf"(?P<{intent}>\b(?:{'|'.join(patterns)})\b)"
+        for intent, patterns in INTENT_PATTERNS.items()
+    ),
+    re.IGNORECASE,
+)
+
+# Flows the system prompt only wants answered with informational stubs
+STUB_RESPONSES = {
+    "ACCOUNT_OPENING": (
+        "I can help you with account opening. You can open a new account online at bankabc.com/open "
+        "or at your nearest branch with a valid photo ID and proof of address. Would you like to know "
+        "about eligibility for a specific account type?"
+    ),
+    "DIGITAL_SUPPORT": (
+        "Sorry you're having trouble with digital banking. Please make sure the Bank ABC app is updated "
+        "to the latest version, then try restarting it. If you're locked out, use \"Forgot password\" on "
+        "the login screen to reset your credentials. Is there anything else I can help with?"
+    ),
+    "TRANSFERS_BILLS": (
+        "I can help with transfers and bill payments. Failed transfers are usually refunded within 1-3 "
+        "business days. Please double-check the payee details and your daily transfer limit, then try "
+        "again in the app. Is there anything else I can help with?"
+    ),
+    "ACCOUNT_CLOSURE": (
+        "I'm sorry to hear you'd like to close your account. May I ask the reason? We may be able to "
+        "offer a fee waiver or a better-suited account. If you'd still like to proceed, account closure "
+        "can be completed at any branch."
+    ),
+}
+
+GREETING_RESPONSE = (
+    "Hello! Welcome to Bank ABC. I can help with card issues, your balance and transactions, "
+    "account opening, app support, transfers, and account closure. How can I help you today?"
+)
+THANKS_RESPONSE = "You're welcome! Is there anything else I can help you with?"
+GOODBYE_RESPONSE = "Thank you for banking with Bank ABC. Goodbye!"
+
+# Greetings only take the fast path when the message is essentially just a greeting
+MAX_GREETING_WORDS = 6
+# Words a templated greeting/thanks/goodbye may consist of; anything else
+# ("yes", "please", "help", ...) may be answering the agent and needs the LLM
+SOCIAL_WORDS = frozenset({
+    "hi", "hello", "hey", "there", "good", "morning", "afternoon", "evening", "thanks", "thank",
+    "you", "so", "much", "very", "bye", "goodbye", "again", "all", "everyone", "bank", "abc",
+})
+_WORD = re.compile(r"[a-z]+")
+# An agent turn that asked for a confirmation or for the customer's ID/PIN:
+# the next message answers it. A trailing "?" alone doesn't count.
+PENDING_REPLY_PATTERN = re.compile(
+    r"\bconfirm|\bwould you like\b|\bshall i\b|\bdo you want\b|\bproceed\b"
+    r"|\b(?:your|the) (?:customer ?id|pin)\b",
+    re.IGNORECASE,
+)
+# Generic closers ("Is there anything else I can help with?") ask for nothing
+CLOSER_PATTERN = re.compile(r"[^.?!]*\banything else\b[^.?!]*[.?!]?", re.IGNORECASE)
+# The router's own replies never leave a question pending
+TEMPLATE_REPLIES = frozenset({GREETING_RESPONSE, THANKS_RESPONSE, GOODBYE_RESPONSE, *STUB_RESPONSES.values()})
+
+
+def awaiting_reply(previous: Optional[str]) -> bool:
+    """Whether the agent's last reply asked for data or a confirmation the next message answers"""
+    if not previous or previous.strip() in TEMPLATE_REPLIES:
+        return False
+    return PENDING_REPLY_PATTERN.search(CLOSER_PATTERN.sub(" ", previous)) is not None
+
+
+@dataclass
+class RouteDecision:
+    intent: str
+    reply: Optional[str] = None  # set when the turn can be answered without the LLM
+
+
+class RouterStats:
+    """Fast-path hit counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.fast_path = 0
+        self.by_intent: Dict[str, int] = {}
+
+    def record(self, decision: RouteDecision):
+        with self._lock:
+            self.total += 1
+            self.by_intent[decision.intent] = self.by_intent.get(decision.intent, 0) + 1
+            if decision.reply is not None:
+                self.fast_path += 1
+
+    @property
+    def hit_rate(self) -> float:
+        return self.fast_path / self.total if self.total else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "total": self.total,
+                "fast_path": self.fast_path,
+                "hit_rate": self.hit_rate,
+                "by_intent": dict(self.by_intent),
+            }
+
+
+ROUTER_STATS = RouterStats()
+
+
+def classify(text: str, previous: Optional[str] = None) -> RouteDecision:
+    """
+    Classify one customer message and decide whether a template can answer it.
+    `previous` is the agent's last reply: when it asked for data or a
+    confirmation, the message is an answer and always goes to the LLM.
+    """
+    hits: Dict[str, int] = {}
+    for match in _CLASSIFIER.finditer(text):
+        hits[match.lastgroup] = hits.get(match.lastgroup, 0) + 1
+
+    general = hits.pop("GENERAL", 0)
+    sensitive = SENSITIVE_PATTERN.search(text) is not None
+    pending = awaiting_reply(previous)
+
+    if not hits:
+        intent = "GENERAL"
+        reply = None
+        lowered = text.lower()
+        words = _WORD.findall(lowered)
+        if (general and not sensitive and not pending and len(words) <= MAX_GREETING_WORDS
+                and all(word in SOCIAL_WORDS for word in words)):
+            if "bye" in lowered:
+                reply = GOODBYE_RESPONSE
+            elif "thank" in lowered:
+                reply = THANKS_RESPONSE
+            else:
+                reply = GREETING_RESPONSE
+        decision = RouteDecision(intent, reply)
+    elif len(hits) == 1:
+        intent = next(iter(hits))
+        # Only informational flows are templated; card/account servicing needs tools
+        reply = STUB_RESPONSES.get(intent) if not (sensitive or pending) else None
+        decision = RouteDecision(intent, reply)
+    else:
+        # Mixed signals (e.g. "transfer my balance"): let the LLM sort it out
+        decision = RouteDecision(max(hits, key=hits.get))
+
+    ROUTER_STATS.record(decision)
+    return decision
@@ -1,36 +1,181 @@
+import asyncio
+import os
+from typing import Optional
+
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
-from app.services import banking
+from app.agents import encoding
+from app.services import analytics, banking
+from app.services.sessions import session_error, verify_customer
+from app.services.snapshots import snapshots
+
+# Per-tool backend timeouts (seconds). Tools are async so ToolNode runs the
+# calls of a multi-tool turn concurrently instead of one after another.
+TOOL_TIMEOUTS = {
+    "verify_identity": float(os.getenv("VERIFY_IDENTITY_TIMEOUT", "3")),
+    "get_recent_transactions": float(os.getenv("GET_TRANSACTIONS_TIMEOUT", "5")),
+    "block_card": float(os.getenv("BLOCK_CARD_TIMEOUT", "10")),
+    "get_account_balance": float(os.getenv("GET_BALANCE_TIMEOUT", "3")),
+    "get_card_status": float(os.getenv("GET_CARD_STATUS_TIMEOUT", "3")),
+    "analyze_spending": float(os.getenv("ANALYZE_SPENDING_TIMEOUT", "5")),
+}
+
+def _timed_out(name: str) -> str:
+    return f"Error: {name} timed out. Please try again shortly."
+
+def _thread_id(config: RunnableConfig) -> str:
+    return (config or {}).get("configurable", {}).get("thread_id", "")
+
+def _session_error(config: RunnableConfig, customer_id: str) -> Optional[str]:
+    # Checked locally against the verification session: no extra model hop
+    return session_error(_thread_id(config), customer_id)
 
-@tool
-def verify_identity(customer_id: str, pin: str) -> bool:
+@tool(parse_docstring=True)
+async def verify_identity(customer_id: str, pin: str, config: RunnableConfig) -> str:
     """
     Verifies the identity of a customer using their ID and PIN.
-    This must be called and return True before accessing any sensitive account data.
+    This must succeed before accessing any sensitive account data.
+    Verification lasts for the rest of the conversation; do not call it again once verified.
+
+    Args:
+        customer_id: Customer ID (e.g., user123)
+        pin: 4-digit PIN number
     """
-    return banking.verify_identity(customer_id, pin)
+    try:
+        _, message = await verify_customer(
+            _thread_id(config), customer_id, pin, timeout=TOOL_TIMEOUTS["verify_identity"]
+        )
+    except asyncio.TimeoutError:
+        return _timed_out("verify_identity")
+    return encoding.record_result("verify_identity", message)
 
-@tool
-def get_recent_transactions(customer_id: str, count: int = 5) -> str:
+@tool(parse_docstring=True)
+async def get_recent_transactions(customer_id: str, config: RunnableConfig, count: int = 5,
+                                  cursor: Optional[str] = None) -> str:
     """
-    Retrieves the recent transactions for a customer.
+    Retrieves the recent transactions for a customer, newest first, as a table.
     Requires successful identity verification first.
+
+    Args:
+        customer_id: Verified customer ID
+        count: Number of transactions to retrieve (default 5)
+        cursor: Value after "more available: cursor=" in a previous result, to get the next page
     """
-    transactions = banking.get_recent_transactions(customer_id, count)
-    return str(transactions)
+    error = _session_error(config, customer_id)
+    if error:
+        return error
+    count = max(1, min(count, encoding.MAX_RESULT_ROWS))
+    timeout = TOOL_TIMEOUTS["get_recent_transactions"]
+    try:
+        # The first page usually comes from the snapshot prefetched at verification
+        page = None
+        if cursor is None and count <= snapshots.transactions:
+            page = snapshots.transactions_page(await snapshots.get(_thread_id(config), customer_id, timeout), count)
+        if page is None:
+            page = await banking.aget_transactions_page(customer_id, count, cursor, timeout=timeout)
+    except asyncio.TimeoutError:
+        return _timed_out("get_recent_transactions")
+    return encoding.record_result(
+        "get_recent_transactions", encoding.encode_transactions(page["transactions"], page["next_cursor"])
+    )
 
-@tool
-def block_card(customer_id: str, card_id: str, reason: str) -> str:
+@tool(parse_docstring=True)
+async def block_card(customer_id: str, card_id: str, reason: str, config: RunnableConfig) -> str:
     """
     Blocks a customer's card. This is an irreversible action.
-    Requires successful identity verification first.
+    Requires successful identity verification and explicit customer confirmation first.
+
+    Args:
+        customer_id: Verified customer ID
+        card_id: Card identifier
+        reason: Reason for blocking (lost, stolen, compromised)
     """
-    return banking.block_card(customer_id, card_id, reason)
+    error = _session_error(config, customer_id)
+    if error:
+        return error
+    try:
+        result = await banking.ablock_card(
+            customer_id, card_id, reason, timeout=TOOL_TIMEOUTS["block_card"],
+            session_id=_thread_id(config), source="text",
+        )
+        return encoding.record_result("block_card", result)
+    except asyncio.TimeoutError:
+        # The write may still complete; don't invite a blind retry
+        return "The card block request is taking longer than expected and may still complete. Do not retry; ask the customer to check back shortly."
 
-@tool
-def get_account_balance(customer_id: str) -> str:
+@tool(parse_docstring=True)
+async def get_account_balance(customer_id: str, config: RunnableConfig) -> str:
     """
     Retrieves the account balance for a customer.
     Requires successful identity verification first.
+
+    Args:
+        customer_id: Verified customer ID
+    """
+    error = _session_error(config, customer_id)
+    if error:
+        return error
+    try:
+        snapshot = await snapshots.get(_thread_id(config), customer_id, TOOL_TIMEOUTS["get_account_balance"])
+        balance_info = snapshot["balance"]
+    except asyncio.TimeoutError:
+        return _timed_out("get_account_balance")
+    return encoding.record_result("get_account_balance", encoding.encode_record(balance_info, encoding.BALANCE_FIELDS))
+
+@tool(parse_docstring=True)
+async def get_card_status(customer_id: str, config: RunnableConfig) -> str:
+    """
+    Lists the customer's blocked cards (card, reason, date). Use it to check whether a card is already blocked.
+    Requires successful identity verification first.
+
+    Args:
+        customer_id: Verified customer ID
+    """
+    error = _session_error(config, customer_id)
+    if error:
+        return error
+    try:
+        snapshot = await snapshots.get(_thread_id(config), customer_id, TOOL_TIMEOUTS["get_card_status"])
+    except asyncio.TimeoutError:
+        return _timed_out("get_card_status")
+    return encoding.record_result("get_card_status", encoding.encode_cards(snapshot["cards"]))
+
+@tool(parse_docstring=True)
+async def analyze_spending(
+    customer_id: str,
+    merchant: Optional[str] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    period: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    config: RunnableConfig = None,
+) -> str:
+    """
+    Answers spending questions for a customer with pre-computed totals, e.g.
+    "how much did I spend at Amazon last month" or "show declined payments".
+    Returns totals, declined count and top merchants/categories; do not re-add amounts yourself.
+    Requires successful identity verification first.
+
+    Args:
+        customer_id: Verified customer ID
+        merchant: Merchant name (e.g., Amazon)
+        category: shopping, groceries, transport, dining, entertainment, utilities, travel or income
+        status: completed, pending or declined
+        period: last_7_days, last_30_days, this_month, last_month, this_year or all
+        start_date: Start date YYYY-MM-DD
+        end_date: End date YYYY-MM-DD
     """
-    balance_info = banking.get_account_balance(customer_id)
-    return str(balance_info)
+    error = _session_error(config, customer_id)
+    if error:
+        return error
+    try:
+        summary = await banking.run_io(
+            analytics.analyze_spending, customer_id, merchant, category, status, period, start_date, end_date,
+            timeout=TOOL_TIMEOUTS["analyze_spending"],
+        )
+    except asyncio.TimeoutError:
+        return _timed_out("analyze_spending")
+    except ValueError as e:
+        return f"Error: {e}"
+    return encoding.record_result("analyze_spending", encoding.compact_json(summary))
@@ -0,0 +1,217 @@
+"""
+Voice agent tools: the per-call BankingAssistant, its Gemini tool declarations
+(derived from the shared schema registry in app.agents.prompts) and a
+table-driven dispatcher generated from those declarations.
+Backend calls run on the bounded banking I/O pool with per-tool timeouts, so a
+slow call never blocks audio handling for the session; per-tool latency and
+outcomes go to the shared metrics registry, and every call to the audit log.
+Kept free of LiveKit imports so the worker and benchmarks share it.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.agents import encoding, prompts
+from app.agents.tools import TOOL_TIMEOUTS
+from app.services import analytics, banking
+from app.services.audit import get_audit_log, redact
+from app.services.metrics import VOICE_TOOL_CALLS, VOICE_TOOL_LATENCY
+from app.services.sessions import sessions, verify_customer
+from app.services.snapshots import snapshots
+
+logger = logging.getLogger("bank-abc-voice-agent")
+
+# Per-tool timeouts (seconds): the text agent's table, keyed by the same tool names
+VOICE_TOOL_TIMEOUTS = dict(TOOL_TIMEOUTS)
+
+
+class BankingAssistant:
+    """Banking assistant with voice interface and tool calling"""
+    
+    def __init__(self, session_id: str):
+        # Verification lives in the shared session cache (TTL + PIN lockout)
+        self.session_id = session_id
+        self.conversation_context = []
+
+    @property
+    def customer_id(self):
+        return sessions.get(self.session_id)
+
+    @property
+    def is_verified(self) -> bool:
+        return sessions.is_verified(self.session_id)
+        
+    async def verify_customer(self, customer_id: str, pin: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Verify customer identity"""
+        success, message = await verify_customer(self.session_id, customer_id, pin, timeout=timeout)
+        return {"success": success, "message": message}
+
+    def end_session(self):
+        sessions.end(self.session_id)
+        snapshots.end(self.session_id)
+    
+    async def get_balance(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Get account balance - requires verification"""
+        if not self.is_verified:
+            return {"error": "Please verify your identity first by providing your customer ID and PIN."}
+        
+        # Served from the snapshot prefetched at verification
+        return (await snapshots.get(self.session_id, self.customer_id, timeout))["balance"]
+    
+    async def get_transactions(self, count: int = 5, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Get recent transactions - requires verification"""
+        if not self.is_verified:
+            return {"error": "Please verify your identity first."}
+        
+        customer_id = self.customer_id
+        count = max(1, min(count, encoding.MAX_RESULT_ROWS))
+        page = None
+        if count <= snapshots.transactions:
+            page = snapshots.transactions_page(await snapshots.get(self.session_id, customer_id, timeout), count)
+        if page is None:
+            page = await banking.aget_transactions_page(customer_id, count, timeout=timeout)
+        return {
+            "transactions": [encoding.project(t, encoding.TRANSACTION_FIELDS) for t in page["transactions"]],
+            "more_available": page["next_cursor"] is not None,
+        }
+    
+    async def get_card_status(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Blocked cards - requires verification"""
+        if not self.is_verified:
+            return {"error": "Please verify your identity first."}
+        
+        return (await snapshots.get(self.session_id, self.customer_id, timeout))["cards"]
+    
+    async def block_customer_card(self, card_id: str, reason: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Block a card - irreversible action, requires verification and confirmation"""
+        if not self.is_verified:
+            return {"error": "Please verify your identity first."}
+        
+        try:
+            result = await banking.ablock_card(
+                self.customer_id, card_id, reason, timeout=timeout, session_id=self.session_id, source="voice"
+            )
+        except asyncio.TimeoutError:
+            # The write may still complete; don't invite a blind retry
+            return {"success": False, "message": "The card block is taking longer than expected and may still complete. Do not retry; ask the customer to check back shortly."}
+        return {"success": True, "message": result}
+    
+    async def get_spending_summary(self, timeout: Optional[float] = None, **filters) -> Dict[str, Any]:
+        """Aggregate spending (by merchant, category, period, status) - requires verification"""
+        if not self.is_verified:
+            return {"error": "Please verify your identity first."}
+        
+        try:
+            return await banking.run_io(
+                analytics.analyze_spending, self.customer_id,
+                filters.get("merchant"), filters.get("category"), filters.get("status"),
+                filters.get("period"), filters.get("start_date"), filters.get("end_date"),
+                timeout=timeout,
+            )
+        except ValueError as e:
+            return {"error": str(e)}
+
+
+# Registry tool name -> BankingAssistant method (voice calls are bound to the
+# verified session, so customer_id is not a parameter except for verification)
+VOICE_METHODS = {
+    "verify_identity": "verify_customer",
+    "get_account_balance": "get_balance",
+    "get_recent_transactions": "get_transactions",
+    "block_card": "block_customer_card",
+    "analyze_spending": "get_spending_summary",
+    "get_card_status": "get_card_status",
+}
+
+
+def _implemented_params(method) -> Optional[List[str]]:
+    """Parameters a method accepts from the model (None when it takes **kwargs)"""
+    params = inspect.signature(method).parameters.values()
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params):
+        return None
+    return [p.name for p in params if p.name not in ("self", "timeout")]
+
+
+# Gemini function declarations, derived from the shared schema registry
+BANKING_TOOLS = prompts.function_declarations(
+    {name: _implemented_params(getattr(BankingAssistant, method)) for name, method in VOICE_METHODS.items()}
+)
+
+
+def tool_stats() -> Dict[str, Dict]:
+    """Per-tool latency (ms) and outcome counts for this process"""
+    stats = {}
+    for tool in BANKING_TOOLS:
+        name = tool["name"]
+        latency = VOICE_TOOL_LATENCY.snapshot(name)
+        stats[name] = {
+            "count": latency["count"],
+            **{f"{k}_ms": round(latency[k] * 1000, 2) for k in ("avg", "p50", "p95", "p99", "max")},
+            **{outcome: int(VOICE_TOOL_CALLS.value(name, outcome)) for outcome in ("ok", "error", "timeout")},
+        }
+    return stats
+
+
+class ToolDispatcher:
+    """
+    Routes Gemini function calls to BankingAssistant methods.
+    The table is generated from the tool schemas: each schema name maps to its
+    assistant method via VOICE_METHODS, and only declared parameters are passed.
+    """
+
+    def __init__(self, assistant: BankingAssistant, tools: List[Dict] = BANKING_TOOLS,
+                 timeouts: Optional[Dict[str, float]] = None):
+        self.assistant = assistant
+        self.timeouts = {**VOICE_TOOL_TIMEOUTS, **(timeouts or {})}
+        self._table = {}
+        for schema in tools:
+            name = schema["name"]
+            parameters = schema.get("parameters", {})
+            self._table[name] = (
+                getattr(assistant, VOICE_METHODS.get(name, name)),
+                tuple(parameters.get("properties", {})),
+                tuple(parameters.get("required", ())),
+            )
+
+    async def dispatch(self, function_name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Execute one tool call; never raises, errors come back as {"error": ...}"""
+        entry = self._table.get(function_name)
+        if entry is None:
+            return {"error": f"Unknown function: {function_name}"}
+        handler, params, required = entry
+        arguments = arguments or {}
+
+        missing = [p for p in required if arguments.get(p) is None]
+        if missing:
+            return {"error": f"Missing required argument(s): {', '.join(missing)}"}
+        # Undeclared arguments are dropped; omitted ones fall back to the method defaults
+        kwargs = {p: arguments[p] for p in params if arguments.get(p) is not None}
+
+        outcome = "ok"
+        started = time.perf_counter()
+        try:
+            result = await handler(**kwargs, timeout=self.timeouts.get(function_name))
+            if isinstance(result, dict) and "error" in result:
+                outcome = "error"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            result = {"error": f"{function_name} timed out. Please try again shortly."}
+        except Exception as e:
+            outcome = "error"
+            logger.exception(f"Tool {function_name} failed")
+            result = {"error": f"{function_name} failed: {e}"}
+        elapsed = time.perf_counter() - started
+
+        VOICE_TOOL_LATENCY.observe(elapsed, function_name)
+        VOICE_TOOL_CALLS.inc(function_name, outcome)
+        audit_args = {k: v for k, v in kwargs.items() if k != "customer_id"}
+        get_audit_log().record(
+            function_name, customer_id=self.assistant.customer_id or kwargs.get("customer_id"),
+            session_id=self.assistant.session_id, source="voice", outcome=outcome,
+            latency_ms=elapsed * 1000, detail=redact(audit_args) or None,
+        )
+        encoding.record_result(function_name, encoding.compact_json(result))
+        logger.info(f"Tool {function_name} -> {outcome} in {elapsed * 1000:.1f}ms")
+        return result
@@ -1,16 +1,50 @@
+import asyncio
+import hmac
+import json
 import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional, Tuple
 
-from app.agents.graph import app as agent_app
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 
-app = FastAPI(title="Bank ABC Voice Agent API", version="0.1.0")
+from app.agents import loader
+from app.agents.compaction import COMPACTION_STATS
+from app.agents.router import ROUTER_STATS
+from app.services import metrics
+from app.services.admission import AdmissionRejected, batch_admission, chat_admission
+from app.services.audit import get_audit_log
+from app.services.checkpointer import checkpointer_snapshot
+from app.services.coalescing import IdempotencyConflict, chat_coalescer
+from app.services.response_cache import ResponseCache, contains_pii, response_cache
+from app.services.sessions import InvalidSessionToken, check_thread_token, sessions, thread_token
+from app.services.snapshots import snapshots
+
+# Block startup until warmup finishes (readiness-gated deployments) instead of warming in the background
+AGENT_WARMUP_WAIT = os.getenv("AGENT_WARMUP_WAIT", "false").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Graphs are built lazily; warming here takes the build and the first
+    # provider connection off the first request without delaying startup
+    warmup = asyncio.create_task(loader.warmup()) if loader.AGENT_WARMUP else None
+    if warmup is not None and AGENT_WARMUP_WAIT:
+        await warmup
+    yield
+    if warmup is not None and not warmup.done():
+        warmup.cancel()
+
+app = FastAPI(title="Bank ABC Voice Agent API", version="0.1.0", lifespan=lifespan)
 
 # CORS Setup
 origins = [
@@ -28,61 +62,455 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Existing stats objects, read at scrape time
+metrics.REGISTRY.register_snapshot("bank_admission", chat_admission.snapshot, "Chat admission control")
+metrics.REGISTRY.register_snapshot("bank_batch_admission", batch_admission.snapshot, "Batch replay admission control")
+metrics.REGISTRY.register_snapshot("bank_checkpointer", checkpointer_snapshot, "Conversation checkpointer")
+metrics.REGISTRY.register_snapshot("bank_compaction", COMPACTION_STATS.snapshot, "Context compaction")
+metrics.REGISTRY.register_snapshot("bank_router", ROUTER_STATS.snapshot, "Fast-path router")
+metrics.REGISTRY.register_snapshot("bank_sessions", sessions.snapshot, "Verification sessions")
+metrics.REGISTRY.register_snapshot("bank_account_snapshots", snapshots.snapshot, "Prefetched account snapshots")
+metrics.REGISTRY.register_snapshot("bank_chat_coalescing", chat_coalescer.snapshot, "Chat request coalescing")
+metrics.REGISTRY.register_snapshot("bank_agent_graphs", loader.snapshot, "Agent graph build and warmup")
+if response_cache is not None:
+    metrics.REGISTRY.register_snapshot("bank_response_cache", response_cache.snapshot, "Response cache")
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        metrics.HTTP_LATENCY.observe(
+            time.perf_counter() - started,
+            request.method, getattr(route, "path", "unmatched"), str(status),
+        )
+
 class ChatRequest(BaseModel):
     message: str
     customer_id: Optional[str] = None
     thread_id: Optional[str] = None
+    session_token: Optional[str] = None  # required with thread_id: proves the caller started the thread
 
 class ChatResponse(BaseModel):
     response: str
     thread_id: str
+    session_token: str
+
+def _chat_response(text: str, thread_id: str) -> ChatResponse:
+    return ChatResponse(response=text, thread_id=thread_id, session_token=thread_token(thread_id))
 
 @app.get("/")
 async def root():
     return {"message": "Bank ABC Voice Agent API is running"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text exposition of latency, token, tool-loop and error metrics"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+def _prepare_run(request: ChatRequest):
+    """Build graph inputs and run config for one chat turn"""
+    # A thread id alone must not let anyone else continue the thread or use its verification
+    if request.thread_id:
+        check_thread_token(request.thread_id, request.session_token)
+    inputs = {"messages": [("user", request.message)]}
+    if request.customer_id:
+        inputs["customer_id"] = request.customer_id
+
+    # New conversations get a server-generated thread id; the client echoes it back
+    config = {"configurable": {"thread_id": request.thread_id or uuid.uuid4().hex}}
+    return inputs, config
+
+async def _cache_lookup(graph_app, request: ChatRequest, config: dict, cache_scope: str):
+    """
+    Return (cache_key, cached_reply) for this turn.
+    cache_key is None when the turn may not be cached at all (PII, verified session).
+    """
+    if response_cache is None or contains_pii(request.message):
+        return None, None
+
+    values = (await graph_app.aget_state(config)).values
+    if values.get("is_verified"):
+        return None, None
+
+    # The previous assistant reply is part of the key so context-dependent follow-ups don't collide
+    context = ""
+    for message in reversed(values.get("messages", [])):
+        if isinstance(message, AIMessage) and not message.tool_calls:
+            context = str(message.content)
+            break
+
+    key = ResponseCache.make_key(request.message, context, cache_scope)
+    return key, await response_cache.aget(key)
+
+async def _record_cached_turn(graph_app, inputs: dict, config: dict, reply: str):
+    """Append a cache-served turn to the thread so its history stays complete"""
+    update = dict(inputs, messages=inputs["messages"] + [AIMessage(content=reply)])
+    await graph_app.aupdate_state(config, update, as_node="agent")
+
+async def _cache_admit(key: Optional[str], final_state: dict):
+    """
+    Cache the reply only if this turn used no tools, left the customer unverified
+    and the reply itself carries no PII (the model may echo or invent account data)
+    """
+    if key is None:
+        return
+    messages = final_state["messages"]
+    turn_start = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+    used_tools = any(
+        isinstance(m, ToolMessage) or (isinstance(m, AIMessage) and m.tool_calls)
+        for m in messages[turn_start:]
+    )
+    reply = str(messages[-1].content)
+    if used_tools or final_state.get("is_verified") or contains_pii(reply):
+        response_cache.reject()
+        return
+    await response_cache.aput(key, reply)
+
+def _coalesce_key(graph: str, request: ChatRequest, idempotency_key: Optional[str]) -> Tuple[Optional[str], str, bool]:
+    """
+    (key, fingerprint, remember) for request coalescing. With an Idempotency-Key
+    the result is also kept for retries; without one only concurrent duplicates
+    on an existing thread are merged (a new conversation has nothing to match on).
+    """
+    fingerprint = chat_coalescer.fingerprint(request.thread_id, request.customer_id, request.message)
+    if idempotency_key:
+        return f"{graph}:key:{idempotency_key}", fingerprint, True
+    if request.thread_id:
+        return f"{graph}:turn:{fingerprint}", fingerprint, False
+    return None, fingerprint, False
+
+async def _run_agent(graph_app, request: ChatRequest, cache_scope: str, graph: str,
+                     idempotency_key: Optional[str] = None) -> ChatResponse:
+    """Run one chat turn, at most once per duplicate group and one at a time per thread"""
+    inputs, config = _prepare_run(request)
+    thread_id = config["configurable"]["thread_id"]
+    key, fingerprint, remember = _coalesce_key(graph, request, idempotency_key)
+    return await chat_coalescer.run(
+        key, fingerprint, thread_id,
+        lambda: _run_turn(graph_app, request, inputs, config, cache_scope), remember=remember,
+    )
+
+async def _run_turn(graph_app, request: ChatRequest, inputs: dict, config: dict, cache_scope: str) -> ChatResponse:
+    """Run one chat turn through a compiled graph without blocking the event loop"""
+    thread_id = config["configurable"]["thread_id"]
+
+    # Cache hits skip the LLM entirely and don't take an admission slot
+    cache_key, cached = await _cache_lookup(graph_app, request, config, cache_scope)
+    if cached is not None:
+        await _record_cached_turn(graph_app, inputs, config, cached)
+        return _chat_response(cached, thread_id)
+
+    # Bounded concurrency: excess requests wait briefly in a queue, then get a 503
+    async with chat_admission.slot():
+        final_state = await graph_app.ainvoke(inputs, config=config)
+
+    await _cache_admit(cache_key, final_state)
+
+    # Extract response
+    messages = final_state["messages"]
+    last_message = messages[-1]
+
+    return _chat_response(last_message.content, thread_id)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+class _StreamHold:
+    """Thread lock and admission slot held by a streaming leader, released exactly once"""
+
+    def __init__(self, lock: asyncio.Lock, key: Optional[str], shared: Optional[asyncio.Future]):
+        self.lock = lock
+        self.key = key
+        self.shared = shared
+        self.released = False
+
+    def release(self):
+        if self.released:
+            return
+        self.released = True
+        self.lock.release()
+        # Client disconnected mid-stream: duplicates waiting on this run get an error, not a hang
+        chat_coalescer.settle(self.key, self.shared, error=RuntimeError("The original request was abandoned"))
+        chat_admission.release()
+
+class _HeldStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that releases a `_StreamHold` however the response ends.
+    A generator's `finally` never runs if the body is never started, and a
+    BackgroundTask is skipped when the client disconnects, so release here.
+    """
+
+    def __init__(self, content, hold: _StreamHold, **kwargs):
+        super().__init__(content, **kwargs)
+        self.hold = hold
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.hold.release()
+
+async def _stream_agent(graph_app, inputs: dict, config: dict, request: ChatRequest, cache_scope: str,
+                        hold: _StreamHold, remember: bool = False):
+    """
+    Stream one chat turn as Server-Sent Events.
+    Emits `token` events for LLM output from the agent node, `tool_start`/`tool_end`
+    around tool execution, and a final `done` (or `error`) event.
+    The caller must already hold the thread lock and an admission slot (`hold`);
+    they are released as soon as the stream ends. The final response is
+    published to `hold.shared` for coalesced duplicates.
+    """
+    thread_id = config["configurable"]["thread_id"]
+    key, shared = hold.key, hold.shared
+    try:
+        cache_key, cached = await _cache_lookup(graph_app, request, config, cache_scope)
+        if cached is not None:
+            await _record_cached_turn(graph_app, inputs, config, cached)
+            response = _chat_response(cached, thread_id)
+            chat_coalescer.settle(key, shared, response, remember=remember)
+            yield _sse("token", {"content": cached})
+            yield _sse("done", response.model_dump())
+            return
+
+        async for event in graph_app.astream_events(inputs, config=config, version="v2"):
+            kind = event["event"]
+            metadata = event.get("metadata", {})
+            node = metadata.get("langgraph_node")
+
+            # Hedged duplicates run silently; `done` carries whichever answer won
+            if kind == "on_chat_model_stream" and node == "agent" and not metadata.get("llm_hedge"):
+                token = event["data"]["chunk"].content
+                if token:
+                    yield _sse("token", {"content": token})
+            elif kind == "on_chain_end" and event["name"] == "router":
+                # Templated fast-path replies never hit the LLM, so emit them whole
+                for message in (event["data"].get("output") or {}).get("messages", []):
+                    yield _sse("token", {"content": message.content})
+            elif kind == "on_tool_start":
+                # Tool names only: arguments may carry PINs or other PII
+                yield _sse("tool_start", {"name": event["name"]})
+            elif kind == "on_tool_end":
+                yield _sse("tool_end", {"name": event["name"]})
+
+        values = (await graph_app.aget_state(config)).values
+        await _cache_admit(cache_key, values)
+        # Read the answer from state: after a failover or hedge the streamed tokens may be partial
+        final_text = values["messages"][-1].content if values.get("messages") else ""
+        response = _chat_response(final_text, thread_id)
+        chat_coalescer.settle(key, shared, response, remember=remember)
+        yield _sse("done", response.model_dump())
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        chat_coalescer.settle(key, shared, error=e)
+        yield _sse("error", {"detail": str(e)})
+    finally:
+        hold.release()
+
+async def _replay_stream(shared: asyncio.Future):
+    """SSE for a coalesced duplicate: the leader's final answer as one token, then `done`"""
+    try:
+        response = await asyncio.shield(shared)
+    except Exception as e:
+        yield _sse("error", {"detail": str(e)})
+        return
+    yield _sse("token", {"content": response.response})
+    yield _sse("done", response.model_dump())
+
+async def _streaming_response(graph_app, request: ChatRequest, cache_scope: str, graph: str,
+                              idempotency_key: Optional[str] = None) -> StreamingResponse:
+    inputs, config = _prepare_run(request)
+    key, fingerprint, remember = _coalesce_key(graph, request, idempotency_key)
+    leader, shared = chat_coalescer.claim(key, fingerprint)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if not leader:
+        # Duplicates wait for the leader without taking an admission slot
+        return StreamingResponse(_replay_stream(shared), media_type="text/event-stream", headers=headers)
+
+    # Same order as _run_turn: the thread's turn (bounded wait), then an admission
+    # slot. Both are taken before the response starts, so overload is still a clean 503
+    try:
+        lock = await chat_coalescer.acquire_thread(config["configurable"]["thread_id"])
+        try:
+            await chat_admission.acquire()
+        except BaseException:
+            lock.release()
+            raise
+    except BaseException as e:
+        chat_coalescer.settle(key, shared, error=e if isinstance(e, Exception) else RuntimeError("request was cancelled"))
+        raise
+    hold = _StreamHold(lock, key, shared)
+    return _HeldStreamingResponse(
+        _stream_agent(graph_app, inputs, config, request, cache_scope, hold, remember),
+        hold,
+        media_type="text/event-stream",
+        headers=headers,
+    )
+
+def _overloaded(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=e.reason,
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def _conflict(e: IdempotencyConflict) -> HTTPException:
+    return HTTPException(status_code=422, detail=str(e))
+
+def _forbidden(e: InvalidSessionToken) -> HTTPException:
+    return HTTPException(status_code=403, detail=str(e))
+
+OPERATOR_API_TOKEN = os.getenv("OPERATOR_API_TOKEN", "")
+
+def _require_operator(authorization: Optional[str] = Header(None)):
+    """Operator-only endpoints: `Authorization: Bearer $OPERATOR_API_TOKEN`, disabled when it is unset"""
+    if not OPERATOR_API_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), OPERATOR_API_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Operator token required",
+                            headers={"WWW-Authenticate": "Bearer"})
+
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, idempotency_key: Optional[str] = Header(None)):
     try:
-        # Prepare inputs
-        inputs = {"messages": [("user", request.message)]}
-        if request.customer_id:
-            inputs["customer_id"] = request.customer_id
-            
-        # Run the agent
-        # For POC we are not persistently storing thread state in a DB, 
-        # but LangGraph checkpointing can be used.
-        # Here we just run the graph for the single turn or session if we had thread_id.
-        
-        # Config for thread-level persistence if we had a checkpointer setup
-        config = {"configurable": {"thread_id": request.thread_id or "default_thread"}}
-        
-        final_state = agent_app.invoke(inputs, config=config)
-        
-        # Extract response
-        messages = final_state["messages"]
-        last_message = messages[-1]
-        
-        return ChatResponse(
-            response=last_message.content,
-            thread_id=request.thread_id or "default_thread"
-        )
-            
+        graph = await loader.aget_graph("chat")
+        return await _run_agent(graph.app, request, loader.cache_scope(graph), "chat", idempotency_key)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except IdempotencyConflict as e:
+        raise _conflict(e)
+    except InvalidSessionToken as e:
+        raise _forbidden(e)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, idempotency_key: Optional[str] = Header(None)):
+    """Stream agent tokens and tool progress as Server-Sent Events"""
+    try:
+        graph = await loader.aget_graph("chat")
+        return await _streaming_response(graph.app, request, loader.cache_scope(graph), "chat", idempotency_key)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except IdempotencyConflict as e:
+        raise _conflict(e)
+    except InvalidSessionToken as e:
+        raise _forbidden(e)
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+class BatchConversation(BaseModel):
+    id: Optional[str] = None
+    customer_id: Optional[str] = None
+    turns: List[str]
+
+class BatchChatRequest(BaseModel):
+    conversations: List[BatchConversation]
+    concurrency: Optional[int] = None
+    graph: Literal["chat", "local"] = "chat"
+
+CHAT_BATCH_MAX_CONVERSATIONS = int(os.getenv("CHAT_BATCH_MAX_CONVERSATIONS", "500"))
+
+@app.post("/chat/batch", dependencies=[Depends(_require_operator)])
+async def chat_batch(request: BatchChatRequest):
+    """
+    Replay many scripted conversations concurrently (offline evaluation).
+    Streams one NDJSON line per finished conversation, then a summary line.
+    Each conversation takes a slot from the batch pool shared by all batches,
+    rather than the interactive admission slots.
+    """
+    if len(request.conversations) > CHAT_BATCH_MAX_CONVERSATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {CHAT_BATCH_MAX_CONVERSATIONS} conversations per batch")
+    from app.agents.batch import CHAT_BATCH_CONCURRENCY, run_batch
+
+    graph = await loader.aget_graph(request.graph)
+    conversations = [c.model_dump() for c in request.conversations]
+
+    async def lines():
+        async for item in run_batch(graph.app, conversations, request.concurrency or CHAT_BATCH_CONCURRENCY):
+            yield json.dumps(item) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+AUDIT_QUERY_MAX_LIMIT = int(os.getenv("AUDIT_QUERY_MAX_LIMIT", "1000"))
+
+@app.get("/audit", dependencies=[Depends(_require_operator)])
+async def query_audit(customer_id: Optional[str] = None, since: Optional[datetime] = None,
+                      until: Optional[datetime] = None, action: Optional[str] = None, limit: int = 100):
+    """
+    Audit records (tool calls, card actions) newest first, filtered by customer,
+    time range [since, until) and action. Includes records not yet written to disk.
+    Operator only; `session_id` is a keyed hash, never the chat thread id.
+    """
+    if not 1 <= limit <= AUDIT_QUERY_MAX_LIMIT:
+        raise HTTPException(status_code=422, detail=f"limit must be between 1 and {AUDIT_QUERY_MAX_LIMIT}")
+    from starlette.concurrency import run_in_threadpool
+
+    records = await run_in_threadpool(
+        get_audit_log().query, customer_id,
+        since.timestamp() if since else None, until.timestamp() if until else None, action, limit,
+    )
+    return {"records": records}
+
 @app.post("/voice/token")
 async def get_voice_token(room_name: str = "bank-abc-voice", participant_name: str = "customer"):
     """Generate LiveKit access token for voice call"""
     try:
-        from app.services.livekit_auth import generate_token
-        token = generate_token(room_name, participant_name)
+        from app.services.livekit_auth import get_token_service
+        # Cached per (room, participant): reconnects reuse the signed token
+        token, expires_at = get_token_service().get_token(room_name, participant_name)
         return {
             "token": token,
             "url": os.getenv("LIVEKIT_URL"),
-            "room_name": room_name
+            "room_name": room_name,
+            "expires_at": int(expires_at)
+        }
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+class TokenRequest(BaseModel):
+    room_name: str
+    participant_name: str
+
+class TokenBatchRequest(BaseModel):
+    tokens: List[TokenRequest]
+
+VOICE_TOKEN_BATCH_MAX = int(os.getenv("VOICE_TOKEN_BATCH_MAX", "100"))
+
+@app.post("/voice/tokens/batch", dependencies=[Depends(_require_operator)])
+async def get_voice_tokens_batch(request: TokenBatchRequest):
+    """Mint many LiveKit tokens in one call (load tests, call-center room provisioning); operator only"""
+    if len(request.tokens) > VOICE_TOKEN_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"At most {VOICE_TOKEN_BATCH_MAX} tokens per batch")
+    try:
+        from starlette.concurrency import run_in_threadpool
+        from app.services.livekit_auth import get_token_service
+
+        service = get_token_service()
+        pairs = [(t.room_name, t.participant_name) for t in request.tokens]
+        # Signing is CPU-bound; keep it off the event loop
+        minted = await run_in_threadpool(service.get_tokens, pairs)
+        return {
+            "url": os.getenv("LIVEKIT_URL"),
+            "tokens": [
+                {"room_name": room, "participant_name": participant, "token": token, "expires_at": int(expires_at)}
+                for (room, participant), (token, expires_at) in zip(pairs, minted)
+            ],
+            "stats": service.snapshot(),
         }
     except Exception as e:
         import traceback
@@ -90,27 +518,34 @@ async def get_voice_token(room_name: str = "bank-abc-voice", participant_name: s
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/chat/local", response_model=ChatResponse)
-async def chat_local(request: ChatRequest):
+async def chat_local(request: ChatRequest, idempotency_key: Optional[str] = Header(None)):
     """Chat endpoint using local Ollama LLM (free, no API key needed)"""
     try:
-        from app.agents.graph_local import app as local_agent_app
-        
-        inputs = {"messages": [("user", request.message)]}
-        if request.customer_id:
-            inputs["customer_id"] = request.customer_id
-            
-        config = {"configurable": {"thread_id": request.thread_id or "default_thread"}}
-        
-        final_state = local_agent_app.invoke(inputs, config=config)
-        
-        messages = final_state["messages"]
-        last_message = messages[-1]
-        
-        return ChatResponse(
-            response=last_message.content,
-            thread_id=request.thread_id or "default_thread"
-        )
-            
+        graph = await loader.aget_graph("local")
+        return await _run_agent(graph.app, request, loader.cache_scope(graph), "local", idempotency_key)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except IdempotencyConflict as e:
+        raise _conflict(e)
+    except InvalidSessionToken as e:
+        raise _forbidden(e)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/chat/local/stream")
+async def chat_local_stream(request: ChatRequest, idempotency_key: Optional[str] = Header(None)):
+    """Streaming variant of /chat/local"""
+    try:
+        graph = await loader.aget_graph("local")
+        return await _streaming_response(graph.app, request, loader.cache_scope(graph), "local", idempotency_key)
+    except AdmissionRejected as e:
+        raise _overloaded(e)
+    except IdempotencyConflict as e:
+        raise _conflict(e)
+    except InvalidSessionToken as e:
+        raise _forbidden(e)
     except Exception as e:
         import traceback
         traceback.print_exc()
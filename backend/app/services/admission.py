@@ -0,0 +1,88 @@
+"""
+Admission control for LLM-backed endpoints.
+Caps the number of in-flight graph runs and the number of requests allowed to
+wait for a slot, rejecting the rest immediately so latency stays bounded.
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or wait timed out)."""
+
+    def __init__(self, reason: str, retry_after: int = 1):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded in-flight limit with a bounded wait queue"""
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    async def acquire(self):
+        """Take one execution slot, waiting in the bounded queue if needed"""
+        if self._semaphore.locked():
+            # Fast path rejection: don't even queue if the queue is already full
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected("Server is at capacity, please retry shortly.")
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise AdmissionRejected("Timed out waiting for capacity, please retry shortly.")
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one execution slot for the duration of the block"""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+        }
+
+
+# Shared controller for all chat endpoints (configurable via environment)
+chat_admission = AdmissionController(
+    max_in_flight=int(os.getenv("CHAT_MAX_IN_FLIGHT", "32")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "64")),
+    queue_timeout=float(os.getenv("CHAT_QUEUE_TIMEOUT", "5")),
+)
+
+# /chat/batch conversations, across all batches; kept apart so replays can't starve interactive chat
+batch_admission = AdmissionController(
+    max_in_flight=int(os.getenv("CHAT_BATCH_MAX_IN_FLIGHT", "16")),
+    max_queue=int(os.getenv("CHAT_BATCH_MAX_QUEUE", "256")),
+    queue_timeout=float(os.getenv("CHAT_BATCH_QUEUE_TIMEOUT", "60")),
+)
@@ -0,0 +1,206 @@
+"""
+Spending analytics over a columnar (NumPy) per-customer transaction store
+Each customer's transactions are loaded once into typed column arrays with
+dictionary-encoded merchant/category/status columns and precomputed row
+indexes, so filtered searches and aggregates run as vectorised operations
+and the LLM gets a compact summary instead of raw rows. Writes through
+`banking` drop the customer's cached columns.
+"""
+import datetime
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services import banking
+
+MAX_ROWS = int(os.getenv("ANALYTICS_MAX_ROWS", "100000"))
+CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "1024"))
+
+# Statuses whose amounts actually moved money
+SETTLED_STATUSES = ("completed", "pending")
+
+PERIODS = ("last_7_days", "last_30_days", "this_month", "last_month", "this_year", "all")
+
+
+def resolve_period(period: str, today: Optional[datetime.date] = None):
+    """Turn a named period into an inclusive (start, end) ISO date range"""
+    today = today or datetime.date.today()
+    if period == "last_7_days":
+        return (today - datetime.timedelta(days=6)).isoformat(), today.isoformat()
+    if period == "last_30_days":
+        return (today - datetime.timedelta(days=29)).isoformat(), today.isoformat()
+    if period == "this_month":
+        return today.replace(day=1).isoformat(), today.isoformat()
+    if period == "last_month":
+        end = today.replace(day=1) - datetime.timedelta(days=1)
+        return end.replace(day=1).isoformat(), end.isoformat()
+    if period == "this_year":
+        return today.replace(month=1, day=1).isoformat(), today.isoformat()
+    if period == "all":
+        return None, None
+    raise ValueError(f"Unknown period '{period}'. Use one of: {', '.join(PERIODS)}")
+
+
+class _Column:
+    """Dictionary-encoded string column with a precomputed code -> row index"""
+
+    __slots__ = ("labels", "codes", "_rows", "_lookup")
+
+    def __init__(self, values: List[str]):
+        labels, codes = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+        self.labels: List[str] = [str(label) for label in labels]
+        self.codes = codes.astype(np.int32)
+        # Rows grouped by code: one argsort now, O(1) slices per filter later
+        order = np.argsort(self.codes, kind="stable")
+        bounds = np.searchsorted(self.codes[order], np.arange(len(self.labels) + 1))
+        self._rows = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.labels))]
+        self._lookup = {label.lower(): i for i, label in enumerate(self.labels)}
+
+    def match(self, value: str) -> List[int]:
+        """Codes matching `value`: exact (case-insensitive) match, else substring match"""
+        key = value.strip().lower()
+        if key in self._lookup:
+            return [self._lookup[key]]
+        return [i for label, i in self._lookup.items() if key in label]
+
+    def rows(self, codes: List[int]) -> np.ndarray:
+        if not codes:
+            return np.empty(0, dtype=np.int64)
+        if len(codes) == 1:
+            return self._rows[codes[0]]
+        return np.sort(np.concatenate([self._rows[c] for c in codes]))
+
+
+class CustomerTransactions:
+    """Column arrays for one customer's transactions"""
+
+    def __init__(self, records: List[Dict]):
+        self.size = len(records)
+        self.dates = np.array([r["date"] for r in records], dtype="datetime64[D]")
+        self.amounts = np.array([r["amount"] for r in records], dtype=np.float64)
+        self.merchant = _Column([r["merchant"] for r in records])
+        self.category = _Column([r.get("category", "other") for r in records])
+        self.status = _Column([r["status"] for r in records])
+
+    def select(
+        self,
+        merchant: Optional[str] = None,
+        category: Optional[str] = None,
+        status: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> np.ndarray:
+        """Row indexes matching all filters"""
+        rows = None
+        # Start from the most selective precomputed index, then intersect
+        for column, value in ((self.merchant, merchant), (self.status, status), (self.category, category)):
+            if value:
+                matched = column.rows(column.match(value))
+                rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        if rows is None:
+            rows = np.arange(self.size)
+
+        if start_date or end_date:
+            dates = self.dates[rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if start_date:
+                keep &= dates >= np.datetime64(start_date, "D")
+            if end_date:
+                keep &= dates <= np.datetime64(end_date, "D")
+            rows = rows[keep]
+        return rows
+
+    def summarize(self, rows: np.ndarray, top: int = 5, matches: int = 5) -> Dict:
+        amounts = self.amounts[rows]
+        status_codes = self.status.codes[rows]
+        settled_codes = [self.status._lookup[s] for s in SETTLED_STATUSES if s in self.status._lookup]
+        settled = np.isin(status_codes, settled_codes)
+        declined_code = self.status._lookup.get("declined")
+
+        # Spending is settled outflow, expressed as positive numbers
+        spend = np.where(settled & (amounts < 0), -amounts, 0.0)
+        received = np.where(settled & (amounts > 0), amounts, 0.0)
+
+        def top_totals(column: _Column) -> Dict[str, float]:
+            totals = np.bincount(column.codes[rows], weights=spend, minlength=len(column.labels))
+            order = np.argsort(totals)[::-1][:top]
+            return {column.labels[i]: round(float(totals[i]), 2) for i in order if totals[i] > 0}
+
+        summary = {
+            "transactions": int(len(rows)),
+            "total_spent": round(float(spend.sum()), 2),
+            "total_received": round(float(received.sum()), 2),
+            "declined_count": int((status_codes == declined_code).sum()) if declined_code is not None else 0,
+            "spent_by_merchant": top_totals(self.merchant),
+            "spent_by_category": top_totals(self.category),
+        }
+        if len(rows):
+            dates = self.dates[rows]
+            summary["first_date"] = str(dates.min())
+            summary["last_date"] = str(dates.max())
+            # Most recent matching rows as compact [date, merchant, amount, status] lists
+            newest = rows[np.argsort(dates, kind="stable")[::-1][:matches]]
+            summary["recent_matches"] = [
+                [str(self.dates[i]), self.merchant.labels[self.merchant.codes[i]],
+                 float(self.amounts[i]), self.status.labels[self.status.codes[i]]]
+                for i in newest
+            ]
+        return summary
+
+
+_cache: "OrderedDict[str, CustomerTransactions]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_customer_columns(customer_id: str) -> CustomerTransactions:
+    """Columnar view of a customer's transactions, loaded once and LRU-cached"""
+    with _cache_lock:
+        columns = _cache.get(customer_id)
+        if columns is not None:
+            _cache.move_to_end(customer_id)
+            return columns
+
+    columns = CustomerTransactions(banking.get_recent_transactions(customer_id, MAX_ROWS))
+    with _cache_lock:
+        _cache[customer_id] = columns
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return columns
+
+
+def invalidate(customer_id: str):
+    """Drop the customer's cached columns; called after every write through `banking`"""
+    with _cache_lock:
+        _cache.pop(customer_id, None)
+
+
+banking.add_write_listener(invalidate)
+
+
+def analyze_spending(
+    customer_id: str,
+    merchant: Optional[str] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    period: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> Dict:
+    """
+    Filtered aggregate over a customer's transactions.
+    `period` (e.g. last_month) overrides start_date/end_date.
+    """
+    if period:
+        start_date, end_date = resolve_period(period)
+    columns = get_customer_columns(customer_id)
+    rows = columns.select(merchant, category, status, start_date, end_date)
+    summary = columns.summarize(rows)
+
+    filters = {k: v for k, v in (("merchant", merchant), ("category", category), ("status", status),
+                                 ("start_date", start_date), ("end_date", end_date)) if v}
+    if filters:
+        summary["filters"] = filters
+    return summary
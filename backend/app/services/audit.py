@@ -0,0 +1,338 @@
+"""
+Write-behind audit log of tool calls and account actions
+Records go into a bounded in-memory buffer and a background thread appends
+them to a SQLite table in batches: one transaction (one fsync) per batch, so
+the request path never waits on disk. Ordinary records are dropped, and
+counted, once the buffer is full. Durable records (irreversible actions) are
+never dropped and wake the writer at once. Callers can await their commit,
+which lands alongside whatever else is pending (group commit). Session ids are
+stored as keyed hashes: records of one session can be correlated, but a
+chat thread id cannot be read back out of the log.
+"""
+import asyncio
+import atexit
+import hashlib
+import hmac
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.services.metrics import REGISTRY
+
+logger = logging.getLogger("bank-abc-audit")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    customer_id TEXT,
+    session_id TEXT,
+    source TEXT NOT NULL,
+    action TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    latency_ms REAL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS audit_log_customer_ts ON audit_log (customer_id, ts);
+CREATE INDEX IF NOT EXISTS audit_log_ts ON audit_log (ts);
+"""
+FIELDS = ("ts", "customer_id", "session_id", "source", "action", "outcome", "latency_ms", "detail")
+# Argument values never written to the log
+REDACTED_FIELDS = frozenset({"pin"})
+
+AUDIT_BATCH_SIZE = REGISTRY.histogram(
+    "bank_audit_batch_records", "Audit records committed per transaction", (),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+AUDIT_COMMIT_LATENCY = REGISTRY.histogram(
+    "bank_audit_commit_seconds", "Audit batch commit latency (including fsync)", (),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+AUDIT_DURABLE_WAIT = REGISTRY.histogram(
+    "bank_audit_durable_wait_seconds", "Time callers waited for a durable audit record to commit", (),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+
+def session_ref(session_id: Optional[str], key: bytes) -> Optional[str]:
+    """Keyed hash standing in for a session id in the log"""
+    if session_id is None:
+        return None
+    return hmac.new(key, session_id.encode(), hashlib.sha256).hexdigest()[:24]
+
+
+def redact(arguments: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {k: ("***" if k in REDACTED_FIELDS else v) for k, v in (arguments or {}).items()}
+
+
+class _Pending:
+    """One buffered record plus the waiter to notify once it is committed"""
+
+    __slots__ = ("row", "waiter")
+
+    def __init__(self, row: Tuple, waiter: Optional[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]):
+        self.row = row
+        self.waiter = waiter
+
+
+class AuditLog:
+    """Bounded ring buffer in front of an append-only SQLite table"""
+
+    def __init__(self, db_path: str, buffer_size: int = 10000, flush_interval: float = 0.2,
+                 flush_batch: int = 500, session_key: Optional[bytes] = None):
+        self.db_path = db_path
+        # Random unless configured: session refs then only correlate within one process's lifetime
+        self.session_key = session_key or os.urandom(32)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+
+        self._lock = threading.Lock()
+        self._buffer: Deque[_Pending] = deque()
+        # Batch being committed; still visible to queries until the commit lands
+        self._flushing: List[_Pending] = []
+
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+        with self._read_lock:
+            self._read_conn.executescript(SCHEMA)
+
+        self.recorded = 0
+        self.dropped = 0
+        self.committed = 0
+        self.batches = 0
+        self.failures = 0
+        self.durable_failures = 0
+        self.high_water = 0
+
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="audit-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        memory = self.db_path.startswith("file:")
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, uri=memory)
+        if memory:
+            # Shared-cache readers would otherwise hit table locks while a batch commits
+            conn.execute("PRAGMA read_uncommitted=1")
+        conn.execute("PRAGMA journal_mode=WAL")
+        # A commit is on disk when it returns; batching keeps that to one fsync per batch
+        conn.execute("PRAGMA synchronous=FULL")
+        return conn
+
+    # ---- producers ------------------------------------------------------
+
+    def record(self, action: str, customer_id: Optional[str] = None, session_id: Optional[str] = None,
+               source: str = "api", outcome: str = "ok", latency_ms: Optional[float] = None,
+               detail: Optional[Dict[str, Any]] = None, durable: bool = False) -> Optional[asyncio.Future]:
+        """
+        Buffer one record; never blocks on I/O. A durable record is never dropped
+        and, when called on an event loop, returns a future that resolves once it
+        is committed (see `wait_durable`). Ordinary records return None.
+        """
+        row = (
+            time.time(), customer_id, session_ref(session_id, self.session_key), source, action, outcome,
+            round(latency_ms, 2) if latency_ms is not None else None,
+            json.dumps(detail, separators=(",", ":"), default=str) if detail else None,
+        )
+        waiter = None
+        if durable:
+            try:
+                loop = asyncio.get_running_loop()
+                waiter = (loop, loop.create_future())
+            except RuntimeError:
+                pass
+        with self._lock:
+            if not durable and len(self._buffer) >= self.buffer_size:
+                # Backpressure: shed ordinary records rather than grow or block the caller
+                self.dropped += 1
+                return None
+            self._buffer.append(_Pending(row, waiter))
+            self.recorded += 1
+            depth = len(self._buffer)
+            self.high_water = max(self.high_water, depth)
+        if durable or depth >= self.flush_batch:
+            self._wakeup.set()
+        return waiter[1] if waiter else None
+
+    async def wait_durable(self, future: Optional[asyncio.Future], timeout: float) -> bool:
+        """Wait for a durable record's commit; failures are logged and counted, not raised"""
+        if future is None:
+            return False
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except Exception as e:
+            self.durable_failures += 1
+            logger.error(f"Durable audit record not committed: {type(e).__name__}: {e}")
+            return False
+        finally:
+            AUDIT_DURABLE_WAIT.observe(time.perf_counter() - started)
+
+    # ---- writer ---------------------------------------------------------
+
+    def _write_loop(self):
+        conn = self._connect()
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                while self._flush(conn):
+                    pass
+            except Exception:
+                logger.exception("Audit flush failed")
+        try:
+            while self._flush(conn):
+                pass
+        except Exception:
+            logger.exception("Final audit flush failed")
+        conn.close()
+
+    def _flush(self, conn: sqlite3.Connection) -> bool:
+        """Commit up to `flush_batch` buffered records in one transaction; False when idle"""
+        with self._lock:
+            if not self._buffer:
+                return False
+            batch = [self._buffer.popleft() for _ in range(min(self.flush_batch, len(self._buffer)))]
+            self._flushing = batch
+
+        started = time.perf_counter()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(
+                f"INSERT INTO audit_log ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                [p.row for p in batch],
+            )
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            self.failures += 1
+            with self._lock:
+                # Retry on the next pass, oldest first; ordinary records yield to the buffer bound
+                self._buffer.extendleft(reversed(batch))
+                while len(self._buffer) > self.buffer_size:
+                    victim = next((p for p in self._buffer if p.waiter is None), None)
+                    if victim is None:
+                        break
+                    self._buffer.remove(victim)
+                    self.dropped += 1
+                self._flushing = []
+            logger.error(f"Audit commit of {len(batch)} record(s) failed: {e}")
+            raise
+        AUDIT_COMMIT_LATENCY.observe(time.perf_counter() - started)
+        AUDIT_BATCH_SIZE.observe(len(batch))
+        with self._lock:
+            self._flushing = []
+            self.committed += len(batch)
+            self.batches += 1
+        for pending in batch:
+            if pending.waiter is not None:
+                loop, future = pending.waiter
+                try:
+                    loop.call_soon_threadsafe(_resolve, future)
+                except RuntimeError:
+                    pass  # the caller's loop has closed (e.g. a finished voice job); nobody is waiting
+        return True
+
+    def close(self):
+        """Stop the writer after committing everything still buffered"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join(timeout=10)
+
+    # ---- queries --------------------------------------------------------
+
+    def query(self, customer_id: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, action: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """Records matching the filters, newest first; includes records not yet committed"""
+        clauses, params = [], []
+        for column, op, value in (("customer_id", "=", customer_id), ("ts", ">=", since),
+                                  ("ts", "<", until), ("action", "=", action)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        def matches(row: Tuple) -> bool:
+            record = dict(zip(FIELDS, row))
+            return ((customer_id is None or record["customer_id"] == customer_id)
+                    and (since is None or record["ts"] >= since)
+                    and (until is None or record["ts"] < until)
+                    and (action is None or record["action"] == action))
+
+        with self._lock:
+            pending = [p.row for p in list(self._flushing) + list(self._buffer) if matches(p.row)]
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                f"SELECT {', '.join(FIELDS)} FROM audit_log {where} ORDER BY ts DESC, id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        # A batch can commit between the two reads; identical rows are the same record
+        seen = set(rows)
+        rows = sorted(rows + [row for row in pending if row not in seen], key=lambda r: r[0], reverse=True)[:limit]
+        records = []
+        for row in rows:
+            record = dict(zip(FIELDS, row))
+            record["detail"] = json.loads(record["detail"]) if record["detail"] else None
+            records.append(record)
+        return records
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "buffered": len(self._buffer),
+                "buffer_high_water": self.high_water,
+                "recorded": self.recorded,
+                "dropped": self.dropped,
+                "committed": self.committed,
+                "batches": self.batches,
+                "commit_failures": self.failures,
+                "durable_failures": self.durable_failures,
+            }
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+AUDIT_DURABLE_TIMEOUT = float(os.getenv("AUDIT_DURABLE_TIMEOUT", "2"))
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "bank-abc-audit.sqlite")
+# Shared-cache in-memory database: the reader and writer connections see the same data
+MEMORY_DB_PATH = "file:bank-abc-audit?mode=memory&cache=shared"
+
+_audit_log: Optional[AuditLog] = None
+_audit_log_lock = threading.Lock()
+
+
+def get_audit_log() -> AuditLog:
+    """Process-wide audit log shared by the chat graphs, voice worker and banking service"""
+    global _audit_log
+    with _audit_log_lock:
+        if _audit_log is None:
+            options = dict(
+                buffer_size=int(os.getenv("AUDIT_BUFFER_SIZE", "10000")),
+                flush_interval=float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.2")),
+                flush_batch=int(os.getenv("AUDIT_FLUSH_BATCH", "500")),
+                session_key=os.getenv("AUDIT_SESSION_KEY", "").encode() or None,
+            )
+            db_path = os.getenv("AUDIT_DB_PATH") or DEFAULT_DB_PATH
+            try:
+                _audit_log = AuditLog(db_path=db_path, **options)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Cannot open audit database {db_path} ({e}); audit records are kept in memory only")
+                _audit_log = AuditLog(db_path=MEMORY_DB_PATH, **options)
+            atexit.register(_audit_log.close)
+            REGISTRY.register_snapshot("bank_audit", _audit_log.snapshot, "Audit log buffer and writer")
+        return _audit_log
@@ -1,7 +1,15 @@
-from typing import List, Dict, Optional
-import datetime
+import asyncio
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional
 
-# Mock Database
+from app.services.audit import AUDIT_DURABLE_TIMEOUT, get_audit_log
+from app.services.storage import create_store, encode_cursor
+
+# Mock Database (seed data; BANKING_BACKEND=sqlite loads it into an empty database)
 CUSTOMERS = {
     "user123": {
         "pin": "1234",
@@ -9,9 +17,9 @@ CUSTOMERS = {
         "balance": 5000.00,
         "blocked_cards": [],
         "transactions": [
-            {"id": "t1", "date": "2023-10-26", "amount": -50.00, "merchant": "Amazon", "status": "completed"},
-            {"id": "t2", "date": "2023-10-25", "amount": -12.50, "merchant": "Uber", "status": "completed"},
-            {"id": "t3", "date": "2023-10-24", "amount": 1000.00, "merchant": "Payroll", "status": "completed"},
+            {"id": "t1", "date": "2023-10-26", "amount": -50.00, "merchant": "Amazon", "category": "shopping", "status": "completed"},
+            {"id": "t2", "date": "2023-10-25", "amount": -12.50, "merchant": "Uber", "category": "transport", "status": "completed"},
+            {"id": "t3", "date": "2023-10-24", "amount": 1000.00, "merchant": "Payroll", "category": "income", "status": "completed"},
         ]
     },
     "user456": {
@@ -20,48 +28,160 @@ CUSTOMERS = {
         "balance": 12500.50,
         "blocked_cards": [],
         "transactions": [
-             {"id": "t4", "date": "2023-10-27", "amount": -100.00, "merchant": "Walmart", "status": "declined"},
+             {"id": "t4", "date": "2023-10-27", "amount": -100.00, "merchant": "Walmart", "category": "groceries", "status": "declined"},
         ]
     }
 }
 
+# Storage backend (memory by default, SQLite for multi-worker / large datasets)
+store = create_store(CUSTOMERS)
+
 def verify_identity(customer_id: str, pin: str) -> bool:
     """
     Verifies the identity of a customer using their ID and PIN.
     CRITICAL: Must be called before accessing any sensitive data.
     """
-    customer = CUSTOMERS.get(customer_id)
+    customer = store.get_customer(customer_id)
     if customer and customer["pin"] == pin:
         return True
     return False
 
-def get_recent_transactions(customer_id: str, count: int = 5) -> List[Dict]:
+def get_recent_transactions(customer_id: str, count: int = 5, before: Optional[str] = None) -> List[Dict]:
     """
-    Retrieves the recent transactions for a customer.
+    Retrieves the recent transactions for a customer, newest first.
+    Pass the cursor from get_transactions_page as `before` to continue after a page.
     """
-    customer = CUSTOMERS.get(customer_id)
-    if not customer:
-        return []
-    return customer["transactions"][:count]
+    return store.get_transactions(customer_id, count, before)
+
+def get_transactions_page(customer_id: str, count: int = 5, cursor: Optional[str] = None) -> Dict:
+    """
+    Keyset-paginated transactions: returns the page plus a cursor for the next one
+    (None when there are no more).
+    """
+    # Fetch one extra row to know whether another page exists
+    rows = store.get_transactions(customer_id, count + 1, cursor)
+    page = rows[:count]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > count else None
+    return {"transactions": page, "next_cursor": next_cursor}
+
+# Called with the customer id after every successful write (from the I/O pool
+# thread), so caches of account data can drop what the write made stale
+_write_listeners: List[Callable[[str], None]] = []
+
+def add_write_listener(listener: Callable[[str], None]):
+    _write_listeners.append(listener)
+
+def _notify_write(customer_id: str):
+    for listener in _write_listeners:
+        listener(customer_id)
 
 def block_card(customer_id: str, card_id: str, reason: str) -> str:
     """
     Blocks a customer's card. This is an irreversible action.
     """
-    customer = CUSTOMERS.get(customer_id)
-    if not customer:
-        return "Customer not found."
-    
     # In a real app, we would validate the card_id belongs to the user
     # For now, we just add it to the blocked list
-    customer["blocked_cards"].append({"card_id": card_id, "reason": reason, "date": str(datetime.date.today())})
+    if not store.block_card(customer_id, card_id, reason):
+        return "Customer not found."
+    _notify_write(customer_id)
     return f"Card {card_id} has been permanently blocked due to: {reason}."
 
 def get_account_balance(customer_id: str) -> Dict:
     """
     Retrieves the account balance for a customer.
     """
-    customer = CUSTOMERS.get(customer_id)
+    customer = store.get_customer(customer_id)
     if not customer:
         return {"error": "Customer not found"}
-    return {"balance": customer["balance"], "currency": "USD"}
+    return {"balance": customer["balance"], "currency": customer["currency"]}
+
+def get_card_status(customer_id: str) -> Dict:
+    """
+    Card status for a customer: the cards that have been blocked so far.
+    """
+    if not store.get_customer(customer_id):
+        return {"error": "Customer not found"}
+    return {"blocked_cards": store.get_blocked_cards(customer_id)}
+
+
+# Async API
+# Blocking storage calls run on a bounded pool so the event loop stays free and
+# independent calls (balance + transactions) proceed concurrently.
+_io_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BANKING_IO_WORKERS", "8")),
+    thread_name_prefix="banking-io",
+)
+CALL_TIMEOUT = float(os.getenv("BANKING_CALL_TIMEOUT", "5"))
+
+# Writes are serialized per customer inside the I/O pool. Thread locks, not
+# asyncio ones: voice jobs can run their own event loops in this process.
+# Striped so memory stays bounded; customers sharing a stripe just queue together.
+_customer_locks = [threading.Lock() for _ in range(int(os.getenv("BANKING_WRITE_LOCK_STRIPES", "64")))]
+
+def _customer_lock(customer_id: str) -> threading.Lock:
+    return _customer_locks[zlib.crc32(customer_id.encode()) % len(_customer_locks)]
+
+def _serialized_block_card(customer_id: str, card_id: str, reason: str) -> str:
+    with _customer_lock(customer_id):
+        return block_card(customer_id, card_id, reason)
+
+async def run_io(func, *args, timeout: Optional[float] = None):
+    """Run a blocking backend call on the banking I/O pool with a timeout"""
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(
+        loop.run_in_executor(_io_executor, func, *args),
+        timeout if timeout is not None else CALL_TIMEOUT,
+    )
+
+async def averify_identity(customer_id: str, pin: str, timeout: Optional[float] = None) -> bool:
+    return await run_io(verify_identity, customer_id, pin, timeout=timeout)
+
+async def aget_recent_transactions(customer_id: str, count: int = 5, before: Optional[str] = None,
+                                   timeout: Optional[float] = None) -> List[Dict]:
+    return await run_io(get_recent_transactions, customer_id, count, before, timeout=timeout)
+
+async def aget_transactions_page(customer_id: str, count: int = 5, cursor: Optional[str] = None,
+                                 timeout: Optional[float] = None) -> Dict:
+    return await run_io(get_transactions_page, customer_id, count, cursor, timeout=timeout)
+
+async def aget_account_balance(customer_id: str, timeout: Optional[float] = None) -> Dict:
+    return await run_io(get_account_balance, customer_id, timeout=timeout)
+
+async def aget_card_status(customer_id: str, timeout: Optional[float] = None) -> Dict:
+    return await run_io(get_card_status, customer_id, timeout=timeout)
+
+async def ablock_card(customer_id: str, card_id: str, reason: str, timeout: Optional[float] = None,
+                      session_id: Optional[str] = None, source: str = "api") -> str:
+    """
+    Serialized per customer, across event loops. A write that is already running
+    can't be cancelled, so on timeout the caller gets TimeoutError but the
+    customer's lock is held until the write actually finishes.
+    The request is durably audited before the caller hears back; the audit
+    commit runs alongside the write, so it adds no disk latency of its own.
+    """
+    audit_log = get_audit_log()
+    audit_context = {"customer_id": customer_id, "session_id": session_id, "source": source}
+    intent = audit_log.record("block_card", outcome="requested", detail={"card_id": card_id, "reason": reason},
+                              durable=True, **audit_context)
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_io_executor, _serialized_block_card, customer_id, card_id, reason)
+
+    def finished(f: asyncio.Future):
+        # Recorded even when the caller already timed out: the outcome is what happened
+        error = f.exception() if not f.cancelled() else None
+        audit_log.record(
+            "block_card", outcome="error" if error or f.cancelled() else "ok",
+            latency_ms=(time.perf_counter() - started) * 1000,
+            detail={"card_id": card_id, "result": str(error) if error else (None if f.cancelled() else f.result())},
+            durable=True, **audit_context,
+        )
+
+    future.add_done_callback(finished)
+    try:
+        return await asyncio.wait_for(
+            asyncio.shield(future),
+            timeout if timeout is not None else CALL_TIMEOUT,
+        )
+    finally:
+        await audit_log.wait_durable(intent, AUDIT_DURABLE_TIMEOUT)
@@ -0,0 +1,503 @@
+"""
+Tiered LangGraph checkpointer
+Hot tier: bounded LRU of recently active threads with TTL eviction.
+Cold tier: SQLite (WAL mode) holding the latest checkpoint per thread, written
+in batches by a background flusher so graph steps never wait on disk.
+"""
+import asyncio
+import atexit
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+logger = logging.getLogger("bank-abc-checkpointer")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, task_id, idx)
+);
+"""
+
+
+class _ThreadRecord:
+    """Latest checkpoint of one (thread_id, checkpoint_ns), kept serialized"""
+
+    __slots__ = ("checkpoint_id", "parent_id", "checkpoint", "metadata", "writes", "touched")
+
+    def __init__(self, checkpoint_id, parent_id, checkpoint, metadata, writes=None):
+        self.checkpoint_id = checkpoint_id
+        self.parent_id = parent_id
+        self.checkpoint = checkpoint  # (type, bytes)
+        self.metadata = metadata  # (type, bytes)
+        # (task_id, idx) -> (channel, (type, bytes), task_path)
+        self.writes = writes if writes is not None else {}
+        self.touched = time.monotonic()
+
+
+class TieredSqliteSaver(BaseCheckpointSaver):
+    """
+    Checkpointer that keeps only the latest checkpoint per thread.
+    Reads are served from the hot LRU when possible; writes land in the hot tier
+    immediately and are group-committed to SQLite every `flush_interval` seconds
+    (or sooner once `flush_batch` threads are dirty).
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        cache_size: int = 2048,
+        cache_ttl: float = 900.0,
+        flush_interval: float = 0.5,
+        flush_batch: int = 256,
+    ):
+        super().__init__()
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, str], _ThreadRecord]" = OrderedDict()
+        # Records not yet committed to SQLite; kept apart from the LRU so eviction never loses them
+        self._dirty: Dict[Tuple[str, str], Optional[_ThreadRecord]] = {}
+        # Batch currently being committed; still authoritative until the commit lands
+        self._flushing: Dict[Tuple[str, str], Optional[_ThreadRecord]] = {}
+
+        self._read_conn = self._connect()
+        self._read_lock = threading.Lock()
+        with self._read_lock:
+            self._read_conn.executescript(SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name="checkpoint-flusher", daemon=True)
+        self._flusher.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None, uri=self.db_path.startswith("file:")
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ---- hot tier -------------------------------------------------------
+
+    def _load(self, key: Tuple[str, str]) -> Optional[_ThreadRecord]:
+        """Return the record for `key`, falling back to SQLite on a cache miss"""
+        now = time.monotonic()
+        with self._lock:
+            for pending in (self._dirty, self._flushing):
+                if key in pending:
+                    record = pending[key]
+                    if record is not None:
+                        record.touched = now
+                    self.hits += 1
+                    return record
+            record = self._cache.get(key)
+            if record is not None and now - record.touched <= self.cache_ttl:
+                record.touched = now
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return record
+            self.misses += 1
+
+        record = self._read_record(key)
+        if record is not None:
+            with self._lock:
+                # A concurrent put may have landed while we were reading
+                if key not in self._dirty and key not in self._flushing:
+                    self._remember(key, record)
+        return record
+
+    def _remember(self, key: Tuple[str, str], record: _ThreadRecord):
+        """Insert into the LRU (caller holds the lock)"""
+        record.touched = time.monotonic()
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _evict_expired(self):
+        cutoff = time.monotonic() - self.cache_ttl
+        with self._lock:
+            # OrderedDict is in recency order, so expired entries are at the front
+            while self._cache:
+                key, record = next(iter(self._cache.items()))
+                if record.touched >= cutoff:
+                    break
+                self._cache.popitem(last=False)
+
+    def _mark_dirty(self, key: Tuple[str, str], record: Optional[_ThreadRecord]):
+        with self._lock:
+            self._dirty[key] = record
+            if record is None:
+                self._cache.pop(key, None)
+            else:
+                self._remember(key, record)
+            pending = len(self._dirty)
+        if pending >= self.flush_batch:
+            self._wakeup.set()
+
+    # ---- cold tier ------------------------------------------------------
+
+    def _read_record(self, key: Tuple[str, str]) -> Optional[_ThreadRecord]:
+        thread_id, checkpoint_ns = key
+        with self._read_lock:
+            row = self._read_conn.execute(
+                "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+            if row is None:
+                return None
+            write_rows = self._read_conn.execute(
+                "SELECT task_id, idx, channel, type, value, task_path FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, row[0]),
+            ).fetchall()
+        writes = {
+            (task_id, idx): (channel, (type_, value), task_path)
+            for task_id, idx, channel, type_, value, task_path in write_rows
+        }
+        return _ThreadRecord(row[0], row[1], (row[2], row[3]), (row[4], row[5]), writes)
+
+    def _flush_loop(self):
+        conn = self._connect()
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self._flush(conn)
+                self._evict_expired()
+            except Exception:
+                logger.exception("Checkpoint flush failed")
+        self._flush(conn)
+        conn.close()
+
+    def _flush(self, conn: sqlite3.Connection):
+        with self._lock:
+            if not self._dirty:
+                return
+            batch, self._dirty = self._dirty, {}
+            self._flushing = batch
+
+        now = time.time()
+        try:
+            conn.execute("BEGIN")
+            for (thread_id, checkpoint_ns), record in batch.items():
+                if record is None:
+                    conn.execute(
+                        "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+                        (thread_id, checkpoint_ns),
+                    )
+                    conn.execute(
+                        "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ?",
+                        (thread_id, checkpoint_ns),
+                    )
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id, checkpoint_ns, record.checkpoint_id, record.parent_id,
+                        record.checkpoint[0], record.checkpoint[1],
+                        record.metadata[0], record.metadata[1], now,
+                    ),
+                )
+                # Only the writes of the latest checkpoint are ever read back
+                conn.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ?",
+                    (thread_id, checkpoint_ns),
+                )
+                conn.executemany(
+                    "INSERT INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (thread_id, checkpoint_ns, record.checkpoint_id, task_id, idx,
+                         channel, value[0], value[1], task_path)
+                        for (task_id, idx), (channel, value, task_path) in list(record.writes.items())
+                    ],
+                )
+            conn.execute("COMMIT")
+            self.flushes += 1
+        except Exception:
+            conn.execute("ROLLBACK")
+            # Put the batch back unless newer state has superseded it
+            with self._lock:
+                for key, record in batch.items():
+                    self._dirty.setdefault(key, record)
+            raise
+        finally:
+            with self._lock:
+                self._flushing = {}
+
+    def close(self):
+        """Stop the flusher after committing everything still pending"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._flusher.join(timeout=10)
+
+    # ---- BaseCheckpointSaver --------------------------------------------
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, record: _ThreadRecord) -> CheckpointTuple:
+        parent_config = None
+        if record.parent_id:
+            parent_config = {
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": record.parent_id,
+                }
+            }
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": record.checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed(record.checkpoint),
+            metadata=self.serde.loads_typed(record.metadata),
+            parent_config=parent_config,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed(value))
+                for (task_id, _), (channel, value, _) in list(record.writes.items())
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        record = self._load((thread_id, checkpoint_ns))
+        if record is None:
+            return None
+        # Only the latest checkpoint is retained
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id and checkpoint_id != record.checkpoint_id:
+            return None
+        return self._to_tuple(thread_id, checkpoint_ns, record)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is None or limit == 0:
+            return
+        checkpoint_tuple = self.get_tuple(config)
+        if checkpoint_tuple is None:
+            return
+        if before is not None and get_checkpoint_id(before) <= checkpoint_tuple.config["configurable"]["checkpoint_id"]:
+            return
+        if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+            return
+        yield checkpoint_tuple
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        record = _ThreadRecord(
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            self.serde.dumps_typed(checkpoint),
+            self.serde.dumps_typed(metadata),
+        )
+        self._mark_dirty((thread_id, checkpoint_ns), record)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        key = (thread_id, checkpoint_ns)
+        record = self._load(key)
+        if record is None or record.checkpoint_id != config["configurable"]["checkpoint_id"]:
+            return
+        serialized = [(WRITES_IDX_MAP.get(channel, idx), channel, self.serde.dumps_typed(value))
+                      for idx, (channel, value) in enumerate(writes)]
+        with self._lock:
+            # Copy-on-write: the flusher and readers may be iterating the current dict
+            updated = dict(record.writes)
+            for write_idx, channel, value in serialized:
+                # Regular writes are idempotent per (task, idx); special channels always overwrite
+                if write_idx >= 0 and (task_id, write_idx) in updated:
+                    continue
+                updated[(task_id, write_idx)] = (channel, value, task_path)
+            record.writes = updated
+        self._mark_dirty(key, record)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            keys = {k for k in list(self._cache) + list(self._dirty) if k[0] == thread_id}
+        with self._read_lock:
+            rows = self._read_conn.execute(
+                "SELECT checkpoint_ns FROM checkpoints WHERE thread_id = ?", (thread_id,)
+            ).fetchall()
+        keys.update((thread_id, ns) for (ns,) in rows)
+        for key in keys:
+            self._mark_dirty(key, None)
+
+    # Hot-tier hits are pure memory operations, so the async API only leaves the
+    # event loop when it has to read SQLite.
+
+    async def _aload(self, key: Tuple[str, str]) -> Optional[_ThreadRecord]:
+        with self._lock:
+            hot = key in self._dirty or key in self._flushing or key in self._cache
+        if hot:
+            return self._load(key)
+        return await asyncio.to_thread(self._load, key)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        # Warms the hot tier; get_tuple below is then a pure memory operation
+        if await self._aload((thread_id, checkpoint_ns)) is None:
+            return None
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if config is None or limit == 0:
+            return
+        await self.aget_tuple(config)
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        # Make sure the record is hot before touching it from the event loop
+        await self._aload((thread_id, checkpoint_ns))
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "hot_threads": len(self._cache),
+                "dirty_threads": len(self._dirty),
+                "hits": self.hits,
+                "misses": self.misses,
+                "flushes": self.flushes,
+            }
+
+
+# The working directory may be read-only (serverless deploys); the temp dir is writable
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), "bank-abc-checkpoints.sqlite")
+# Shared-cache in-memory database: the reader and flusher connections see the same data
+MEMORY_DB_PATH = "file:bank-abc-checkpoints?mode=memory&cache=shared"
+
+_checkpointer: Optional[TieredSqliteSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> TieredSqliteSaver:
+    """Process-wide checkpointer shared by all compiled graphs"""
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            options = dict(
+                cache_size=int(os.getenv("CHECKPOINT_CACHE_SIZE", "2048")),
+                cache_ttl=float(os.getenv("CHECKPOINT_CACHE_TTL", "900")),
+                flush_interval=float(os.getenv("CHECKPOINT_FLUSH_INTERVAL", "0.5")),
+            )
+            db_path = os.getenv("CHECKPOINT_DB_PATH") or DEFAULT_DB_PATH
+            try:
+                _checkpointer = TieredSqliteSaver(db_path=db_path, **options)
+            except (sqlite3.Error, OSError) as e:
+                logger.warning(f"Cannot open checkpoint database {db_path} ({e}); conversations are kept in memory only")
+                _checkpointer = TieredSqliteSaver(db_path=MEMORY_DB_PATH, **options)
+            atexit.register(_checkpointer.close)
+        return _checkpointer
+
+
+def checkpointer_snapshot() -> dict:
+    """Checkpointer stats for /metrics; empty until a graph has opened the checkpointer"""
+    return _checkpointer.snapshot() if _checkpointer is not None else {}
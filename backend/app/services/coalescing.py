@@ -0,0 +1,170 @@
+"""
+Request coalescing for chat turns
+Double-submits and client retries would otherwise each run the graph: twice
+the LLM spend, and two runs interleaving on one thread's checkpoint.
+- Identical concurrent requests (same graph, thread, customer and message, or
+  same Idempotency-Key) share one in-flight run and its result or error.
+- Distinct requests on one thread run one at a time, in arrival order; a
+  request that can't get its turn within a bounded wait is rejected (503).
+- Results of requests that carried an Idempotency-Key are kept for a short
+  TTL, so a retry after the first run finished gets the same answer replayed.
+"""
+import asyncio
+import hashlib
+import os
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from app.services.admission import AdmissionRejected
+
+
+class IdempotencyConflict(Exception):
+    """An Idempotency-Key was reused for a different request"""
+
+
+class RequestCoalescer:
+    """Single-flight registry, per-thread FIFO locks and an idempotent result cache"""
+
+    def __init__(self, ttl: float = 300.0, max_results: int = 10000, thread_wait_timeout: float = 30.0):
+        self.ttl = ttl
+        self.max_results = max_results
+        self.thread_wait_timeout = thread_wait_timeout
+        # key -> (fingerprint, future of the leader's result)
+        self._inflight: dict = {}
+        # key -> (fingerprint, result, expires_at), in expiry order
+        self._results: "OrderedDict[str, Tuple[str, Any, float]]" = OrderedDict()
+        # asyncio.Lock wakes waiters in FIFO order; idle locks are garbage-collected
+        self._thread_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self.leaders = 0
+        self.coalesced = 0
+        self.replayed = 0
+        self.thread_waits = 0
+        self.thread_timeouts = 0
+
+    @staticmethod
+    def fingerprint(*parts: Optional[str]) -> str:
+        return hashlib.sha256("\x1f".join(p or "" for p in parts).encode()).hexdigest()[:32]
+
+    def _cached(self, key: str, fingerprint: str) -> Optional[asyncio.Future]:
+        now = time.monotonic()
+        while self._results:
+            oldest = next(iter(self._results))
+            if self._results[oldest][2] >= now:
+                break
+            del self._results[oldest]
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if entry[0] != fingerprint:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(entry[1])
+        return future
+
+    def claim(self, key: Optional[str], fingerprint: str = "") -> Tuple[bool, Optional[asyncio.Future]]:
+        """
+        (True, future) when the caller leads the run for `key` and must `settle`
+        the future; (False, future) when it should await the existing result.
+        A None key (nothing to coalesce on) always leads, with no future.
+        """
+        if key is None:
+            self.leaders += 1
+            return True, None
+        cached = self._cached(key, fingerprint)
+        if cached is not None:
+            self.replayed += 1
+            return False, cached
+        entry = self._inflight.get(key)
+        if entry is not None:
+            if entry[0] != fingerprint:
+                raise IdempotencyConflict("Idempotency-Key is in use by a different request")
+            self.coalesced += 1
+            return False, entry[1]
+        future = asyncio.get_running_loop().create_future()
+        # Followers may all have gone away; don't log an unread error
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = (fingerprint, future)
+        self.leaders += 1
+        return True, future
+
+    def settle(self, key: Optional[str], future: Optional[asyncio.Future], result: Any = None,
+               error: Optional[BaseException] = None, remember: bool = False):
+        """Publish the leader's outcome to its followers; `remember` keeps a result for retries"""
+        if key is None or future is None:
+            return
+        entry = self._inflight.get(key)
+        if entry is not None and entry[1] is future:
+            del self._inflight[key]
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+            return
+        future.set_result(result)
+        if remember and entry is not None:
+            self._results[key] = (entry[0], result, time.monotonic() + self.ttl)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+    def thread_lock(self, thread_id: str) -> asyncio.Lock:
+        lock = self._thread_locks.get(thread_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._thread_locks[thread_id] = lock
+        return lock
+
+    async def acquire_thread(self, thread_id: str) -> asyncio.Lock:
+        """Wait (bounded) for the thread's turn; returns the held lock or raises AdmissionRejected"""
+        lock = self.thread_lock(thread_id)
+        if not lock.locked():
+            # Uncontended: acquire without yielding, so the turn is taken in arrival order
+            await lock.acquire()
+            return lock
+        self.thread_waits += 1
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout=self.thread_wait_timeout)
+        except asyncio.TimeoutError:
+            self.thread_timeouts += 1
+            raise AdmissionRejected("An earlier message in this conversation is still being processed, "
+                                    "please retry shortly.")
+        return lock
+
+    async def run(self, key: Optional[str], fingerprint: str, thread_id: str,
+                  fn: Callable[[], Awaitable[Any]], remember: bool = False) -> Any:
+        """Run `fn` once per key, serialized on the thread; duplicates share the outcome"""
+        leader, future = self.claim(key, fingerprint)
+        if not leader:
+            return await asyncio.shield(future)
+        try:
+            lock = await self.acquire_thread(thread_id)
+            try:
+                result = await fn()
+            finally:
+                lock.release()
+        except BaseException as e:
+            # Followers of a cancelled leader get an error, not a hang
+            self.settle(key, future, error=e if isinstance(e, Exception) else RuntimeError("request was cancelled"))
+            raise
+        self.settle(key, future, result, remember=remember)
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "inflight": len(self._inflight),
+            "remembered": len(self._results),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "replayed": self.replayed,
+            "thread_waits": self.thread_waits,
+            "thread_timeouts": self.thread_timeouts,
+        }
+
+
+chat_coalescer = RequestCoalescer(
+    ttl=float(os.getenv("IDEMPOTENCY_TTL", "300")),
+    max_results=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000")),
+    thread_wait_timeout=float(os.getenv("CHAT_THREAD_WAIT_TIMEOUT", "30")),
+)
@@ -1,24 +1,129 @@
 """
 LiveKit Token Generation API
 Provides access tokens for frontend to connect to LiveKit rooms
+Credentials are loaded once and signed tokens are cached per
+(room, participant) until shortly before they expire, so reconnects don't
+re-sign a JWT each time.
 """
 from livekit import api
+import datetime
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.services.metrics import REGISTRY
+
+
+class TokenService:
+    """Mints and caches LiveKit access tokens"""
+
+    def __init__(self, api_key: Optional[str], api_secret: Optional[str], ttl: float = 3600.0,
+                 refresh_margin: float = 300.0, max_entries: int = 10000):
+        if not api_key or not api_secret:
+            raise ValueError("LIVEKIT_API_KEY and LIVEKIT_API_SECRET must be set")
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.ttl = ttl
+        # Cached tokens are reissued this long before expiry so clients never get a nearly dead one
+        self.refresh_margin = min(refresh_margin, ttl / 2)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (room, participant) -> (jwt, expires_at wall-clock)
+        self._tokens: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.signed = 0
+        self.sign_seconds_total = 0.0
+        self.sign_seconds_max = 0.0
+
+    def _sign(self, room_name: str, participant_name: str) -> str:
+        token = api.AccessToken(api_key=self.api_key, api_secret=self.api_secret)
+        token.with_identity(participant_name).with_name(participant_name).with_ttl(
+            datetime.timedelta(seconds=self.ttl)
+        ).with_grants(
+            api.VideoGrants(
+                room_join=True,
+                room=room_name,
+                can_publish=True,
+                can_subscribe=True,
+            )
+        )
+        return token.to_jwt()
+
+    def get_token(self, room_name: str, participant_name: str) -> Tuple[str, float]:
+        """Return (jwt, expires_at epoch seconds), signing only on a miss or near expiry"""
+        key = (room_name, participant_name)
+        now = time.time()
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is not None and entry[1] - self.refresh_margin > now:
+                self._tokens.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        started = time.perf_counter()
+        jwt = self._sign(room_name, participant_name)
+        elapsed = time.perf_counter() - started
+        entry = (jwt, now + self.ttl)
+        with self._lock:
+            self.misses += 1
+            self.signed += 1
+            self.sign_seconds_total += elapsed
+            self.sign_seconds_max = max(self.sign_seconds_max, elapsed)
+            self._tokens[key] = entry
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+        return entry
+
+    def get_tokens(self, pairs: List[Tuple[str, str]]) -> List[Tuple[str, float]]:
+        """Mint (or reuse) tokens for many (room, participant) pairs"""
+        return [self.get_token(room_name, participant_name) for room_name, participant_name in pairs]
+
+    def invalidate(self, room_name: Optional[str] = None):
+        """Drop cached tokens, for one room or all of them"""
+        with self._lock:
+            if room_name is None:
+                self._tokens.clear()
+                return
+            for key in [k for k in self._tokens if k[0] == room_name]:
+                del self._tokens[key]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "cached": len(self._tokens),
+                "hits": self.hits,
+                "misses": self.misses,
+                "signed": self.signed,
+                "sign_ms_avg": round(self.sign_seconds_total / self.signed * 1000, 3) if self.signed else 0.0,
+                "sign_ms_max": round(self.sign_seconds_max * 1000, 3),
+            }
+
+
+_token_service: Optional[TokenService] = None
+_token_service_lock = threading.Lock()
+
+
+def get_token_service() -> TokenService:
+    """Process-wide token service, built from env on first use"""
+    global _token_service
+    if _token_service is None:
+        with _token_service_lock:
+            if _token_service is None:
+                _token_service = TokenService(
+                    api_key=os.getenv("LIVEKIT_API_KEY"),
+                    api_secret=os.getenv("LIVEKIT_API_SECRET"),
+                    ttl=float(os.getenv("LIVEKIT_TOKEN_TTL", "3600")),
+                    refresh_margin=float(os.getenv("LIVEKIT_TOKEN_REFRESH_MARGIN", "300")),
+                    max_entries=int(os.getenv("LIVEKIT_TOKEN_CACHE_SIZE", "10000")),
+                )
+                REGISTRY.register_snapshot("bank_livekit_tokens", _token_service.snapshot, "LiveKit token cache")
+    return _token_service
+
 
 def generate_token(room_name: str, participant_name: str) -> str:
     """Generate LiveKit access token for a participant"""
-    token = api.AccessToken(
-        api_key=os.getenv("LIVEKIT_API_KEY"),
-        api_secret=os.getenv("LIVEKIT_API_SECRET"),
-    )
-    
-    token.with_identity(participant_name).with_name(participant_name).with_grants(
-        api.VideoGrants(
-            room_join=True,
-            room=room_name,
-            can_publish=True,
-            can_subscribe=True,
-        )
-    )
-    
-    return token.to_jwt()
+    return get_token_service().get_token(room_name, participant_name)[0]
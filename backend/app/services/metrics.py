@@ -0,0 +1,341 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition
+Counters, gauges and fixed-bucket histograms cost a lock and a few additions
+per observation, so they stay on in production. Existing stats objects
+(`snapshot()` dicts) are exposed through collectors evaluated at scrape time.
+"""
+import bisect
+import functools
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers a sub-millisecond cache hit up to a slow LLM round trip
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(str(label) for label in labels)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter, optionally labelled"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Fixed-bucket histogram with approximate percentiles"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count, max]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0, 0.0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+            if value > series[3]:
+                series[3] = value
+
+    def time(self, *labels: str):
+        """Context manager observing the elapsed seconds of a block"""
+        return _Timer(self, labels)
+
+    def percentile(self, q: float, *labels: str) -> float:
+        """Upper bound of the bucket holding the q-th percentile, capped at the observed max"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            if series is None or not series[2]:
+                return 0.0
+            counts, count, maximum = list(series[0]), series[2], series[3]
+        rank, seen = q * count, 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return min(self.buckets[i], maximum) if i < len(self.buckets) else maximum
+        return maximum
+
+    def snapshot(self, *labels: str) -> Dict:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            total, count, maximum = (series[1], series[2], series[3]) if series else (0.0, 0, 0.0)
+        return {
+            "count": count,
+            "avg": total / count if count else 0.0,
+            "p50": self.percentile(0.5, *labels),
+            "p95": self.percentile(0.95, *labels),
+            "p99": self.percentile(0.99, *labels),
+            "max": maximum,
+        }
+
+    def series(self) -> List[Tuple[str, ...]]:
+        with self._lock:
+            return sorted(self._series)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Registry:
+    """Named metrics plus scrape-time collectors"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def register_snapshot(self, prefix: str, snapshot: Callable[[], Dict], help: str = ""):
+        """
+        Expose a `snapshot()` dict as gauges named `<prefix>_<key>`.
+        Nested dicts of numbers become one gauge labelled by `key`.
+        """
+        def collect() -> Iterable[str]:
+            lines = []
+            for key, value in snapshot().items():
+                name = f"{prefix}_{key}"
+                if isinstance(value, bool) or value is None:
+                    continue
+                if isinstance(value, (int, float)):
+                    lines += [f"# HELP {name} {help or prefix} {key}", f"# TYPE {name} gauge",
+                              f"{name} {_format_value(value)}"]
+                elif isinstance(value, dict):
+                    lines += [f"# HELP {name} {help or prefix} {key}", f"# TYPE {name} gauge"]
+                    lines += [f'{name}{{key="{_escape(k)}"}} {_format_value(v)}'
+                              for k, v in sorted(value.items()) if isinstance(v, (int, float))]
+            return lines
+
+        with self._lock:
+            self._collectors[prefix] = collect
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines += metric.render()
+        for collect in collectors:
+            try:
+                lines += collect()
+            except Exception:
+                continue  # a broken collector must not take down the scrape
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Hot-path metrics shared by the API, both agent graphs and the voice worker
+HTTP_LATENCY = REGISTRY.histogram(
+    "bank_http_request_duration_seconds", "HTTP request latency (time to response headers)",
+    ("method", "route", "status"),
+)
+NODE_LATENCY = REGISTRY.histogram(
+    "bank_graph_node_duration_seconds", "LangGraph node latency", ("graph", "node")
+)
+NODE_ERRORS = REGISTRY.counter(
+    "bank_graph_node_errors_total", "LangGraph node invocations that raised", ("graph", "node")
+)
+LLM_TOKENS = REGISTRY.counter(
+    "bank_llm_tokens_total", "LLM tokens reported by the provider", ("graph", "kind")
+)
+TOOL_LOOP_ITERATIONS = REGISTRY.histogram(
+    "bank_agent_tool_iterations", "Tool rounds before the agent's final answer", ("graph",),
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12),
+)
+VOICE_TOOL_LATENCY = REGISTRY.histogram(
+    "bank_voice_tool_duration_seconds", "Voice tool call latency (adds to spoken dead air)", ("tool",)
+)
+VOICE_TOOL_CALLS = REGISTRY.counter(
+    "bank_voice_tool_calls_total", "Voice tool calls by outcome", ("tool", "outcome")
+)
+
+
+def instrument_node(graph: str, node: str, func: Callable) -> Callable:
+    """Wrap an async graph node with latency and error metrics (signature preserved for LangGraph)"""
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            NODE_ERRORS.inc(graph, node)
+            raise
+        finally:
+            NODE_LATENCY.observe(time.perf_counter() - started, graph, node)
+
+    return wrapper
+
+
+def record_llm_usage(graph: str, message) -> None:
+    """Count prompt/completion tokens from an AIMessage's usage_metadata, when present"""
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    LLM_TOKENS.inc(graph, "prompt", amount=usage.get("input_tokens", 0))
+    LLM_TOKENS.inc(graph, "completion", amount=usage.get("output_tokens", 0))
+    # Prompt tokens served from the provider's prefix cache (OpenAI reports these)
+    cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+    if cached:
+        LLM_TOKENS.inc(graph, "prompt_cached", amount=cached)
+
+
+def record_tool_loop(graph: str, messages: Sequence) -> None:
+    """Observe how many tool rounds the current turn took (AI tool calls since the last human message)"""
+    rounds = 0
+    for message in reversed(messages):
+        if getattr(message, "type", "") == "human":
+            break
+        if getattr(message, "tool_calls", None):
+            rounds += 1
+    TOOL_LOOP_ITERATIONS.observe(rounds, graph)
+
+
+def serve(port: int, host: str = "0.0.0.0", registry: Optional[Registry] = None) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread (for processes without FastAPI, e.g. the voice worker)"""
+    registry = registry or REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
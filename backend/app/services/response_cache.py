@@ -0,0 +1,153 @@
+"""
+Response cache for non-personalised agent answers
+In-memory LRU with TTL, optionally backed by a SQLite tier that survives
+restarts and is shared by workers on the same host.
+Only turns that used no tools, ran while the customer was unverified and
+carry no PII, in the message or in the generated reply, are admitted.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Anything that could identify a customer or credential keeps a turn out of the cache
+PII_PATTERN = re.compile(
+    r"\d{3,}"                      # PINs, account/card numbers, amounts, phone numbers
+    r"|\buser\w*\d"                # customer ids
+    r"|[\w.+-]+@[\w-]+\.[\w.]+"   # email addresses
+    r"|\b(?:pin|password|passcode|ssn|my name is)\b",
+    re.IGNORECASE,
+)
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def contains_pii(text: str) -> bool:
+    return PII_PATTERN.search(text) is not None
+
+
+def normalize(text: str) -> str:
+    """Case/punctuation/whitespace-insensitive form used for cache keys"""
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+class ResponseCache:
+    """LRU + TTL cache of final agent replies with an optional on-disk tier"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.admitted = 0
+        self.rejected = 0
+
+        self._disk = None
+        self._disk_lock = threading.Lock()
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def make_key(message: str, context: str, scope: str) -> str:
+        """
+        Key on the normalized message plus the assistant's previous reply, so an
+        identical follow-up ("yes") only hits when it answers an identical prompt.
+        `scope` carries the model name and prompt version.
+        """
+        raw = "\x1f".join([normalize(message), normalize(context), scope])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                response, created_at = entry
+                if now - created_at <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                del self._entries[key]
+
+        if self._disk is not None:
+            with self._disk_lock:
+                row = self._disk.execute(
+                    "SELECT response, created_at FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+            if row is not None and now - row[1] <= self.ttl:
+                self._remember(key, row[0], row[1])
+                with self._lock:
+                    self.disk_hits += 1
+                return row[0]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, response: str):
+        created_at = time.time()
+        self._remember(key, response, created_at)
+        with self._lock:
+            self.admitted += 1
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?)", (key, response, created_at)
+                )
+
+    def reject(self):
+        """Count a response that was not admitted (tools used, verified, or PII)"""
+        with self._lock:
+            self.rejected += 1
+
+    def _remember(self, key: str, response: str, created_at: float):
+        with self._lock:
+            self._entries[key] = (response, created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # The disk tier is a blocking SQLite call; keep it off the event loop
+    async def aget(self, key: str) -> Optional[str]:
+        if self._disk is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, response: str):
+        if self._disk is None:
+            return self.put(key, response)
+        await asyncio.to_thread(self.put, key, response)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
+
+
+response_cache: Optional[ResponseCache] = None
+if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true":
+    response_cache = ResponseCache(
+        max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        disk_path=os.getenv("RESPONSE_CACHE_DISK_PATH") or None,
+    )
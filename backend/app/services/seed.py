@@ -0,0 +1,152 @@
+"""
+Synthetic banking data generator and SQLite seeding tool
+
+    python -m app.services.seed --db banking.sqlite --customers 1000000 --transactions 20
+
+Customer ids are `cust0000001`, ... with PIN `0000`-`9999` derived from the
+seed, so runs are reproducible. The demo customers (user123/user456) are
+always included.
+"""
+import argparse
+import datetime
+import random
+import statistics
+import time
+from typing import Dict, Iterator, List, Tuple
+
+from app.services.storage import INDEXES, SQL_RECENT, connect, init_schema
+
+FIRST_NAMES = ["John", "Jane", "Alex", "Maria", "Wei", "Aisha", "Carlos", "Priya", "Tom", "Nina"]
+LAST_NAMES = ["Doe", "Smith", "Garcia", "Chen", "Khan", "Silva", "Patel", "Brown", "Kim", "Nowak"]
+# merchant -> (category, typical amount)
+MERCHANTS = {
+    "Amazon": ("shopping", 45.0),
+    "Walmart": ("groceries", 80.0),
+    "Whole Foods": ("groceries", 60.0),
+    "Uber": ("transport", 18.0),
+    "Shell": ("transport", 50.0),
+    "Netflix": ("entertainment", 15.5),
+    "Spotify": ("entertainment", 10.0),
+    "Starbucks": ("dining", 6.5),
+    "McDonald's": ("dining", 11.0),
+    "City Power": ("utilities", 95.0),
+    "Verizon": ("utilities", 70.0),
+    "Delta": ("travel", 320.0),
+}
+MERCHANT_NAMES = list(MERCHANTS)
+STATUSES = ["completed"] * 92 + ["declined"] * 5 + ["pending"] * 3
+
+
+def customer_id_for(index: int) -> str:
+    return f"cust{index:07d}"
+
+
+def generate_customers(count: int, seed: int = 42) -> Iterator[Tuple]:
+    """Yield (customer_id, pin, name, balance, currency) rows"""
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        yield (customer_id_for(i), f"{rng.randrange(10000):04d}", name, round(rng.uniform(0, 50000), 2), "USD")
+
+
+def generate_transactions(customer_id: str, count: int, rng: random.Random, days: int = 365) -> List[Tuple]:
+    """Rows of (id, customer_id, date, amount, merchant, category, status) over the last `days` days"""
+    today = datetime.date.today()
+    rows = []
+    for n in range(count):
+        date = (today - datetime.timedelta(days=rng.randrange(days))).isoformat()
+        if rng.random() < 0.08:
+            rows.append((f"{customer_id}-t{n}", customer_id, date, round(rng.uniform(1500, 4000), 2),
+                         "Payroll", "income", "completed"))
+            continue
+        merchant = rng.choice(MERCHANT_NAMES)
+        category, typical = MERCHANTS[merchant]
+        amount = -round(rng.uniform(0.3, 1.7) * typical, 2)
+        rows.append((f"{customer_id}-t{n}", customer_id, date, amount, merchant, category, rng.choice(STATUSES)))
+    return rows
+
+
+def seed_database(db_path: str, customers: int, transactions_per_customer: int,
+                  seed: int = 42, batch_size: int = 10000) -> Dict:
+    """Bulk-load synthetic data; the transaction index is rebuilt once at the end"""
+    from app.services.banking import CUSTOMERS
+
+    conn = connect(db_path)
+    init_schema(conn)
+    # Bulk-load settings: index maintenance and fsync are the bottlenecks
+    conn.execute("DROP INDEX IF EXISTS ix_transactions_customer_date")
+    conn.execute("PRAGMA synchronous=OFF")
+
+    rng = random.Random(seed + 1)
+    started = time.perf_counter()
+    customer_batch: List[Tuple] = []
+    transaction_batch: List[Tuple] = []
+    total_transactions = 0
+
+    def flush():
+        conn.execute("BEGIN")
+        conn.executemany("INSERT OR REPLACE INTO customers VALUES (?, ?, ?, ?, ?)", customer_batch)
+        conn.executemany("INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?)", transaction_batch)
+        conn.execute("COMMIT")
+        customer_batch.clear()
+        transaction_batch.clear()
+
+    for row in generate_customers(customers, seed):
+        customer_batch.append(row)
+        transaction_batch.extend(generate_transactions(row[0], transactions_per_customer, rng))
+        total_transactions += transactions_per_customer
+        if len(transaction_batch) >= batch_size:
+            flush()
+
+    # Demo customers keep their fixed PINs and transactions
+    for cid, c in CUSTOMERS.items():
+        customer_batch.append((cid, c["pin"], c["name"], c["balance"], c.get("currency", "USD")))
+        transaction_batch.extend(
+            (t["id"], cid, t["date"], t["amount"], t["merchant"], t.get("category", "other"), t["status"])
+            for t in c["transactions"]
+        )
+    flush()
+
+    conn.executescript(INDEXES)
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return {"customers": customers, "transactions": total_transactions, "seconds": round(elapsed, 2)}
+
+
+def sample_lookup_latency(db_path: str, customers: int, samples: int = 1000, seed: int = 7) -> Dict:
+    """Time random recent-transaction lookups (microseconds)"""
+    conn = connect(db_path)
+    rng = random.Random(seed)
+    timings = []
+    for _ in range(samples):
+        customer_id = customer_id_for(rng.randint(1, max(customers, 1)))
+        started = time.perf_counter()
+        conn.execute(SQL_RECENT, (customer_id, 5)).fetchall()
+        timings.append((time.perf_counter() - started) * 1e6)
+    conn.close()
+    timings.sort()
+    return {
+        "p50_us": round(statistics.median(timings), 1),
+        "p99_us": round(timings[int(len(timings) * 0.99) - 1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the SQLite banking backend with synthetic data")
+    parser.add_argument("--db", default="banking.sqlite")
+    parser.add_argument("--customers", type=int, default=10000)
+    parser.add_argument("--transactions", type=int, default=20, help="transactions per customer")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    result = seed_database(args.db, args.customers, args.transactions, args.seed, args.batch_size)
+    print(f"Loaded {result['customers']} customers / {result['transactions']} transactions in {result['seconds']}s")
+    latency = sample_lookup_latency(args.db, args.customers)
+    print(f"Recent-transaction lookup: p50 {latency['p50_us']}us, p99 {latency['p99_us']}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Verification sessions shared by the LangGraph agents and the voice agent
+A successful PIN check marks a session (chat thread or voice call) as verified
+for a TTL, so protected tools can check it locally instead of the model
+re-running verify_identity. Failed PIN attempts lock out the session that made
+them, so nobody can lock a customer out of their own session; a larger
+per-customer cap bounds guesses spread over many sessions. A chat thread id is
+not a credential on its own: clients must present the thread's session token
+(see `thread_token`) to continue a thread and use its verification. Verification also starts the session's account snapshot
+prefetch (see `snapshots`).
+"""
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.services import banking
+from app.services.snapshots import snapshots
+
+logger = logging.getLogger("bank-abc-sessions")
+
+
+class InvalidSessionToken(Exception):
+    """A chat request named a thread without that thread's session token"""
+
+
+class VerificationSessions:
+    """TTL'd session -> verified customer map plus a failed-attempt counter"""
+
+    def __init__(self, ttl: float = 900.0, max_sessions: int = 100000,
+                 max_attempts: int = 3, lockout_seconds: float = 300.0, max_customer_attempts: int = 20):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_attempts = max_attempts
+        self.lockout_seconds = lockout_seconds
+        self.max_customer_attempts = max_customer_attempts
+        self._lock = threading.Lock()
+        # session_id -> (customer_id, expires_at), in expiry order
+        self._sessions: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        # (session_id, customer_id) -> (failed attempts, locked_until), oldest first
+        self._failures: "OrderedDict[Tuple[str, str], Tuple[int, float]]" = OrderedDict()
+        # customer_id -> (failed attempts from any session, window_ends): caps guessing spread over sessions
+        self._customer_failures: Dict[str, Tuple[int, float]] = {}
+
+    def get(self, session_id: str) -> Optional[str]:
+        """Verified customer id for the session, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            customer_id, expires_at = entry
+            if expires_at < now:
+                del self._sessions[session_id]
+                return None
+            return customer_id
+
+    def is_verified(self, session_id: str, customer_id: Optional[str] = None) -> bool:
+        verified = self.get(session_id)
+        return verified is not None and (customer_id is None or verified == customer_id)
+
+    def mark_verified(self, session_id: str, customer_id: str):
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[session_id] = (customer_id, now + self.ttl)
+            self._sessions.move_to_end(session_id)
+            self._failures.pop((session_id, customer_id), None)
+            # Entries are in expiry order: drop expired ones, then enforce the cap
+            while self._sessions:
+                _, (_, expires_at) = next(iter(self._sessions.items()))
+                if expires_at >= now and len(self._sessions) <= self.max_sessions:
+                    break
+                self._sessions.popitem(last=False)
+
+    def verification_state(self, session_id: str) -> Dict:
+        """`customer_id`/`is_verified` graph-state fields for the session"""
+        customer_id = self.get(session_id)
+        if customer_id is None:
+            return {"is_verified": False}
+        return {"customer_id": customer_id, "is_verified": True}
+
+    def end(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def lockout_remaining(self, session_id: str, customer_id: str) -> float:
+        """Seconds until the session may try the customer's PIN again (0 when not locked)"""
+        now = time.monotonic()
+        with self._lock:
+            _, session_until = self._failures.get((session_id, customer_id), (0, 0.0))
+            attempts, window_ends = self._customer_failures.get(customer_id, (0, 0.0))
+        customer_until = window_ends if attempts >= self.max_customer_attempts else 0.0
+        return max(session_until - now, customer_until - now, 0.0)
+
+    def record_failure(self, session_id: str, customer_id: str) -> int:
+        """Count a failed attempt; returns attempts left before this session is locked out"""
+        now = time.monotonic()
+        key = (session_id, customer_id)
+        with self._lock:
+            # Another session's failures never lock this one out; the per-customer
+            # window only bounds how many guesses all sessions together get
+            attempts, window_ends = self._customer_failures.get(customer_id, (0, 0.0))
+            if window_ends <= now:
+                attempts, window_ends = 0, now + self.lockout_seconds
+            self._customer_failures[customer_id] = (attempts + 1, window_ends)
+            customer_left = max(self.max_customer_attempts - attempts - 1, 0)
+
+            attempts, locked_until = self._failures.pop(key, (0, 0.0))
+            if locked_until and locked_until <= now:
+                attempts = 0  # previous lockout has expired
+            attempts += 1
+            if attempts >= self.max_attempts:
+                self._failures[key] = (attempts, now + self.lockout_seconds)
+            else:
+                self._failures[key] = (attempts, 0.0)
+            # Abandoned sessions' counters go first
+            while len(self._failures) > self.max_sessions:
+                self._failures.popitem(last=False)
+            if len(self._customer_failures) > self.max_sessions:
+                self._customer_failures = {
+                    cid: entry for cid, entry in self._customer_failures.items() if entry[1] > now
+                }
+        return min(max(self.max_attempts - attempts, 0), customer_left)
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "locked_sessions": sum(1 for _, locked_until in self._failures.values() if locked_until > now),
+                "locked_customers": sum(
+                    1 for attempts, window_ends in self._customer_failures.values()
+                    if attempts >= self.max_customer_attempts and window_ends > now
+                ),
+            }
+
+
+sessions = VerificationSessions(
+    ttl=float(os.getenv("VERIFICATION_TTL", "900")),
+    max_attempts=int(os.getenv("VERIFICATION_MAX_ATTEMPTS", "3")),
+    lockout_seconds=float(os.getenv("VERIFICATION_LOCKOUT_SECONDS", "300")),
+    max_customer_attempts=int(os.getenv("VERIFICATION_MAX_CUSTOMER_ATTEMPTS", "20")),
+)
+
+
+async def verify_customer(session_id: str, customer_id: str, pin: str,
+                          timeout: Optional[float] = None) -> Tuple[bool, str]:
+    """
+    Check a PIN for a session, enforcing lockout locally before any backend call.
+    Returns (verified, message for the customer/model).
+    """
+    remaining = sessions.lockout_remaining(session_id, customer_id)
+    if remaining:
+        minutes = max(int(remaining // 60), 1)
+        return False, f"Too many failed attempts. Please try again in about {minutes} minute(s)."
+
+    if await banking.averify_identity(customer_id, pin, timeout=timeout):
+        sessions.mark_verified(session_id, customer_id)
+        # The data the next turns ask for, loaded while the model writes its reply
+        snapshots.prefetch(session_id, customer_id)
+        return True, f"Identity verified for customer {customer_id}"
+
+    attempts_left = sessions.record_failure(session_id, customer_id)
+    if attempts_left == 0:
+        return False, "Invalid credentials. Too many failed attempts; verification is temporarily locked."
+    return False, f"Invalid credentials. {attempts_left} attempt(s) remaining."
+
+
+def session_error(session_id: str, customer_id: str, verify_tool: str = "verify_identity") -> Optional[str]:
+    """Error message if the session may not access `customer_id`'s data, else None"""
+    verified = sessions.get(session_id)
+    if verified is None:
+        return f"Identity not verified. Ask the customer for their Customer ID and PIN and call {verify_tool} first."
+    if verified != customer_id:
+        return f"This session is verified for a different customer; access to {customer_id} is not allowed."
+    return None
+
+
+# Signs chat thread ids. A random per-process fallback invalidates every client's
+# thread on restart and across workers, so any real deployment must set it
+SESSION_SECRET = os.getenv("SESSION_SECRET", "").encode()
+if not SESSION_SECRET:
+    logger.warning(
+        "SESSION_SECRET is not set: using a random per-process key. Chat session tokens will be "
+        "rejected (403) after a restart or by another worker; set SESSION_SECRET outside development."
+    )
+    SESSION_SECRET = secrets.token_hex(32).encode()
+
+
+def thread_token(thread_id: str) -> str:
+    """Session token for a chat thread, returned to the client that started it"""
+    return hmac.new(SESSION_SECRET, thread_id.encode(), hashlib.sha256).hexdigest()
+
+
+def check_thread_token(thread_id: str, token: Optional[str]):
+    """Raise InvalidSessionToken unless `token` is the thread's session token"""
+    if not token or not hmac.compare_digest(thread_token(thread_id), token):
+        raise InvalidSessionToken("Missing or invalid session token for this thread")
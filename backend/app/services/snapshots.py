@@ -0,0 +1,136 @@
+"""
+Per-session account snapshots
+A successful verification starts a background fetch of the customer's balance,
+recent transactions and card status. The balance/transactions/card tools of
+both agents then read from that snapshot instead of calling the backend.
+Writes through `banking` (block_card) invalidate every snapshot of the
+customer. The next read reloads it, and a load that raced a write is retried,
+so a snapshot never outlives a write made through this service.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.services import banking
+from app.services.storage import encode_cursor
+
+
+class _Entry:
+    __slots__ = ("customer_id", "generation", "task", "expires_at")
+
+    def __init__(self, customer_id: str, generation: int, task: asyncio.Future, expires_at: float):
+        self.customer_id = customer_id
+        self.generation = generation
+        self.task = task
+        self.expires_at = expires_at
+
+
+class AccountSnapshots:
+    """session_id -> prefetched account snapshot, invalidated per customer on writes"""
+
+    def __init__(self, ttl: float = 60.0, transactions: int = 10, max_sessions: int = 10000):
+        self.ttl = ttl
+        self.transactions = transactions
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # customer_id -> write generation; bumped by every write for that customer
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.invalidations = 0
+
+    def _generation(self, customer_id: str) -> int:
+        with self._lock:
+            return self._generations.get(customer_id, 0)
+
+    async def _load(self, customer_id: str) -> Dict:
+        while True:
+            generation = self._generation(customer_id)
+            balance, page, cards = await asyncio.gather(
+                banking.aget_account_balance(customer_id),
+                banking.aget_transactions_page(customer_id, self.transactions),
+                banking.aget_card_status(customer_id),
+            )
+            self.loads += 1
+            # A write landed while loading: what we read may predate it
+            if self._generation(customer_id) == generation:
+                return {"balance": balance, "transactions": page["transactions"],
+                        "next_cursor": page["next_cursor"], "cards": cards}
+
+    def prefetch(self, session_id: str, customer_id: str) -> asyncio.Future:
+        """Start loading the session's snapshot in the background (call from the event loop)"""
+        task = asyncio.ensure_future(self._load(customer_id))
+        # Retrieve failures here so an unread prefetch never logs "exception was never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        with self._lock:
+            generation = self._generations.get(customer_id, 0)
+            self._entries[session_id] = _Entry(customer_id, generation, task, time.monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_sessions:
+                self._entries.popitem(last=False)
+        return task
+
+    async def get(self, session_id: str, customer_id: str, timeout: Optional[float] = None) -> Dict:
+        """The session's snapshot, loading it first if it is missing, stale or invalidated"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(session_id)
+            fresh = (
+                entry is not None
+                and entry.customer_id == customer_id
+                and entry.expires_at > now
+                and entry.generation == self._generations.get(customer_id, 0)
+                and not (entry.task.done() and (entry.task.cancelled() or entry.task.exception()))
+            )
+        if fresh and entry.task.done():
+            self.hits += 1
+        else:
+            self.misses += 1
+            if not fresh:
+                entry = None
+        task = entry.task if entry is not None else self.prefetch(session_id, customer_id)
+        return await asyncio.wait_for(asyncio.shield(task), timeout if timeout is not None else banking.CALL_TIMEOUT)
+
+    @staticmethod
+    def transactions_page(snapshot: Dict, count: int) -> Optional[Dict]:
+        """The newest `count` transactions as a banking page, or None if the snapshot holds too few"""
+        rows = snapshot["transactions"]
+        if count < len(rows):
+            return {"transactions": rows[:count], "next_cursor": encode_cursor(rows[count - 1])}
+        if count == len(rows) or snapshot["next_cursor"] is None:
+            return {"transactions": rows, "next_cursor": snapshot["next_cursor"]}
+        return None
+
+    def invalidate(self, customer_id: str):
+        """Mark every snapshot of the customer stale; thread-safe (writes run on the I/O pool)"""
+        with self._lock:
+            self._generations[customer_id] = self._generations.get(customer_id, 0) + 1
+            self.invalidations += 1
+
+    def end(self, session_id: str):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is not None and not entry.task.done():
+            entry.task.cancel()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "loads": self.loads,
+                "invalidations": self.invalidations,
+            }
+
+
+snapshots = AccountSnapshots(
+    ttl=float(os.getenv("SNAPSHOT_TTL", "60")),
+    transactions=int(os.getenv("SNAPSHOT_TRANSACTIONS", "10")),
+)
+banking.add_write_listener(snapshots.invalidate)
@@ -0,0 +1,222 @@
+"""
+Banking storage backends
+`MemoryBankingStore` wraps the in-process mock data (single worker, POC default).
+`SqliteBankingStore` keeps customers and transactions in SQLite (WAL mode,
+connection pool, indexed keyset pagination) so several worker processes can
+share one dataset of millions of rows.
+Select with BANKING_BACKEND=memory|sqlite and BANKING_DB_PATH.
+"""
+import bisect
+import datetime
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+TRANSACTION_FIELDS = ("id", "date", "amount", "merchant", "category", "status")
+
+
+def encode_cursor(transaction: Dict) -> str:
+    """Opaque keyset cursor pointing just past `transaction` in recency order"""
+    return f"{transaction['date']}|{transaction['id']}"
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    date, _, txn_id = cursor.partition("|")
+    return date, txn_id
+
+
+class MemoryBankingStore:
+    """In-process store over a CUSTOMERS-style dict"""
+
+    def __init__(self, customers: Dict[str, Dict]):
+        self._customers = customers
+        self._lock = threading.Lock()
+        # Recency order is (date, id) descending, not insertion order
+        self._keys: Dict[str, List[Tuple[str, str]]] = {}
+        for customer_id, customer in customers.items():
+            customer["transactions"].sort(key=lambda t: (t["date"], t["id"]), reverse=True)
+            # Ascending keys for bisect-based keyset pagination
+            self._keys[customer_id] = [(t["date"], t["id"]) for t in reversed(customer["transactions"])]
+
+    def get_customer(self, customer_id: str) -> Optional[Dict]:
+        customer = self._customers.get(customer_id)
+        if not customer:
+            return None
+        return {"customer_id": customer_id, "pin": customer["pin"], "name": customer["name"],
+                "balance": customer["balance"], "currency": customer.get("currency", "USD")}
+
+    def get_transactions(self, customer_id: str, limit: int, before: Optional[str] = None) -> List[Dict]:
+        customer = self._customers.get(customer_id)
+        if not customer:
+            return []
+        transactions = customer["transactions"]
+        start = 0
+        if before:
+            # Everything strictly older than the cursor sits at the tail of the descending list
+            keys = self._keys[customer_id]
+            start = len(keys) - bisect.bisect_left(keys, decode_cursor(before))
+        return transactions[start:start + limit]
+
+    def get_blocked_cards(self, customer_id: str) -> List[Dict]:
+        customer = self._customers.get(customer_id)
+        if not customer:
+            return []
+        with self._lock:
+            return [dict(card) for card in customer["blocked_cards"]]
+
+    def block_card(self, customer_id: str, card_id: str, reason: str) -> bool:
+        customer = self._customers.get(customer_id)
+        if not customer:
+            return False
+        with self._lock:
+            # Same semantics as SQLite's INSERT OR REPLACE: one entry per card, latest reason/date
+            blocked = [card for card in customer["blocked_cards"] if card["card_id"] != card_id]
+            blocked.append({"card_id": card_id, "reason": reason, "date": str(datetime.date.today())})
+            customer["blocked_cards"] = blocked
+        return True
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    pin TEXT NOT NULL,
+    name TEXT NOT NULL,
+    balance REAL NOT NULL,
+    currency TEXT NOT NULL DEFAULT 'USD'
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    customer_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    amount REAL NOT NULL,
+    merchant TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT 'other',
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocked_cards (
+    customer_id TEXT NOT NULL,
+    card_id TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    date TEXT NOT NULL,
+    PRIMARY KEY (customer_id, card_id)
+);
+"""
+# Created separately so bulk loads can drop and rebuild it
+INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_transactions_customer_date
+    ON transactions (customer_id, date DESC, id DESC);
+"""
+
+# Statements are module constants so each pooled connection's statement cache reuses them
+SQL_GET_CUSTOMER = "SELECT customer_id, pin, name, balance, currency FROM customers WHERE customer_id = ?"
+SQL_RECENT = (
+    "SELECT id, date, amount, merchant, category, status FROM transactions "
+    "WHERE customer_id = ? ORDER BY date DESC, id DESC LIMIT ?"
+)
+SQL_RECENT_BEFORE = (
+    "SELECT id, date, amount, merchant, category, status FROM transactions "
+    "WHERE customer_id = ? AND (date, id) < (?, ?) ORDER BY date DESC, id DESC LIMIT ?"
+)
+SQL_BLOCK_CARD = "INSERT OR REPLACE INTO blocked_cards VALUES (?, ?, ?, ?)"
+SQL_BLOCKED_CARDS = "SELECT card_id, reason, date FROM blocked_cards WHERE customer_id = ? ORDER BY date, card_id"
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open a connection tuned for many concurrent readers across processes"""
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, cached_statements=64)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
+
+def init_schema(conn: sqlite3.Connection):
+    conn.executescript(SCHEMA + INDEXES)
+
+
+class SqliteBankingStore:
+    """SQLite-backed store with a fixed-size connection pool"""
+
+    def __init__(self, db_path: str, pool_size: int = 4, seed_customers: Optional[Dict[str, Dict]] = None):
+        self.db_path = db_path
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(connect(db_path))
+
+        with self._connection() as conn:
+            init_schema(conn)
+            empty = conn.execute("SELECT 1 FROM customers LIMIT 1").fetchone() is None
+        if empty and seed_customers:
+            self.load_customers(seed_customers)
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def load_customers(self, customers: Dict[str, Dict]):
+        """Insert CUSTOMERS-style mock data (used to seed an empty database)"""
+        with self._connection() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO customers VALUES (?, ?, ?, ?, ?)",
+                [(cid, c["pin"], c["name"], c["balance"], c.get("currency", "USD")) for cid, c in customers.items()],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (t["id"], cid, t["date"], t["amount"], t["merchant"], t.get("category", "other"), t["status"])
+                    for cid, c in customers.items()
+                    for t in c["transactions"]
+                ],
+            )
+            conn.execute("COMMIT")
+
+    def get_customer(self, customer_id: str) -> Optional[Dict]:
+        with self._connection() as conn:
+            row = conn.execute(SQL_GET_CUSTOMER, (customer_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("customer_id", "pin", "name", "balance", "currency"), row))
+
+    def get_transactions(self, customer_id: str, limit: int, before: Optional[str] = None) -> List[Dict]:
+        with self._connection() as conn:
+            if before:
+                date, txn_id = decode_cursor(before)
+                rows = conn.execute(SQL_RECENT_BEFORE, (customer_id, date, txn_id, limit)).fetchall()
+            else:
+                rows = conn.execute(SQL_RECENT, (customer_id, limit)).fetchall()
+        return [dict(zip(TRANSACTION_FIELDS, row)) for row in rows]
+
+    def get_blocked_cards(self, customer_id: str) -> List[Dict]:
+        with self._connection() as conn:
+            rows = conn.execute(SQL_BLOCKED_CARDS, (customer_id,)).fetchall()
+        return [dict(zip(("card_id", "reason", "date"), row)) for row in rows]
+
+    def block_card(self, customer_id: str, card_id: str, reason: str) -> bool:
+        with self._connection() as conn:
+            if conn.execute(SQL_GET_CUSTOMER, (customer_id,)).fetchone() is None:
+                return False
+            conn.execute(SQL_BLOCK_CARD, (customer_id, card_id, reason, str(datetime.date.today())))
+        return True
+
+
+def create_store(customers: Dict[str, Dict]):
+    """Build the backend selected by BANKING_BACKEND, seeding SQLite from `customers` if empty"""
+    backend = os.getenv("BANKING_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SqliteBankingStore(
+            os.getenv("BANKING_DB_PATH", "banking.sqlite"),
+            pool_size=int(os.getenv("BANKING_DB_POOL_SIZE", "4")),
+            seed_customers=customers,
+        )
+    if backend == "memory":
+        return MemoryBankingStore(customers)
+    raise ValueError(f"Unknown BANKING_BACKEND: {backend}")
@@ -0,0 +1,124 @@
+"""
+Cold-start profile: import cost, graph build, and first-request latency
+
+    python -m bench.coldstart --runs 5
+    python -m bench.coldstart --top 25      # heaviest imports under app.main
+
+Every run is a fresh interpreter. The LLM is a `bench.fake_openai_server`
+stand-in reached through the real OpenAI client (LLM_PROVIDERS=openai@...), so
+the first request pays the same client import, pool build and connection setup
+as production. Two scenarios are compared: `lazy` (the first request builds the
+graph) and `warmed` (the startup warmup ran first).
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from bench.common import isolate_environment, print_table, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _child(scenario: str) -> Dict[str, float]:
+    timings = {}
+    started = time.perf_counter()
+    import app.main
+    timings["import_main"] = time.perf_counter() - started
+
+    import httpx
+
+    from app.agents import loader
+
+    if scenario == "warmed":
+        started = time.perf_counter()
+        await loader.warmup(["chat"])
+        timings["warmup"] = time.perf_counter() - started
+
+    transport = httpx.ASGITransport(app=app.main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for label in ("first_request", "second_request"):
+            started = time.perf_counter()
+            response = await client.post("/chat", json={"message": "what is my balance"})
+            response.raise_for_status()
+            timings[label] = time.perf_counter() - started
+    return timings
+
+
+def run_child(scenario: str, env: Dict[str, str]) -> Dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, "-m", "bench.coldstart", "--child", scenario],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def import_profile(env: Dict[str, str], top: int) -> List[tuple]:
+    """(cumulative_us, module) for the slowest imports under `import app.main`"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    ).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        entries.append((int(cumulative), module.rstrip()))
+    # Importtime lists children before their parent, indented one level (two spaces)
+    # deeper: walk back from app.main to collect its direct imports plus every app module
+    def indent(module: str) -> int:
+        return len(module) - len(module.lstrip())
+
+    end = next(i for i, (_, m) in enumerate(entries) if m.strip() == "app.main")
+    base = indent(entries[end][1])
+    rows = [entries[end]]
+    for us, module in reversed(entries[:end]):
+        if indent(module) <= base:
+            break
+        if indent(module) == base + 2 or module.strip().startswith("app."):
+            rows.append((us, module))
+    rows = [(us, m.strip()) for us, m in rows]
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start and first-request profile")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per scenario")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(_child(args.child))))
+        return
+
+    isolate_environment()
+    from bench.failover import start_server
+
+    port = start_server(args.llm_latency)
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, LLM_PROVIDERS=f"openai@http://127.0.0.1:{port}/v1",
+               LOCAL_LLM_PROVIDERS="", AGENT_WARMUP="")
+
+    results: Dict[str, Dict] = {}
+    for scenario in ("lazy", "warmed"):
+        samples: Dict[str, List[float]] = {}
+        for _ in range(args.runs):
+            for key, seconds in run_child(scenario, env).items():
+                samples.setdefault(key, []).append(seconds)
+        for key, values in samples.items():
+            results[f"{scenario}.{key}"] = summarize(values)
+
+    print_table(f"Cold start ({args.runs} fresh interpreters per scenario)", results)
+    print(f"\nSlowest imports under app.main (cumulative ms)")
+    for cumulative, module in import_profile(env, args.top):
+        print(f"  {cumulative / 1000:9.1f}  {module}")
+
+
+if __name__ == "__main__":
+    main()
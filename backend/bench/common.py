@@ -0,0 +1,144 @@
+"""
+Shared benchmark helpers: environment isolation, latency summaries and
+baseline comparison
+
+baselines.json holds, per section ("loadtest", "microbench"):
+- the recorded p50/p95/RPS per benchmark,
+- "calibration_ms": time of a fixed CPU workload on the machine that recorded
+  them. Checks scale the baselines by this machine's calibration, so a slower
+  CI runner is not a regression.
+- "tolerance": allowed slowdown after scaling, as a ratio (1.0 = latency may
+  double and RPS halve). `--tolerance` overrides it.
+- "checked" (optional): the metrics that gate, e.g. leaving out p95 where tails
+  are dominated by disk syncs on shared runners. Default: p50, p95 and RPS.
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+DEFAULT_TOLERANCE = 1.0
+METRICS = ("p50_ms", "p95_ms", "rps")
+
+
+def isolate_environment() -> str:
+    """Point every on-disk store at a scratch directory; call before importing `app`"""
+    workdir = tempfile.mkdtemp(prefix="bank-bench-")
+    os.environ.setdefault("OPENAI_API_KEY", "bench-not-used")
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
+    os.environ.setdefault("SESSION_SECRET", "bench-session-secret")
+    os.environ["CHECKPOINT_DB_PATH"] = os.path.join(workdir, "checkpoints.sqlite")
+    os.environ["AUDIT_DB_PATH"] = os.path.join(workdir, "audit.sqlite")
+    os.environ["RESPONSE_CACHE_DISK_PATH"] = ""
+    return workdir
+
+
+def summarize(latencies: List[float], elapsed: Optional[float] = None, errors: int = 0) -> Dict:
+    """Latency summary in milliseconds (and RPS when the wall time is given)"""
+    ordered = sorted(latencies)
+    count = len(ordered)
+
+    def pct(q: float) -> float:
+        if not ordered:
+            return 0.0
+        return round(ordered[min(int(q * count), count - 1)] * 1000, 3)
+
+    summary = {
+        "count": count,
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+    if elapsed:
+        summary["rps"] = round(count / elapsed, 1)
+    return summary
+
+
+def print_table(title: str, rows: Dict[str, Dict]):
+    print(f"\n{title}")
+    columns = ["count", "errors", "rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms"]
+    columns = [c for c in columns if any(c in row for row in rows.values())]
+    width = max((len(name) for name in rows), default=10) + 2
+    print("".ljust(width) + "".join(c.rjust(11) for c in columns))
+    for name, row in rows.items():
+        print(name.ljust(width) + "".join(str(row.get(c, "")).rjust(11) for c in columns))
+
+
+def calibrate(rounds: int = 5) -> float:
+    """Milliseconds for a fixed pure-Python workload (best of `rounds`): this machine's speed"""
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        table = {}
+        for i in range(200000):
+            table[i % 1024] = table.get(i % 1024, 0) + len(str(i))
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 3)
+
+
+def load_baselines() -> Dict:
+    if not os.path.exists(BASELINES_PATH):
+        return {}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+def save_baselines(section: str, results: Dict[str, Dict]):
+    baselines = load_baselines()
+    previous = baselines.get(section, {})
+    baselines[section] = {
+        "calibration_ms": calibrate(),
+        "tolerance": previous.get("tolerance", DEFAULT_TOLERANCE),
+        **({"checked": previous["checked"]} if "checked" in previous else {}),
+        "results": {
+            name: {k: v for k, v in row.items() if k in METRICS}
+            for name, row in results.items()
+        },
+    }
+    with open(BASELINES_PATH, "w") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def check_regressions(section: str, results: Dict[str, Dict], tolerance: Optional[float] = None,
+                      min_delta_ms: float = 0.1) -> List[str]:
+    """
+    Compare against stored baselines, scaled by this machine's speed relative to
+    the one that recorded them: latency may grow and RPS may drop by at most
+    `tolerance` (default: the section's stored ratio) before it counts as a
+    regression. Latency changes under `min_delta_ms` are timer noise and never count.
+    """
+    stored = load_baselines().get(section, {})
+    baselines = stored.get("results", {})
+    if tolerance is None:
+        tolerance = stored.get("tolerance", DEFAULT_TOLERANCE)
+    checked = stored.get("checked", METRICS)
+    # > 1 on a slower machine: expect proportionally higher latency and lower RPS
+    speed = calibrate() / stored["calibration_ms"] if stored.get("calibration_ms") else 1.0
+    print(f"{section}: machine speed factor {speed:.2f}, tolerance {tolerance}", file=sys.stderr)
+
+    for name in sorted(set(results) - set(baselines)):
+        print(f"{section}/{name}: no baseline, not checked (run --update-baseline)", file=sys.stderr)
+    failures = []
+    for name, baseline in baselines.items():
+        row = results.get(name)
+        if row is None:
+            print(f"{section}/{name}: baseline not measured in this run", file=sys.stderr)
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            if key not in checked or key not in baseline or key not in row:
+                continue
+            expected = baseline[key] * speed
+            if row[key] > expected * (1 + tolerance) and row[key] - expected > min_delta_ms:
+                failures.append(f"{section}/{name} {key}: {row[key]} > baseline {expected:.3f} (scaled)")
+        if "rps" in checked and "rps" in baseline:
+            expected = baseline["rps"] / speed
+            if row.get("rps", 0) < expected / (1 + tolerance):
+                failures.append(f"{section}/{name} rps: {row['rps']} < baseline {expected:.1f} (scaled)")
+    return failures
@@ -0,0 +1,138 @@
+"""
+Provider-pool failover drill against two local OpenAI-compatible stand-ins
+
+    python -m bench.failover --calls 200 --concurrency 16
+
+Starts two `bench.fake_openai_server` instances (a fast "primary" and a slower
+"secondary"), points a `ProviderPool` at them through the real OpenAI client,
+then walks through steady state, a hard outage, a slow brownout with hedging,
+and recovery. Each phase reports latency and where the calls went.
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+from typing import Dict, List
+
+from bench.common import isolate_environment, print_table, summarize
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(latency: float) -> int:
+    """Run a stand-in server on a daemon thread; returns its port"""
+    import uvicorn
+
+    from bench.fake_openai_server import create_app
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(latency), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return port
+
+
+async def run_phase(pool, calls: int, concurrency: int) -> Dict:
+    from langchain_core.messages import HumanMessage
+
+    from app.agents.providers import PROVIDER_CALLS, PROVIDER_HEDGES
+
+    def counts() -> Dict[str, float]:
+        out = {}
+        for p in pool.providers:
+            out[f"{p.label}.ok"] = PROVIDER_CALLS.value(p.name, "ok")
+            out[f"{p.label}.err"] = PROVIDER_CALLS.value(p.name, "error")
+            out[f"{p.label}.hedged"] = PROVIDER_HEDGES.value(p.name)
+        return out
+
+    before = counts()
+    latencies: List[float] = []
+    errors = 0
+    remaining = calls
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                await pool.ainvoke([HumanMessage(content="what is my balance")])
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = summarize(latencies, time.perf_counter() - started, errors)
+    after = counts()
+    summary["routed"] = {k: int(after[k] - before[k]) for k in after if after[k] - before[k]}
+    return summary
+
+
+async def main_async(args) -> Dict[str, Dict]:
+    import httpx
+
+    from app.agents.providers import ProviderPool, build_provider
+    from app.agents.tools import get_account_balance
+
+    ports = {"primary": start_server(args.primary_latency), "secondary": start_server(args.secondary_latency)}
+    providers = []
+    for index, (label, port) in enumerate(ports.items()):
+        provider = build_provider(f"openai@http://127.0.0.1:{port}/v1", [get_account_balance], prior_latency=1.0 + index)
+        provider.label = label
+        provider.cooldown = args.cooldown
+        providers.append(provider)
+    pool = ProviderPool(providers, timeout=args.timeout)
+
+    async def configure(label: str, **settings):
+        async with httpx.AsyncClient() as client:
+            await client.post(f"http://127.0.0.1:{ports[label]}/admin/config", json=settings)
+
+    results: Dict[str, Dict] = {}
+    results["steady"] = await run_phase(pool, args.calls, args.concurrency)
+
+    await configure("primary", fail_rate=1.0)
+    results["outage"] = await run_phase(pool, args.calls, args.concurrency)
+
+    # Primary answers again, but slowly: hedging caps the tail at roughly hedge_after + secondary latency
+    await configure("primary", fail_rate=0.0, latency=args.brownout_latency)
+    await asyncio.sleep(args.cooldown)
+    for provider in providers:
+        provider.latency, provider.error_rate, provider.open_until = None, 0.0, 0.0
+    pool.hedge_after = args.hedge_after
+    results["brownout+hedge"] = await run_phase(pool, args.calls, args.concurrency)
+
+    await configure("primary", latency=args.primary_latency)
+    pool.hedge_after = 0.0
+    await asyncio.sleep(args.cooldown)
+    results["recovered"] = await run_phase(pool, args.calls, args.concurrency)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM provider failover drill")
+    parser.add_argument("--calls", type=int, default=200, help="LLM calls per phase")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--primary-latency", type=float, default=0.03)
+    parser.add_argument("--secondary-latency", type=float, default=0.08)
+    parser.add_argument("--brownout-latency", type=float, default=1.0)
+    parser.add_argument("--hedge-after", type=float, default=0.15)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--cooldown", type=float, default=1.0)
+    args = parser.parse_args()
+
+    isolate_environment()
+    results = asyncio.run(main_async(args))
+    print_table(f"Provider failover ({args.calls} calls/phase, concurrency {args.concurrency})", results)
+    for phase, row in results.items():
+        print(f"{phase}: {row['routed']}")
+
+
+if __name__ == "__main__":
+    main()
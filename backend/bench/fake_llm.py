@@ -0,0 +1,96 @@
+"""
+Deterministic stand-in chat model for offline benchmarks
+Replies are scripted from the last message (credentials -> verify_identity,
+balance -> get_account_balance, ...) after a configurable delay, and report
+usage metadata like a real provider, so the graphs run their full tool loop
+without network calls.
+"""
+import asyncio
+import random
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+CREDENTIALS = re.compile(r"\b(user\w+|cust\d+)\b.*?\b(\d{4})\b", re.IGNORECASE | re.DOTALL)
+
+# keyword -> (tool name, extra args); first match wins
+SCRIPT = [
+    ("card status", ("get_card_status", {})),
+    ("block", ("block_card", {"card_id": "card-1", "reason": "lost"})),
+    ("spend", ("analyze_spending", {"period": "all"})),
+    ("transaction", ("get_recent_transactions", {"count": 5})),
+    ("balance", ("get_account_balance", {})),
+]
+
+
+class FakeChatModel(BaseChatModel):
+    """Scripted tool-calling chat model with configurable latency"""
+
+    latency: float = 0.05  # seconds per call
+    jitter: float = 0.0  # +/- fraction of latency
+    customer_id: str = "user123"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-banking"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        return max(self.latency * (1 + random.uniform(-self.jitter, self.jitter)), 0.0)
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        # Session state trails the conversation as a system message; script off the last real turn
+        last = next((m for m in reversed(messages) if not isinstance(m, SystemMessage)), messages[-1])
+        if isinstance(last, ToolMessage):
+            return AIMessage(content=f"Here is what I found: {str(last.content)[:200]}")
+
+        text = str(last.content)
+        call_id = f"call_{len(messages)}_{random.getrandbits(32):08x}"
+        match = CREDENTIALS.search(text)
+        if match:
+            args = {"customer_id": match.group(1), "pin": match.group(2)}
+            return AIMessage(content="", tool_calls=[{"name": "verify_identity", "args": args, "id": call_id}])
+
+        lowered = text.lower()
+        for keyword, (tool, extra) in SCRIPT:
+            if keyword in lowered:
+                args = {"customer_id": self.customer_id, **extra}
+                return AIMessage(content="", tool_calls=[{"name": tool, "args": args, "id": call_id}])
+        return AIMessage(content="I can help with cards, balances, transactions and spending questions.")
+
+    def _result(self, messages: List[BaseMessage]) -> ChatResult:
+        message = self._reply(messages)
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        message.usage_metadata = {
+            "input_tokens": prompt_chars // 4,
+            "output_tokens": len(str(message.content)) // 4 + 10 * len(message.tool_calls),
+            "total_tokens": prompt_chars // 4 + len(str(message.content)) // 4,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._delay())
+        return self._result(messages)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return self._result(messages)
+
+
+def install(graph_module, latency: float = 0.05, jitter: float = 0.0) -> FakeChatModel:
+    """Replace a graph module's LLM provider pool with the fake model"""
+    from app.agents.providers import Provider
+
+    model = FakeChatModel(latency=latency, jitter=jitter)
+    graph_module.pool.set_providers([Provider("fake", model)])
+    return model
@@ -0,0 +1,123 @@
+"""
+OpenAI-compatible stand-in server for failover and hedging experiments
+
+    python -m bench.fake_openai_server --port 9001 --latency 0.05
+    curl -X POST localhost:9001/admin/config -d '{"latency": 2.0, "fail_rate": 0.5}'
+
+Serves `/v1/chat/completions` (plain and streamed) with the same scripted
+replies as `bench.fake_llm`, so an `openai@http://127.0.0.1:9001/v1` entry in
+LLM_PROVIDERS exercises the real HTTP client path. Latency and failure rate can
+be changed at runtime to simulate a brownout.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+from bench.fake_llm import FakeChatModel
+
+
+def _to_messages(payload: List[Dict]) -> List[BaseMessage]:
+    messages: List[BaseMessage] = []
+    for m in payload:
+        content = m.get("content") or ""
+        if m.get("role") == "tool":
+            messages.append(ToolMessage(content=content, tool_call_id=m.get("tool_call_id", "")))
+        elif m.get("role") == "system":
+            messages.append(SystemMessage(content=content))
+        else:
+            messages.append(HumanMessage(content=content if isinstance(content, str) else json.dumps(content)))
+    return messages
+
+
+def create_app(latency: float = 0.05, fail_rate: float = 0.0, name: str = "fake") -> FastAPI:
+    app = FastAPI()
+    settings = {"latency": latency, "fail_rate": fail_rate, "jitter": 0.0}
+    stats = {"requests": 0, "failures": 0}
+    model = FakeChatModel()
+
+    @app.post("/admin/config")
+    async def configure(request: Request):
+        settings.update({k: float(v) for k, v in (await request.json()).items() if k in settings})
+        return {**settings, **stats}
+
+    @app.get("/admin/stats")
+    async def get_stats():
+        return {**settings, **stats}
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": name, "object": "model", "created": 0, "owned_by": "bench"}]}
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        delay = settings["latency"] * (1 + random.uniform(-settings["jitter"], settings["jitter"]))
+        await asyncio.sleep(max(delay, 0.0))
+        if random.random() < settings["fail_rate"]:
+            stats["failures"] += 1
+            return JSONResponse({"error": {"message": "simulated outage", "type": "server_error"}}, status_code=503)
+
+        reply = model._result(_to_messages(body.get("messages", []))).generations[0].message
+        tool_calls = [
+            {"id": call["id"], "type": "function",
+             "function": {"name": call["name"], "arguments": json.dumps(call["args"])}}
+            for call in reply.tool_calls
+        ]
+        usage = {
+            "prompt_tokens": reply.usage_metadata["input_tokens"],
+            "completion_tokens": reply.usage_metadata["output_tokens"],
+            "total_tokens": reply.usage_metadata["input_tokens"] + reply.usage_metadata["output_tokens"],
+        }
+        base = {"id": f"chatcmpl-{stats['requests']}", "created": int(time.time()), "model": body.get("model", name)}
+        finish = "tool_calls" if tool_calls else "stop"
+
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": reply.content or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return {**base, "object": "chat.completion", "usage": usage,
+                    "choices": [{"index": 0, "message": message, "finish_reason": finish}]}
+
+        def chunk(delta: Dict, finish_reason=None, **extra) -> str:
+            data = {**base, "object": "chat.completion.chunk", **extra,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            return f"data: {json.dumps(data)}\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            for word in str(reply.content).split(" ") if reply.content else []:
+                yield chunk({"content": word + " "})
+            for index, call in enumerate(tool_calls):
+                yield chunk({"tool_calls": [{"index": index, **call}]})
+            yield chunk({}, finish)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible fake LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency, args.fail_rate), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Offline load test for the chat endpoints and the voice tool path
+
+    python -m bench.loadtest --requests 500 --concurrency 32 --llm-latency 0.05
+    python -m bench.loadtest --target voice --concurrency 64 --check
+
+Requests go through the real FastAPI app in-process (httpx ASGITransport) with
+the LLM swapped for `bench.fake_llm.FakeChatModel`, so the numbers measure this
+service's own overhead plus the simulated model latency.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from bench.common import (check_regressions, isolate_environment, print_table, save_baselines,
+                          summarize)
+
+# One scripted conversation: fast-path greeting, verification, then account tools
+CONVERSATION = [
+    "hi",
+    "my customer id is user123 and my pin is 1234",
+    "what is my balance",
+    "show my recent transactions",
+    "how much did I spend this year",
+]
+
+# Voice calls exercise the same backend through the dispatcher instead of the LLM
+VOICE_CALLS = [
+    ("verify_identity", {"customer_id": "user123", "pin": "1234"}),
+    ("get_account_balance", {}),
+    ("get_recent_transactions", {"count": 5}),
+    ("analyze_spending", {"period": "all"}),
+]
+
+
+async def _run_workers(total: int, concurrency: int, session) -> Tuple[List[float], int, float]:
+    """Run `total` operations across `concurrency` workers; `session()` yields one timed step at a time"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            async for ok, elapsed in session():
+                if remaining <= 0:
+                    return
+                remaining -= 1
+                latencies.append(elapsed)
+                if not ok:
+                    errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def bench_chat(client, path: str, total: int, concurrency: int) -> Dict:
+    async def conversation():
+        thread = {}
+        for message in CONVERSATION:
+            payload = {"message": message, **thread}
+            started = time.perf_counter()
+            response = await client.post(path, json=payload)
+            elapsed = time.perf_counter() - started
+            if response.status_code == 200:
+                body = response.json()
+                thread = {"thread_id": body["thread_id"], "session_token": body["session_token"]}
+            yield response.status_code == 200, elapsed
+
+    latencies, errors, wall = await _run_workers(total, concurrency, conversation)
+    return summarize(latencies, wall, errors)
+
+
+async def bench_voice(total: int, concurrency: int) -> Dict:
+    from app.agents.voice_tools import BankingAssistant, ToolDispatcher
+
+    counter = 0
+
+    async def call():
+        nonlocal counter
+        counter += 1
+        assistant = BankingAssistant(session_id=f"voice:bench-{counter}")
+        dispatcher = ToolDispatcher(assistant)
+        try:
+            for name, arguments in VOICE_CALLS:
+                started = time.perf_counter()
+                result = await dispatcher.dispatch(name, arguments)
+                yield "error" not in result, time.perf_counter() - started
+        finally:
+            assistant.end_session()
+
+    latencies, errors, wall = await _run_workers(total, concurrency, call)
+    return summarize(latencies, wall, errors)
+
+
+async def main_async(args) -> Dict[str, Dict]:
+    isolate_environment()
+    import httpx
+
+    from app.agents import graph
+    from bench.fake_llm import install
+
+    install(graph, args.llm_latency, args.jitter)
+    from app.main import app
+
+    results: Dict[str, Dict] = {}
+    targets = ["chat", "local", "voice"] if args.target == "all" else [args.target]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for target in targets:
+            name = f"{target}@c{args.concurrency}"
+            if target == "chat":
+                results[name] = await bench_chat(client, "/chat", args.requests, args.concurrency)
+            elif target == "local":
+                try:
+                    from app.agents import graph_local
+                except ImportError as e:
+                    print(f"Skipping /chat/local: {e}", file=sys.stderr)
+                    continue
+                install(graph_local, args.llm_latency, args.jitter)
+                results[name] = await bench_chat(client, "/chat/local", args.requests, args.concurrency)
+            elif target == "voice":
+                results[name] = await bench_voice(args.requests, args.concurrency)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test with a fake LLM")
+    parser.add_argument("--target", choices=["chat", "local", "voice", "all"], default="all")
+    parser.add_argument("--requests", type=int, default=500, help="requests (or tool calls) per target")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM latency per call (seconds)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- fraction of the LLM latency")
+    parser.add_argument("--check", action="store_true", help="fail on regressions against baselines.json")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="allowed slowdown (1.0 = 2x baseline); default: the ratio stored in baselines.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    print_table(f"Load test ({args.requests} requests/target, fake LLM {args.llm_latency * 1000:.0f}ms)", results)
+
+    if args.update_baseline:
+        save_baselines("loadtest", results)
+    if args.check:
+        failures = check_regressions("loadtest", results, args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Banking-service microbenchmarks at synthetic data sizes
+
+    python -m bench.microbench --customers 100000 --transactions 20
+    python -m bench.microbench --check          # compare with baselines.json
+    python -m bench.microbench --update-baseline
+
+Seeds a scratch SQLite database with `app.services.seed`, builds an in-memory
+store of the same shape, and times the per-call paths the agents hit: identity
+lookup, recent transactions, deep keyset pages, card blocks, columnar spending
+analytics, the fast-path router and context compaction. Also reports the
+router's fast-path hit rate over a scripted multi-turn conversation.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from bench.common import (check_regressions, isolate_environment, print_table, save_baselines,
+                          summarize)
+
+
+def timeit(func: Callable[[int], object], iterations: int) -> Dict:
+    latencies: List[float] = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+def build_memory_customers(count: int, transactions: int, seed: int = 42) -> Dict[str, Dict]:
+    from app.services.seed import generate_customers, generate_transactions
+
+    rng = random.Random(seed + 1)
+    customers = {}
+    for customer_id, pin, name, balance, currency in generate_customers(count, seed):
+        customers[customer_id] = {
+            "pin": pin, "name": name, "balance": balance, "currency": currency, "blocked_cards": [],
+            "transactions": [
+                {"id": t[0], "date": t[2], "amount": t[3], "merchant": t[4], "category": t[5], "status": t[6]}
+                for t in generate_transactions(customer_id, transactions, rng)
+            ],
+        }
+    return customers
+
+
+def store_benchmarks(prefix: str, store, customers: int, iterations: int, rng: random.Random) -> Dict[str, Dict]:
+    from app.services.seed import customer_id_for
+    from app.services.storage import encode_cursor
+
+    ids = [customer_id_for(rng.randint(1, customers)) for _ in range(iterations)]
+    # Cursors a few pages deep, found up front so the timed loop is a single keyset query
+    cursors = []
+    for customer_id in ids[:min(iterations, 200)]:
+        page = store.get_transactions(customer_id, 10)
+        cursors.append((customer_id, encode_cursor(page[-1]) if page else None))
+
+    return {
+        f"{prefix}.get_customer": timeit(lambda i: store.get_customer(ids[i]), iterations),
+        f"{prefix}.recent_5": timeit(lambda i: store.get_transactions(ids[i], 5), iterations),
+        f"{prefix}.page_after_cursor": timeit(
+            lambda i: store.get_transactions(cursors[i % len(cursors)][0], 5, cursors[i % len(cursors)][1]),
+            iterations,
+        ),
+        f"{prefix}.block_card": timeit(lambda i: store.block_card(ids[i], f"card-{i}", "bench"), iterations // 4 or 1),
+    }
+
+
+def analytics_benchmarks(store, customers: int, transactions: int, iterations: int, rng: random.Random):
+    from app.services.analytics import CustomerTransactions
+    from app.services.seed import customer_id_for
+
+    ids = [customer_id_for(rng.randint(1, customers)) for _ in range(min(iterations, 500))]
+    rows = {cid: store.get_transactions(cid, transactions) for cid in ids}
+    columns = {cid: CustomerTransactions(rows[cid]) for cid in ids}
+    filters = [
+        {"merchant": "Amazon"},
+        {"category": "groceries", "start_date": "2000-01-01"},
+        {"status": "declined"},
+        {},
+    ]
+
+    def query(i):
+        c = columns[ids[i % len(ids)]]
+        c.summarize(c.select(**filters[i % len(filters)]))
+
+    return {
+        "analytics.build_columns": timeit(lambda i: CustomerTransactions(rows[ids[i % len(ids)]]), len(ids)),
+        "analytics.query": timeit(query, iterations),
+    }
+
+
+def agent_benchmarks(iterations: int) -> Dict[str, Dict]:
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+    from app.agents.compaction import compact_history
+    from app.agents.router import classify
+
+    messages = ["hi there", "I lost my card yesterday", "what is my balance", "how do I open an account",
+                "my customer id is user123 and pin 1234", "the app keeps crashing"]
+    history = []
+    for turn in range(20):
+        call_id = f"c{turn}"
+        history += [
+            HumanMessage(content=f"question {turn} about my recent transactions", id=f"h{turn}"),
+            AIMessage(content="", id=f"a{turn}",
+                      tool_calls=[{"name": "get_recent_transactions", "args": {"customer_id": "user123"}, "id": call_id}]),
+            ToolMessage(content=str([{"id": f"t{n}", "amount": -10.0 * n} for n in range(20)]),
+                        tool_call_id=call_id, id=f"t{turn}"),
+            AIMessage(content=f"Here are your transactions for question {turn}.", id=f"r{turn}"),
+        ]
+
+    return {
+        "router.classify": timeit(lambda i: classify(messages[i % len(messages)]), iterations),
+        "compaction.80_messages": timeit(lambda i: compact_history(history), max(iterations // 10, 1)),
+    }
+
+
+# Customer messages with the reply the LLM would give if the router passes the turn on
+ROUTER_CONVERSATION = [
+    ("hi", "Hello! How can I help?"),
+    ("how do I open an account", None),
+    ("thanks", None),
+    ("the app keeps crashing", None),
+    ("what is my balance", "Please provide your Customer ID and PIN."),
+    ("user123 1234", "Your balance is 5000.00 USD. Is there anything else I can help you with?"),
+    ("thank you so much", None),
+    ("I lost my card", "I can block card 4321. Shall I proceed?"),
+    ("yes thanks", "Card 4321 is blocked. Is there anything else I can help you with?"),
+    ("bye", None),
+]
+# Fast-path share of ROUTER_CONVERSATION below which --check fails
+MIN_ROUTER_HIT_RATE = 0.5
+
+
+def router_hit_rate() -> float:
+    """Fast-path share over a multi-turn conversation, each turn seeing the previous reply"""
+    from app.agents.router import classify
+
+    previous, fast = None, 0
+    for message, llm_reply in ROUTER_CONVERSATION:
+        decision = classify(message, previous)
+        fast += decision.reply is not None
+        previous = decision.reply if decision.reply is not None else llm_reply
+    return fast / len(ROUTER_CONVERSATION)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banking-service microbenchmarks")
+    parser.add_argument("--customers", type=int, default=20000)
+    parser.add_argument("--transactions", type=int, default=20, help="transactions per customer")
+    parser.add_argument("--memory-customers", type=int, default=20000,
+                        help="customers for the in-memory store (it holds everything in RAM)")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--check", action="store_true", help="fail on regressions against baselines.json")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="allowed slowdown (1.0 = 2x baseline); default: the ratio stored in baselines.json")
+    args = parser.parse_args()
+
+    workdir = isolate_environment()
+    from app.services.seed import seed_database
+    from app.services.storage import MemoryBankingStore, SqliteBankingStore
+
+    db_path = os.path.join(workdir, "banking.sqlite")
+    seeded = seed_database(db_path, args.customers, args.transactions)
+    print(f"Seeded {seeded['customers']} customers / {seeded['transactions']} transactions in {seeded['seconds']}s")
+
+    rng = random.Random(args.seed)
+    results: Dict[str, Dict] = {}
+    sqlite_store = SqliteBankingStore(db_path)
+    results.update(store_benchmarks("sqlite", sqlite_store, args.customers, args.iterations, rng))
+    results.update(analytics_benchmarks(sqlite_store, args.customers, args.transactions, args.iterations, rng))
+
+    memory_customers = min(args.memory_customers, args.customers)
+    memory_store = MemoryBankingStore(build_memory_customers(memory_customers, args.transactions))
+    results.update(store_benchmarks("memory", memory_store, memory_customers, args.iterations, rng))
+    results.update(agent_benchmarks(args.iterations))
+
+    print_table(f"Microbenchmarks ({args.customers} customers x {args.transactions} transactions)", results)
+    hit_rate = router_hit_rate()
+    print(f"\nRouter fast-path hit rate over a {len(ROUTER_CONVERSATION)}-turn conversation: {hit_rate:.0%}")
+
+    if args.update_baseline:
+        save_baselines("microbench", results)
+    if args.check:
+        failures = check_regressions("microbench", results, args.tolerance)
+        if hit_rate < MIN_ROUTER_HIT_RATE:
+            failures.append(f"router hit rate {hit_rate:.0%} < {MIN_ROUTER_HIT_RATE:.0%}")
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
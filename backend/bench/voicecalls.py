@@ -0,0 +1,338 @@
+"""
+Simulated voice calls: per-turn latency, sessions per worker, memory per session
+
+    python -m bench.voicecalls --calls 200 --concurrency 50
+    python -m bench.voicecalls --concurrency 25,50,100 --speech 2.0   # capacity sweep
+    python -m bench.voicecalls --tracemalloc                          # Python heap per session
+
+Each call runs through the real `voice_agent.entrypoint` with the LiveKit job
+context, room and Gemini realtime session replaced by in-process stand-ins. A
+scripted customer speaks each turn (`--speech` seconds, not measured). The
+fake model then waits `--model-latency` before answering or issuing the turn's
+function call, which goes through the agent's `handle_tool_call`. Once a
+result is back, the spoken reply starts after `--reply-latency`. Per turn, the
+harness measures, from the end of the customer's speech:
+  model  end of speech -> function call issued (or reply, for turns without tools)
+  tool   handle_tool_call round trip (real dispatcher and banking backend)
+  reply  tool result -> first reply audio
+  turn   end of speech -> first reply audio
+Stage times are wall clock, so event-loop saturation shows up as growth over
+the configured model latencies. All calls share one simulated worker process,
+as with VOICE_JOB_EXECUTOR=thread.
+"""
+import argparse
+import asyncio
+import contextvars
+import math
+import os
+import random
+import resource
+import sys
+import time
+import types
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bench.common import isolate_environment, print_table, summarize
+
+# One scripted call: (turn, function calls the model makes for it)
+CALL_SCRIPT = [
+    ("greeting", []),
+    ("verify", [("verify_identity", {"customer_id": "{customer_id}", "pin": "{pin}"})]),
+    ("balance", [("get_account_balance", {})]),
+    ("transactions", [("get_recent_transactions", {"count": 5})]),
+    ("card status", [("get_card_status", {})]),
+    ("spending", [("analyze_spending", {"period": "all"})]),
+    ("goodbye", []),
+]
+CUSTOMERS = [("user123", "1234"), ("user456", "5678")]
+STAGES = ("model", "tool", "reply", "turn")
+
+# The call whose entrypoint is running in the current task; the fake model attaches its session to it
+_CURRENT_CALL: "contextvars.ContextVar[SimulatedCall]" = contextvars.ContextVar("current_call")
+
+
+# ---- LiveKit / Gemini stand-ins ---------------------------------------------
+
+class FakeParticipant:
+    def __init__(self, identity: str):
+        self.identity = identity
+
+
+class FakeRoom:
+    """Event emitter with the `room.on(event)` decorator form the entrypoint uses"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._handlers: Dict[str, List[Callable]] = {}
+
+    def on(self, event: str, callback: Optional[Callable] = None):
+        def register(fn: Callable) -> Callable:
+            self._handlers.setdefault(event, []).append(fn)
+            return fn
+        return register(callback) if callback is not None else register
+
+    def emit(self, event: str, *args):
+        for handler in self._handlers.get(event, []):
+            handler(*args)
+
+
+class FakeJobProcess:
+    def __init__(self):
+        self.userdata: Dict[str, Any] = {}
+
+
+class FakeJobContext:
+    """The parts of livekit.agents.JobContext the entrypoint touches"""
+
+    def __init__(self, proc: FakeJobProcess, job_id: str, participant: FakeParticipant):
+        self.proc = proc
+        self.job = types.SimpleNamespace(id=job_id)
+        self.room = FakeRoom(f"sim-{job_id}")
+        self._participant = participant
+        self._shutdown_callbacks: List[Callable] = []
+        self.shutdown_reason: Optional[str] = None
+
+    async def connect(self):
+        await asyncio.sleep(0)
+
+    async def wait_for_participant(self) -> FakeParticipant:
+        return self._participant
+
+    def add_shutdown_callback(self, callback: Callable):
+        self._shutdown_callbacks.append(callback)
+
+    def shutdown(self, reason: str = ""):
+        self.shutdown_reason = reason
+
+    async def run_shutdown_callbacks(self):
+        for callback in self._shutdown_callbacks:
+            await callback(self.shutdown_reason or "")
+
+
+class FakeRealtimeSession:
+    def __init__(self, call: "SimulatedCall"):
+        self.call = call
+        self.handlers: Dict[str, Callable] = {}
+        self.closed = False
+
+    def on(self, event: str, handler: Callable):
+        self.handlers[event] = handler
+        if event == "function_call":
+            self.call.ready.set()
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeRealtimeModel:
+    """Stands in for google.realtime.RealtimeModel; sessions attach to the running simulated call"""
+
+    def __init__(self, **options):
+        self.options = options
+
+    def sessions(self):
+        return self
+
+    def create(self) -> FakeRealtimeSession:
+        call = _CURRENT_CALL.get()
+        call.session = FakeRealtimeSession(call)
+        return call.session
+
+
+def _install_livekit_stand_ins():
+    """
+    Names voice_agent imports from livekit, for machines without the voice
+    extras (requirements-voice.txt). Simulated calls never reach LiveKit itself.
+    """
+    livekit = types.ModuleType("livekit")
+    agents = types.ModuleType("livekit.agents")
+    rtc = types.ModuleType("livekit.rtc")
+    plugins = types.ModuleType("livekit.plugins")
+    google = types.ModuleType("livekit.plugins.google")
+    for name in ("JobContext", "JobProcess", "WorkerOptions"):
+        setattr(agents, name, type(name, (), {}))
+    agents.JobExecutorType = types.SimpleNamespace(THREAD="thread", PROCESS="process")
+    agents.cli = types.SimpleNamespace(run_app=None)
+    rtc.RemoteParticipant = FakeParticipant
+    google.realtime = types.SimpleNamespace(RealtimeModel=FakeRealtimeModel)
+    livekit.agents, livekit.rtc, livekit.plugins, plugins.google = agents, rtc, plugins, google
+    sys.modules.update({
+        "livekit": livekit, "livekit.agents": agents, "livekit.rtc": rtc,
+        "livekit.plugins": plugins, "livekit.plugins.google": google,
+    })
+
+
+def import_voice_agent():
+    try:
+        import voice_agent
+    except ModuleNotFoundError as e:
+        if not (e.name or "").startswith("livekit"):
+            raise
+        _install_livekit_stand_ins()
+        import voice_agent
+    # The realtime model is looked up at call time; swap it even when the real plugin is installed
+    voice_agent.google = types.SimpleNamespace(realtime=types.SimpleNamespace(RealtimeModel=FakeRealtimeModel))
+    return voice_agent
+
+
+# ---- simulation -------------------------------------------------------------
+
+def _rss_mb() -> float:
+    """Current resident memory in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SimulatedCall:
+    def __init__(self, index: int):
+        self.index = index
+        self.customer_id, self.pin = CUSTOMERS[index % len(CUSTOMERS)]
+        self.ready = asyncio.Event()
+        self.session: Optional[FakeRealtimeSession] = None
+
+
+class Simulation:
+    def __init__(self, voice_agent, speech: float, model_latency: float, reply_latency: float, jitter: float):
+        self.voice_agent = voice_agent
+        self.speech = speech
+        self.model_latency = model_latency
+        self.reply_latency = reply_latency
+        self.jitter = jitter
+        self.proc = FakeJobProcess()
+        self.stages: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self.tool_errors = 0
+        self.call_errors = 0
+        self.peak_sessions = 0
+        self.peak_rss = 0.0
+
+    def _jittered(self, seconds: float) -> float:
+        return max(seconds * (1 + random.uniform(-self.jitter, self.jitter)), 0.0)
+
+    def _sample(self):
+        self.peak_sessions = max(self.peak_sessions, self.voice_agent.ACTIVE_CALLS.count)
+        self.peak_rss = max(self.peak_rss, _rss_mb())
+
+    async def _turn(self, call: SimulatedCall, function_calls: List[Tuple[str, Dict]]):
+        speech_end = time.perf_counter()
+        await asyncio.sleep(self._jittered(self.model_latency))
+        model_done = time.perf_counter()
+        self.stages["model"].append(model_done - speech_end)
+        if function_calls:
+            handler = call.session.handlers["function_call"]
+            for name, arguments in function_calls:
+                arguments = {k: v.format(customer_id=call.customer_id, pin=call.pin) if isinstance(v, str) else v
+                             for k, v in arguments.items()}
+                started = time.perf_counter()
+                result = await handler(name, arguments)
+                self.stages["tool"].append(time.perf_counter() - started)
+                self.tool_errors += isinstance(result, dict) and "error" in result
+            tools_done = time.perf_counter()
+            await asyncio.sleep(self._jittered(self.reply_latency))
+            self.stages["reply"].append(time.perf_counter() - tools_done)
+        self.stages["turn"].append(time.perf_counter() - speech_end)
+
+    async def run_call(self, index: int):
+        call = SimulatedCall(index)
+        participant = FakeParticipant(f"customer-{index}")
+        ctx = FakeJobContext(self.proc, f"sim-{index}", participant)
+        _CURRENT_CALL.set(call)
+        # The entrypoint task copies this context, so its fake model finds `call`
+        entry = asyncio.create_task(self.voice_agent.entrypoint(ctx))
+        try:
+            ready = asyncio.create_task(call.ready.wait())
+            await asyncio.wait({entry, ready}, return_when=asyncio.FIRST_COMPLETED)
+            if not call.ready.is_set():
+                ready.cancel()
+                await entry  # raises the entrypoint's error
+                raise RuntimeError("entrypoint returned before registering tool calls")
+            self._sample()
+            for _, function_calls in CALL_SCRIPT:
+                await asyncio.sleep(self._jittered(self.speech))
+                await self._turn(call, function_calls)
+                self._sample()
+            ctx.room.emit("participant_disconnected", participant)
+            await entry
+        except Exception as e:
+            self.call_errors += 1
+            print(f"call {index} failed: {type(e).__name__}: {e}", file=sys.stderr)
+            if not entry.done():
+                entry.cancel()
+        finally:
+            await ctx.run_shutdown_callbacks()
+
+    async def run(self, calls: int, concurrency: int) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self.voice_agent.prewarm(self.proc)
+        prewarm_ms = (time.perf_counter() - started) * 1000
+        baseline_rss = _rss_mb()
+        pending = iter(range(calls))
+
+        async def worker():
+            for index in pending:
+                await self.run_call(index)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+        max_sessions = self.voice_agent.MAX_SESSIONS_PER_WORKER
+        return {
+            "calls": calls,
+            "failed_calls": self.call_errors,
+            "tool_errors": self.tool_errors,
+            "wall_s": round(wall, 2),
+            "calls_per_s": round(calls / wall, 2) if wall else 0.0,
+            "prewarm_ms": round(prewarm_ms, 1),
+            "peak_sessions_per_worker": self.peak_sessions,
+            "workers_needed_at_voice_max_sessions": math.ceil(self.peak_sessions / max(max_sessions, 1)),
+            "voice_max_sessions": max_sessions,
+            "baseline_rss_mb": round(baseline_rss, 1),
+            "peak_rss_mb": round(self.peak_rss, 1),
+            "rss_per_session_mb": round((self.peak_rss - baseline_rss) / max(self.peak_sessions, 1), 3),
+        }
+
+
+async def run_level(voice_agent, args, concurrency: int) -> Tuple[Dict[str, Dict], Dict[str, Any]]:
+    simulation = Simulation(voice_agent, args.speech, args.model_latency, args.reply_latency, args.jitter)
+    if args.tracemalloc:
+        import tracemalloc
+
+        # Only allocations made after this point are traced: the peak is what the calls added
+        tracemalloc.start()
+    summary = await simulation.run(args.calls, concurrency)
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        summary["heap_per_session_kb"] = round(peak / 1024 / max(simulation.peak_sessions, 1), 1)
+    stages = {f"{stage}@c{concurrency}": summarize(values) for stage, values in simulation.stages.items()}
+    return stages, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated voice calls through voice_agent.entrypoint")
+    parser.add_argument("--calls", type=int, default=100, help="calls per concurrency level")
+    parser.add_argument("--concurrency", default="50", help="concurrent calls; comma-separated for a sweep")
+    parser.add_argument("--speech", type=float, default=0.5, help="customer speaking time per turn (seconds)")
+    parser.add_argument("--model-latency", type=float, default=0.3, help="end of speech -> function call/reply")
+    parser.add_argument("--reply-latency", type=float, default=0.25, help="tool result -> first reply audio")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction applied to every simulated delay")
+    parser.add_argument("--tracemalloc", action="store_true", help="measure Python heap per session (slower)")
+    args = parser.parse_args()
+
+    isolate_environment()
+    voice_agent = import_voice_agent()
+    for level in [int(c) for c in args.concurrency.split(",")]:
+        stages, summary = asyncio.run(run_level(voice_agent, args, level))
+        print_table(
+            f"Voice turns ({args.calls} calls x {len(CALL_SCRIPT)} turns, {level} concurrent, "
+            f"model {args.model_latency * 1000:.0f}ms + reply {args.reply_latency * 1000:.0f}ms)",
+            stages,
+        )
+        for key, value in summary.items():
+            print(f"  {key:40s} {value}")
+
+
+if __name__ == "__main__":
+    main()
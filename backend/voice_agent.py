@@ -3,15 +3,20 @@ Bank ABC Voice Agent - LiveKit Integration with Gemini Live Audio
 """
 import asyncio
 import logging
+import resource
+import threading
+import time
 from typing import Dict, Any
 from livekit import agents, rtc
-from livekit.agents import JobContext, WorkerOptions, cli
+from livekit.agents import JobContext, JobExecutorType, JobProcess, WorkerOptions, cli
 from livekit.plugins import google
 import os
 from dotenv import load_dotenv
 
 # Import our banking tools
-from app.services.banking import verify_identity, get_recent_transactions, block_card, get_account_balance
+from app.agents import prompts
+from app.agents.voice_tools import BANKING_TOOLS, BankingAssistant, ToolDispatcher
+from app.services import metrics
 
 load_dotenv()
 
@@ -19,118 +24,88 @@ logger = logging.getLogger("bank-abc-voice-agent")
 logger.setLevel(logging.INFO)
 
 
-class BankingAssistant:
-    """Banking assistant with voice interface and tool calling"""
-    
+# Static per-process configuration: built once, shared by every call in the process
+SYSTEM_PROMPT = prompts.SYSTEM_PROMPTS["voice"]
+
+# Concurrent calls per worker, whichever executor runs them
+MAX_SESSIONS_PER_WORKER = int(os.getenv("VOICE_MAX_SESSIONS", "4"))
+# "thread" runs several calls in one prewarmed process; "process" isolates each call
+JOB_EXECUTOR = os.getenv("VOICE_JOB_EXECUTOR", "thread").lower()
+
+
+class ActiveCalls:
+    """
+    Calls running in this process. Thread-executor jobs share the process (and
+    this counter) across their own threads and event loops, so it is the whole
+    worker's count; with the process executor each call has a process of its own.
+    """
+
     def __init__(self):
-        self.customer_id = None
-        self.is_verified = False
-        self.conversation_context = []
-        
-    async def verify_customer(self, customer_id: str, pin: str) -> Dict[str, Any]:
-        """Verify customer identity"""
-        result = verify_identity(customer_id, pin)
-        if result:
-            self.customer_id = customer_id
-            self.is_verified = True
-            return {"success": True, "message": f"Identity verified for customer {customer_id}"}
-        return {"success": False, "message": "Invalid credentials. Please try again."}
-    
-    async def get_balance(self) -> Dict[str, Any]:
-        """Get account balance - requires verification"""
-        if not self.is_verified:
-            return {"error": "Please verify your identity first by providing your customer ID and PIN."}
-        
-        balance = get_account_balance(self.customer_id)
-        return balance
-    
-    async def get_transactions(self, count: int = 5) -> Dict[str, Any]:
-        """Get recent transactions - requires verification"""
-        if not self.is_verified:
-            return {"error": "Please verify your identity first."}
-        
-        transactions = get_recent_transactions(self.customer_id, count)
-        return {"transactions": transactions}
-    
-    async def block_customer_card(self, card_id: str, reason: str) -> Dict[str, Any]:
-        """Block a card - irreversible action, requires verification and confirmation"""
-        if not self.is_verified:
-            return {"error": "Please verify your identity first."}
-        
-        result = block_card(self.customer_id, card_id, reason)
-        return {"success": True, "message": result}
-
-
-# Define tool schemas for Gemini function calling
-BANKING_TOOLS = [
-    {
-        "name": "verify_customer",
-        "description": "Verify customer identity using their customer ID and PIN. MUST be called before any sensitive operations like checking balance or transactions.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "customer_id": {"type": "string", "description": "Customer ID (e.g., user123)"},
-                "pin": {"type": "string", "description": "4-digit PIN number"}
-            },
-            "required": ["customer_id", "pin"]
-        }
-    },
-    {
-        "name": "get_balance",
-        "description": "Get customer's account balance. Requires prior identity verification.",
-        "parameters": {"type": "object", "properties": {}}
-    },
-    {
-        "name": "get_transactions",
-        "description": "Get customer's recent transactions. Requires prior identity verification.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "count": {"type": "integer", "description": "Number of transactions to retrieve (default 5)"}
-            }
-        }
-    },
-    {
-        "name": "block_customer_card",
-        "description": "Block a customer's card. This is IRREVERSIBLE. Requires verification and explicit customer confirmation.",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "card_id": {"type": "string", "description": "Card identifier"},
-                "reason": {"type": "string", "description": "Reason for blocking (lost, stolen, compromised)"}
-            },
-            "required": ["card_id", "reason"]
-        }
-    }
-]
+        self._lock = threading.Lock()
+        self.count = 0
+        self.peak = 0
+
+    def start(self) -> int:
+        with self._lock:
+            self.count += 1
+            self.peak = max(self.peak, self.count)
+            return self.count
+
+    def end(self):
+        with self._lock:
+            self.count -= 1
+
+
+ACTIVE_CALLS = ActiveCalls()
+
+
+def _rss_mb() -> float:
+    """Peak resident memory of this process in MB (ru_maxrss is KB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def prewarm(proc: JobProcess):
+    """Load the banking backend and tool schemas once per worker process"""
+    started = time.perf_counter()
+    from app.services import banking  # builds the store (and SQLite pool) on import
+
+    proc.userdata["store"] = banking.store
+    proc.userdata["system_prompt"] = SYSTEM_PROMPT
+    proc.userdata["tools"] = BANKING_TOOLS
+    logger.info(
+        f"Prewarmed worker process in {(time.perf_counter() - started) * 1000:.0f}ms, rss {_rss_mb():.1f}MB"
+    )
+
+
+def worker_load(worker) -> float:
+    """
+    Report load as active calls / allowed calls so the dispatcher stops at the
+    limit. Runs in the main worker process, where `active_jobs` covers every
+    executor, so the limit applies to the worker as a whole.
+    """
+    return min(len(worker.active_jobs) / max(MAX_SESSIONS_PER_WORKER, 1), 1.0)
 
 
 async def entrypoint(ctx: JobContext):
     """Main entry point for the voice agent"""
-    
+    job_started = time.perf_counter()
+    userdata = ctx.proc.userdata
+    if "tools" not in userdata:
+        prewarm(ctx.proc)
+
     logger.info(f"Connecting to room {ctx.room.name}")
     
     # Initialize banking assistant
-    assistant = BankingAssistant()
-    
-    # Create system prompt with banking context
-    system_prompt = """You are a helpful banking assistant for Bank ABC.
-    
-CRITICAL SECURITY RULES:
-1. You MUST verify the customer's identity using verify_customer(customer_id, pin) BEFORE providing any account details or performing actions.
-2. If the customer hasn't provided their Customer ID and PIN, politely ask for them.
-3. For irreversible actions like blocking a card, ask for explicit confirmation: "To confirm, should I proceed with blocking your card?"
-
-AVAILABLE FLOWS:
-- Card & ATM Issues: Help with lost/stolen cards, declined payments. Use block_customer_card if needed.
-- Account Servicing: Provide balance, transaction history, profile updates.
-- Account Opening: Provide information about new accounts (informational only).
-- Digital App Support: Help with login issues, app problems (informational only).
-- Transfers & Bill Payments: Assist with transfer issues (informational only).
-- Account Closure: Capture reason and provide retention information (informational only).
-
-Be conversational, empathetic, and professional. Keep responses concise for voice interaction.
-"""
+    assistant = BankingAssistant(session_id=f"voice:{ctx.job.id}")
+    agent_session = None
+
+    async def on_shutdown(reason: str = ""):
+        # Verification does not outlive the call
+        assistant.end_session()
+        if agent_session is not None and hasattr(agent_session, "aclose"):
+            await agent_session.aclose()
+
+    ctx.add_shutdown_callback(on_shutdown)
     
     # Connect to participant (first one that joins)
     await ctx.connect()
@@ -139,65 +114,77 @@ Be conversational, empathetic, and professional. Keep responses concise for voic
     # Wait for participant
     participant = await ctx.wait_for_participant()
     logger.info(f"Participant {participant.identity} joined")
+
+    # The call ends when the customer leaves or the room goes away; no polling
+    call_ended = asyncio.Event()
+
+    @ctx.room.on("participant_disconnected")
+    def _on_participant_disconnected(remote: rtc.RemoteParticipant):
+        if remote.identity == participant.identity:
+            call_ended.set()
+
+    @ctx.room.on("disconnected")
+    def _on_room_disconnected(*_):
+        call_ended.set()
     
     # Initialize Gemini Live Audio session
+    active = ACTIVE_CALLS.start()
     try:
         model = google.realtime.RealtimeModel(
             model="models/gemini-2.0-flash-exp",
             voice="Kore",  # Voice option
             temperature=0.8,
-            system_instruction=system_prompt,
-            tools=BANKING_TOOLS
+            system_instruction=userdata["system_prompt"],
+            tools=userdata["tools"]
         )
         
         # Create assistant session
         agent_session = model.sessions().create()
         
-        logger.info("Gemini Live Audio session created")
+        logger.info(
+            f"Gemini Live Audio session created in {(time.perf_counter() - job_started) * 1000:.0f}ms "
+            f"({active} active in {'worker' if JOB_EXECUTOR == 'thread' else 'this job process'}, "
+            f"rss {_rss_mb():.1f}MB)"
+        )
         
-        # Handle audio streaming and tool calls
+        # Table-driven dispatch: backend calls run off the event loop with per-tool timeouts
+        dispatcher = ToolDispatcher(assistant, userdata["tools"])
+
         async def handle_tool_call(function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
             """Execute banking tool calls"""
-            logger.info(f"Tool call: {function_name} with {arguments}")
-            
-            if function_name == "verify_customer":
-                return await assistant.verify_customer(
-                    arguments.get("customer_id"),
-                    arguments.get("pin")
-                )
-            elif function_name == "get_balance":
-                return await assistant.get_balance()
-            elif function_name == "get_transactions":
-                return await assistant.get_transactions(arguments.get("count", 5))
-            elif function_name == "block_customer_card":
-                return await assistant.block_customer_card(
-                    arguments.get("card_id"),
-                    arguments.get("reason")
-                )
-            else:
-                return {"error": f"Unknown function: {function_name}"}
+            logger.info(f"Tool call: {function_name} with {sorted((arguments or {}).keys())}")
+            return await dispatcher.dispatch(function_name, arguments)
         
         # Run the agent session
         agent_session.on("function_call", handle_tool_call)
         
-        # Start audio streaming (this would be more complex in real implementation)
-        # For now, this is a simplified structure
         logger.info("Voice agent running. Listening for audio...")
-        
-        # Keep session alive
-        while True:
-            await asyncio.sleep(1)
+        await call_ended.wait()
+        logger.info(f"Participant {participant.identity} left; ending call")
             
     except Exception as e:
         logger.error(f"Error in voice agent: {e}")
         raise
+    finally:
+        ACTIVE_CALLS.end()
+        ctx.shutdown(reason="call ended")
 
 
 if __name__ == "__main__":
+    # Prometheus scrape target for tool latency; jobs share this process with the thread executor
+    if os.getenv("VOICE_METRICS_PORT"):
+        metrics.serve(int(os.getenv("VOICE_METRICS_PORT")))
+
     # Run the LiveKit agent worker
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
+            load_fnc=worker_load,
+            # Stop accepting jobs once MAX_SESSIONS_PER_WORKER calls are active
+            load_threshold=1.0,
+            job_executor_type=JobExecutorType.THREAD if JOB_EXECUTOR == "thread" else JobExecutorType.PROCESS,
+            num_idle_processes=int(os.getenv("VOICE_IDLE_PROCESSES", "1")),
             api_key=os.getenv("LIVEKIT_API_KEY"),
             api_secret=os.getenv("LIVEKIT_API_SECRET"),
             ws_url=os.getenv("LIVEKIT_URL"),
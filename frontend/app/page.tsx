@@ -2,7 +2,7 @@
 
 import React, { useState, useRef, useEffect } from 'react';
 import { Send, Phone, User, Activity, ShieldCheck } from 'lucide-react';
-import { sendMessage } from '@/lib/agent';
+import { SessionExpiredError, newIdempotencyKey, streamMessage } from '@/lib/agent';
 import clsx from 'clsx';
 
 interface Message {
@@ -16,6 +16,7 @@ export default function Home() {
   const [loading, setLoading] = useState(false);
   const [customerId, setCustomerId] = useState('user123'); // Default test user
   const [threadId, setThreadId] = useState<string | undefined>(undefined);
+  const [sessionToken, setSessionToken] = useState<string | undefined>(undefined);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   const scrollToBottom = () => {
@@ -27,23 +28,56 @@ export default function Home() {
   }, [messages]);
 
   const handleSend = async () => {
-    if (!input.trim()) return;
+    // Ignore double-submits while a reply is in flight
+    if (!input.trim() || loading) return;
 
     const userMsg: Message = { role: 'user', content: input };
     setMessages(prev => [...prev, userMsg]);
     setInput('');
     setLoading(true);
 
+    // Placeholder agent bubble that fills in as tokens stream
+    setMessages(prev => [...prev, { role: 'agent', content: '' }]);
+    const setAgentMessage = (content: string) => {
+      setMessages(prev => [...prev.slice(0, -1), { role: 'agent', content }]);
+    };
+
+    // Same key on the retry: the backend joins or replays the first attempt instead of re-running it
+    const idempotencyKey = newIdempotencyKey();
+    const send = (thread?: string, token?: string) => {
+      let streamed = '';
+      return streamMessage(userMsg.content, {
+        onToken: (token) => {
+          streamed += token;
+          setAgentMessage(streamed);
+        },
+        // A new model call after a tool run starts a fresh answer
+        onToolStart: () => { streamed = ''; },
+      }, customerId, thread, token, idempotencyKey);
+    };
+
     try {
-      const response = await sendMessage(userMsg.content, customerId, threadId);
+      let response;
+      try {
+        response = await send(threadId, sessionToken);
+      } catch (error) {
+        if (error instanceof SessionExpiredError) {
+          // The server no longer accepts this thread: drop it and continue in a new one
+          console.warn("Chat session expired; starting a new conversation");
+          setThreadId(undefined);
+          setSessionToken(undefined);
+          response = await send();
+        } else {
+          console.warn("Retrying after failed attempt", error);
+          response = await send(threadId, sessionToken);
+        }
+      }
       setThreadId(response.thread_id);
-
-      const agentMsg: Message = { role: 'agent', content: response.response };
-      setMessages(prev => [...prev, agentMsg]);
+      setSessionToken(response.session_token);
+      setAgentMessage(response.response);
     } catch (error) {
       console.error("Failed to get response", error);
-      const errorMsg: Message = { role: 'agent', content: "Sorry, I encountered an error. Please check the backend connection." };
-      setMessages(prev => [...prev, errorMsg]);
+      setAgentMessage("Sorry, I encountered an error. Please check the backend connection.");
     } finally {
       setLoading(false);
     }
@@ -140,7 +174,7 @@ export default function Home() {
               Live Call Simulation
             </h2>
             <button
-              onClick={() => { setMessages([]); setThreadId(undefined); }}
+              onClick={() => { setMessages([]); setThreadId(undefined); setSessionToken(undefined); }}
               className="text-xs text-red-600 hover:text-red-800 font-medium"
             >
               Reset Call
@@ -156,7 +190,7 @@ export default function Home() {
               </div>
             )}
 
-            {messages.map((msg, idx) => (
+            {messages.filter(msg => msg.content).map((msg, idx) => (
               <div key={idx} className={clsx(
                 "flex w-full",
                 msg.role === 'user' ? "justify-end" : "justify-start"
@@ -172,7 +206,7 @@ export default function Home() {
               </div>
             ))}
 
-            {loading && (
+            {loading && !messages[messages.length - 1]?.content && (
               <div className="flex justify-start w-full">
                 <div className="bg-gray-100 p-3 rounded-lg rounded-bl-none flex space-x-1 items-center">
                   <div className="w-2 h-2 bg-gray-400 rounded-full animate-bounce"></div>
@@ -5,18 +5,106 @@ const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
 export interface ChatResponse {
     response: string;
     thread_id: string;
+    // Must accompany thread_id on later turns: the thread id alone is not accepted
+    session_token: string;
 }
 
-export const sendMessage = async (message: string, customerId?: string, threadId?: string): Promise<ChatResponse> => {
+// One key per user message, reused on retries: the backend runs the turn once and replays its result
+export const newIdempotencyKey = (): string =>
+    typeof crypto !== 'undefined' && 'randomUUID' in crypto
+        ? crypto.randomUUID()
+        : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+
+export const sendMessage = async (
+    message: string,
+    customerId?: string,
+    threadId?: string,
+    sessionToken?: string,
+    idempotencyKey: string = newIdempotencyKey(),
+): Promise<ChatResponse> => {
     try {
         const response = await axios.post<ChatResponse>(`${API_BASE_URL}/chat`, {
             message,
             customer_id: customerId,
             thread_id: threadId,
-        });
+            session_token: sessionToken,
+        }, { headers: { 'Idempotency-Key': idempotencyKey } });
         return response.data;
     } catch (error) {
         console.error("Error sending message:", error);
+        if (axios.isAxiosError(error) && error.response?.status === 403) {
+            throw new SessionExpiredError("Chat session expired");
+        }
         throw error;
     }
 };
+
+// 403 from the chat endpoints: the session token is not valid for this thread (e.g. after a
+// server restart). The thread can't be continued; start a new one.
+export class SessionExpiredError extends Error {}
+
+export interface StreamHandlers {
+    onToken?: (token: string) => void;
+    onToolStart?: (name: string) => void;
+    onToolEnd?: (name: string) => void;
+}
+
+// Streams the agent reply from /chat/stream (Server-Sent Events) and resolves with the final response
+export const streamMessage = async (
+    message: string,
+    handlers: StreamHandlers,
+    customerId?: string,
+    threadId?: string,
+    sessionToken?: string,
+    idempotencyKey: string = newIdempotencyKey(),
+): Promise<ChatResponse> => {
+    const res = await fetch(`${API_BASE_URL}/chat/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            Accept: 'text/event-stream',
+            'Idempotency-Key': idempotencyKey,
+        },
+        body: JSON.stringify({
+            message, customer_id: customerId, thread_id: threadId, session_token: sessionToken,
+        }),
+    });
+    if (res.status === 403) {
+        throw new SessionExpiredError("Chat session expired");
+    }
+    if (!res.ok || !res.body) {
+        throw new Error(`Stream request failed with status ${res.status}`);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // SSE frames are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            for (const line of frame.split('\n')) {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            }
+            const payload = data ? JSON.parse(data) : {};
+
+            if (event === 'token') handlers.onToken?.(payload.content);
+            else if (event === 'tool_start') handlers.onToolStart?.(payload.name);
+            else if (event === 'tool_end') handlers.onToolEnd?.(payload.name);
+            else if (event === 'done') return payload as ChatResponse;
+            else if (event === 'error') throw new Error(payload.detail);
+        }
+    }
+    throw new Error("Stream ended before completion");
+};